@@ -0,0 +1,274 @@
+"""
+benchmarks/bench_sync.py
+
+Sync throughput benchmarks against in-process fake Strava and Google Calendar APIs.
+
+For each size (10, 1k and 50k activities by default) runs:
+- sync_strava_data: full backfill of every activity into an empty calendar.
+- save_activities: re-saving every activity after a rename (ledger hits, partial patches),
+  one Strava page of activities per call as sync_strava_data does.
+- update_strava_activity: webhook updates, one activity at a time.
+- delete_strava_activity: webhook deletes, one activity at a time.
+
+Activities are copies of example_activity.txt with new ids and start times. The fakes
+(tests/fakes) can add latency and random errors per upstream. Each run reports wall time,
+upstream calls, time spent inside the fakes and peak traced memory. Use --json to keep
+the numbers and compare them across commits.
+
+Needs the database from DATABASE_URL. Everything a run writes is rolled back at the end,
+except the shared Strava rate-limit rows.
+
+Run from server/ with `python -m benchmarks.bench_sync [--sizes 10,1000] [--json out.json]`.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from datetime import datetime, timedelta, timezone
+from collections import Counter
+from pathlib import Path
+from database import async_engine
+from models.user import User
+from models.google_user import GoogleUser
+from models.strava_user import StravaUser
+from integrations import http_client
+from services.strava import (
+    SyncCursor, sync_strava_data, save_activities, update_strava_activity, delete_strava_activity
+)
+from integrations.strava_api import MAX_PER_PAGE
+from tests.fakes.google_calendar import FakeGoogleCalendar
+from tests.fakes.strava import FakeStrava, make_activity
+import models  # registers every model with SQLAlchemy
+import argparse
+import asyncio
+import httpx
+import json
+import os
+import random
+import re
+import time
+import tracemalloc
+import uuid
+
+EXAMPLE_ACTIVITY = Path(__file__).resolve().parents[2] / "example_activity.txt"
+DEFAULT_SIZES = [10, 1_000, 50_000]
+
+
+class FaultInjectingTransport(httpx.AsyncBaseTransport):
+    """
+    Serve requests from a fake's handler after a delay, failing a share of them.
+
+    Args:
+        handler: The fake's handle(request) method.
+        latency (float): Seconds added to every request (simulated network round trip).
+        error_rate (float): Share of requests answered with error_status instead of the fake's response.
+        error_status (int): Status code of injected errors.
+        seed (int): Seed for choosing which requests fail, so runs are repeatable.
+    """
+    def __init__(self, handler, latency: float = 0, error_rate: float = 0, error_status: int = 503, seed: int = 0):
+        self.handler = handler
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        # Time spent inside the fake itself, to tell it apart from the code under test
+        self.handler_seconds = 0.0
+        self.injected_errors = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.injected_errors += 1
+            return httpx.Response(self.error_status, json={"error": {"code": self.error_status, "message": "Injected"}})
+        started = time.perf_counter()
+        response = self.handler(request)
+        self.handler_seconds += time.perf_counter() - started
+        return response
+
+
+def load_example_activity(path: Path = EXAMPLE_ACTIVITY) -> dict:
+    """Read the first activity of example_activity.txt (a Strava export that may have trailing commas)."""
+    if not path.exists():
+        return make_activity(1, datetime(2026, 1, 1, 12, tzinfo=timezone.utc))
+    text = re.sub(r",(\s*[\]}])", r"\1", path.read_text())
+    data = json.loads(text)
+    return data[0] if isinstance(data, list) else data
+
+
+def seed_activities(fake: FakeStrava, template: dict, count: int, start: datetime) -> list[dict]:
+    """Add count copies of template to the fake Strava, six hours apart."""
+    activities = []
+    for i in range(count):
+        activity = dict(template)
+        activity["id"] = 10_000_000 + i
+        activity["name"] = f"{template['name']} #{i}"
+        activity["start_date"] = (start + timedelta(hours=6 * i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        activities.append(activity)
+    fake.activities.update({activity["id"]: activity for activity in activities})
+    return activities
+
+
+class Bench:
+    """Fakes, transports and a benchmark user for one size; measures each scenario."""
+    def __init__(self, args, size: int):
+        self.args = args
+        self.size = size
+        self.google = FakeGoogleCalendar()
+        self.strava = FakeStrava()
+        # The benchmark measures sync code, not the Strava budget
+        self.strava.rate_limit = self.strava.read_rate_limit = (10 ** 9, 10 ** 9)
+        self.google_transport = FaultInjectingTransport(
+            self.google.handle, args.google_latency, args.google_error_rate, args.google_error_status, args.seed
+        )
+        self.strava_transport = FaultInjectingTransport(
+            self.strava.handle, args.strava_latency, args.strava_error_rate, args.strava_error_status, args.seed
+        )
+        self.results: list[dict] = []
+
+    async def create_user(self, db: AsyncSession) -> StravaUser:
+        expiry = datetime.now(timezone.utc) + timedelta(days=1)
+        user = User(
+            name="Benchmark",
+            calendar_id=self.google.add_calendar(),
+            google_data=GoogleUser(access_token="google-token", refresh_token="refresh", access_token_expiry=expiry),
+        )
+        strava_user = StravaUser(
+            user=user, athlete_id=f"bench-{uuid.uuid4().hex[:12]}",
+            access_token="strava-token", refresh_token="refresh", expires_at=expiry
+        )
+        db.add(strava_user)
+        await db.commit()
+        return strava_user
+
+    async def measure(self, scenario: str, activities: int, run):
+        """Run one scenario and record wall time, upstream calls and peak memory."""
+        self.google.calls.clear()
+        self.strava.calls.clear()
+        for transport in (self.google_transport, self.strava_transport):
+            transport.handler_seconds = 0.0
+            transport.injected_errors = 0
+        if self.args.memory:
+            tracemalloc.start()
+
+        started = time.perf_counter()
+        error = None
+        try:
+            await run()
+        except Exception as e:
+            error = getattr(e, "detail", None) or repr(e)
+        wall = time.perf_counter() - started
+
+        peak = None
+        if self.args.memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        result = {
+            "scenario": scenario,
+            "size": self.size,
+            "activities": activities,
+            "wall_s": round(wall, 3),
+            "ms_per_activity": round(wall * 1000 / activities, 3) if activities else None,
+            "google_calls": dict(self.google.calls),
+            "strava_calls": dict(self.strava.calls),
+            "fake_s": round(self.google_transport.handler_seconds + self.strava_transport.handler_seconds, 3),
+            "injected_errors": self.google_transport.injected_errors + self.strava_transport.injected_errors,
+            "peak_mb": round(peak / 2 ** 20, 2) if peak is not None else None,
+            "error": error,
+        }
+        self.results.append(result)
+        print(format_result(result), flush=True)
+
+
+async def bench_size(args, size: int) -> list[dict]:
+    bench = Bench(args, size)
+    await http_client.start_clients({"google": bench.google_transport, "strava": bench.strava_transport})
+    template = load_example_activity()
+    activities = seed_activities(bench.strava, template, size, datetime(2020, 1, 1, 12, tzinfo=timezone.utc))
+    per_activity = activities[:min(size, args.per_activity_limit)]
+
+    # Like tests/conftest.py: commits only release savepoints, the outer transaction is rolled back
+    async with async_engine.connect() as connection:
+        transaction = await connection.begin()
+        sessions = async_sessionmaker(bind=connection, expire_on_commit=False, join_transaction_mode="create_savepoint")
+        try:
+            async with sessions() as db:
+                strava_user = await bench.create_user(db)
+
+                await bench.measure("sync_strava_data", size, lambda: sync_strava_data(strava_user, db))
+
+                for activity in activities:
+                    activity["name"] += " (renamed)"
+
+                # Page-sized calls like sync_strava_data makes (one call with every activity
+                # would exceed asyncpg's 32767 query parameters in the ledger queries)
+                async def save_pages():
+                    page_size = int(os.getenv("STRAVA_PAGE_SIZE", MAX_PER_PAGE))
+                    mode = os.getenv("CALENDAR_WRITE_MODE", "batch")
+                    cursor = SyncCursor(strava_user.last_synced_at)
+                    for start in range(0, len(activities), page_size):
+                        page = activities[start:start + page_size]
+                        await save_activities(strava_user, page, db, mode=mode, cursor=cursor)
+                await bench.measure("save_activities", size, save_pages)
+
+                async def update_each():
+                    for activity in per_activity:
+                        activity["name"] += " (edited)"
+                        await update_strava_activity(strava_user, activity["id"], db)
+                await bench.measure("update_strava_activity", len(per_activity), update_each)
+
+                async def delete_each():
+                    for activity in per_activity:
+                        await delete_strava_activity(strava_user, activity["id"], db)
+                await bench.measure("delete_strava_activity", len(per_activity), delete_each)
+        finally:
+            await transaction.rollback()
+            await http_client.close_clients()
+    return bench.results
+
+
+def format_result(result: dict) -> str:
+    calls = Counter(result["google_calls"]) + Counter(result["strava_calls"])
+    peak = f"{result['peak_mb']:.1f}MB" if result["peak_mb"] is not None else "-"
+    per = f"{result['ms_per_activity']:.2f}ms/act" if result["ms_per_activity"] is not None else "-"
+    line = (
+        f"{result['scenario']:<24} n={result['activities']:<6} {result['wall_s']:>9.3f}s  {per:>14}  "
+        f"peak {peak:>9}  fakes {result['fake_s']:.2f}s  calls {dict(calls)}"
+    )
+    if result["injected_errors"]:
+        line += f"  injected errors {result['injected_errors']}"
+    if result["error"]:
+        line += f"  ERROR {result['error']}"
+    return line
+
+
+async def main(args):
+    results = []
+    for size in args.sizes:
+        print(f"📏 {size} activities")
+        results.extend(await bench_size(args, size))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+        print(f"📝 Results written to {args.json}")
+    await async_engine.dispose()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sync throughput benchmarks against fake Strava and Google APIs")
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")], default=DEFAULT_SIZES,
+                        help="Comma-separated activity counts (default: 10,1000,50000)")
+    parser.add_argument("--per-activity-limit", type=int, default=1000,
+                        help="Activities driven through update/delete, one webhook call each (default: 1000)")
+    parser.add_argument("--google-latency", type=float, default=0, help="Seconds added to every Google request")
+    parser.add_argument("--strava-latency", type=float, default=0, help="Seconds added to every Strava request")
+    parser.add_argument("--google-error-rate", type=float, default=0, help="Share of Google requests that fail")
+    parser.add_argument("--strava-error-rate", type=float, default=0, help="Share of Strava requests that fail")
+    parser.add_argument("--google-error-status", type=int, default=503)
+    parser.add_argument("--strava-error-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0, help="Seed for injected errors")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="Skip tracemalloc (peak memory), which slows allocation-heavy runs")
+    parser.add_argument("--json", help="Also write the results to this file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
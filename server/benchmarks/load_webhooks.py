@@ -0,0 +1,364 @@
+"""
+benchmarks/load_webhooks.py
+
+Load generator for the webhook and auth endpoints of one API process.
+
+Drives the FastAPI app in-process (httpx ASGITransport, i.e. one uvicorn worker) against
+the local Postgres from DATABASE_URL, with Google and Strava replaced by the fakes from
+tests/fakes (optionally slowed down or failing, see bench_sync.FaultInjectingTransport).
+
+- webhooks: replays a Strava event mix across many athletes (creates, bursts of updates
+  for the same activity, deletes) against POST /strava/webhook/, with the given number of
+  in-process sync workers draining the queue. Reports the accept rate and latency of the
+  endpoint, then how long the workers took to drain the jobs it queued.
+- auth: dashboard polling of /auth/validate, /users/me and /strava/status.
+
+Each --workers x --concurrency combination is a fresh run with its own athletes, which
+are deleted afterwards. Requests are sent closed-loop: `concurrency` clients each send
+their next request as soon as the previous one answers.
+
+Run from server/ with e.g.
+`python -m benchmarks.load_webhooks webhooks --events 2000 --workers 1,2,4 --concurrency 1,16,64`
+`python -m benchmarks.load_webhooks auth --requests 5000 --concurrency 1,16,64`
+"""
+from sqlalchemy import delete, func, select
+from datetime import datetime, timedelta, timezone
+from collections import Counter
+from pathlib import Path
+from database import AsyncSessionLocal, async_engine
+from models.user import User
+from models.google_user import GoogleUser
+from models.strava_user import StravaUser
+from models.sync_job import SyncJob
+from integrations import http_client
+from services.sync_worker import start_sync_workers, stop_sync_workers
+from benchmarks.bench_sync import FaultInjectingTransport, load_example_activity
+from tests.fakes.google_calendar import FakeGoogleCalendar
+from tests.fakes.strava import FakeStrava
+import utils.jwt as jwt_utils
+import argparse
+import asyncio
+import httpx
+import json
+import logging
+import os
+import random
+import time
+import uuid
+
+ASPECT_TYPES = ("create", "update", "delete")
+
+
+def percentile(sorted_values: list[float], share: float) -> float | None:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(share * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """Parse "create=0.3,update=0.6,delete=0.1" into weights."""
+    mix = {}
+    for item in value.split(","):
+        aspect_type, _, weight = item.partition("=")
+        if aspect_type not in ASPECT_TYPES:
+            raise argparse.ArgumentTypeError(f"Unknown aspect_type {aspect_type!r}")
+        mix[aspect_type] = float(weight)
+    return mix
+
+
+class LoadRun:
+    """One run: fakes, seeded athletes and the requests to send."""
+    def __init__(self, args):
+        self.args = args
+        self.run_id = uuid.uuid4().hex[:8]
+        self.random = random.Random(args.seed)
+        self.google = FakeGoogleCalendar()
+        self.strava = FakeStrava()
+        self.strava.rate_limit = self.strava.read_rate_limit = (10 ** 9, 10 ** 9)
+        self.google_transport = FaultInjectingTransport(
+            self.google.handle, args.google_latency, args.google_error_rate, seed=args.seed
+        )
+        self.strava_transport = FaultInjectingTransport(
+            self.strava.handle, args.strava_latency, args.strava_error_rate, seed=args.seed
+        )
+        self.template = load_example_activity()
+        self.user_ids: list = []
+        self.athlete_ids: list[str] = []
+        self.tokens: list[str] = []
+        self.next_activity_id = 1
+        self.next_start = datetime.now(timezone.utc) - timedelta(days=365)
+
+    async def seed(self, athletes: int):
+        """Create connected users (Google + Strava) that the fakes recognise."""
+        expiry = datetime.now(timezone.utc) + timedelta(days=1)
+        async with AsyncSessionLocal() as db:
+            for i in range(athletes):
+                athlete_id = f"load-{self.run_id}-{i}"
+                user = User(
+                    name=f"Load {i}",
+                    calendar_id=self.google.add_calendar(),
+                    google_data=GoogleUser(
+                        email=f"{athlete_id}@example.com", sub=athlete_id, access_token="google-token",
+                        refresh_token="refresh", access_token_expiry=expiry
+                    ),
+                    strava_data=StravaUser(
+                        athlete_id=athlete_id, athlete_name=f"Load {i}", access_token=f"strava-{athlete_id}",
+                        refresh_token="refresh", expires_at=expiry, last_synced_at=self.next_start
+                    ),
+                )
+                db.add(user)
+                self.strava.athletes[f"strava-{athlete_id}"] = athlete_id
+                self.athlete_ids.append(athlete_id)
+                await db.flush()
+                self.user_ids.append(user.id)
+                self.tokens.append(jwt_utils.create_access_token(user.id))
+            await db.commit()
+
+    async def cleanup(self):
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(SyncJob).where(SyncJob.athlete_id.in_(self.athlete_ids)))
+            await db.execute(delete(StravaUser).where(StravaUser.user_id.in_(self.user_ids)))
+            await db.execute(delete(GoogleUser).where(GoogleUser.user_id.in_(self.user_ids)))
+            # Ledger entries, tombstones and calendar sync state cascade with the user
+            await db.execute(delete(User).where(User.id.in_(self.user_ids)))
+            await db.commit()
+
+    def _new_activity(self, athlete_id: str) -> dict:
+        activity = dict(self.template)
+        activity["id"] = self.next_activity_id
+        activity["athlete"] = {"id": athlete_id, "resource_state": 1}
+        activity["name"] = f"{self.template['name']} {self.next_activity_id}"
+        activity["start_date"] = self.next_start.strftime("%Y-%m-%dT%H:%M:%SZ")
+        self.next_activity_id += 1
+        self.next_start += timedelta(minutes=1)
+        self.strava.activities[activity["id"]] = activity
+        return activity
+
+    def webhook_events(self, count: int, mix: dict[str, float], burst: int) -> list[dict]:
+        """
+        Build a realistic event stream: creates add an activity to the fake Strava, updates come
+        in bursts for one activity (edits right after upload), deletes remove one.
+        """
+        owned: dict[str, list[int]] = {athlete_id: [] for athlete_id in self.athlete_ids}
+        events: list[dict] = []
+        event_time = int(time.time())
+        while len(events) < count:
+            athlete_id = self.random.choice(self.athlete_ids)
+            aspect_type = self.random.choices(list(mix), weights=list(mix.values()))[0]
+            if aspect_type != "create" and not owned[athlete_id]:
+                aspect_type = "create"
+
+            if aspect_type == "create":
+                activity_ids = [self._new_activity(athlete_id)["id"]]
+                owned[athlete_id].append(activity_ids[0])
+            elif aspect_type == "update":
+                activity_id = self.random.choice(owned[athlete_id])
+                self.strava.activities[activity_id]["name"] += " (edited)"
+                activity_ids = [activity_id] * self.random.randint(1, burst)
+            else:
+                activity_id = owned[athlete_id].pop(self.random.randrange(len(owned[athlete_id])))
+                self.strava.activities.pop(activity_id, None)
+                activity_ids = [activity_id]
+
+            for activity_id in activity_ids:
+                event_time += 1
+                events.append({
+                    "object_type": "activity",
+                    "object_id": activity_id,
+                    "aspect_type": aspect_type,
+                    "owner_id": athlete_id,
+                    "event_time": event_time,
+                    "updates": {"title": "edited"} if aspect_type == "update" else {},
+                    "subscription_id": 1,
+                })
+        return events[:count]
+
+    def auth_requests(self, count: int, endpoints: list[str]) -> list[tuple[str, dict]]:
+        requests = []
+        for i in range(count):
+            token = self.tokens[i % len(self.tokens)]
+            endpoint = endpoints[i % len(endpoints)]
+            if endpoint == "me":
+                requests.append(("/users/me", {"headers": {"token": token}}))
+            elif endpoint == "validate":
+                requests.append(("/auth/validate", {"headers": {"Authorization": f"Bearer {token}"}}))
+            else:
+                requests.append(("/strava/status", {"headers": {"Authorization": f"Bearer {token}"}}))
+        return requests
+
+    async def job_counts(self) -> Counter:
+        async with AsyncSessionLocal() as db:
+            rows = await db.execute(
+                select(SyncJob.status, func.count())
+                .where(SyncJob.athlete_id.in_(self.athlete_ids))
+                .group_by(SyncJob.status)
+            )
+            return Counter(dict(rows.all()))
+
+
+async def send_closed_loop(client: httpx.AsyncClient, requests: list, concurrency: int, outcome=None) -> dict:
+    """
+    Send requests from `concurrency` clients, each waiting for its previous answer.
+
+    Args:
+        client (httpx.AsyncClient): Client bound to the app.
+        requests (list): (method, url, kwargs) to send, in order.
+        concurrency (int): Number of concurrent clients.
+        outcome (Callable | None): Maps a response to a label counted under "outcomes".
+
+    Returns:
+        dict: Throughput, latency percentiles (ms), error rate, status codes and outcomes.
+    """
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    outcomes: Counter = Counter()
+    pending = iter(requests)
+
+    async def client_loop():
+        for method, url, kwargs in pending:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                statuses[response.status_code] += 1
+                if outcome is not None:
+                    outcomes[outcome(response)] += 1
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if not (isinstance(status, int) and status < 400))
+    return {
+        "requests": len(requests),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(requests) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 0.5), 2) if latencies else None,
+        "p90_ms": round(percentile(latencies, 0.9), 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99), 2) if latencies else None,
+        "max_ms": round(latencies[-1], 2) if latencies else None,
+        "error_rate": round(errors / len(requests), 4) if requests else 0,
+        "statuses": {str(status): count for status, count in statuses.items()},
+        "outcomes": dict(outcomes),
+    }
+
+
+async def wait_for_drain(run: LoadRun, timeout: float) -> tuple[float | None, Counter]:
+    """Wait until none of the run's jobs are pending or running; returns (seconds waited, job counts)."""
+    started = time.perf_counter()
+    while True:
+        counts = await run.job_counts()
+        if not counts["pending"] and not counts["running"]:
+            return time.perf_counter() - started, counts
+        if time.perf_counter() - started > timeout:
+            return None, counts
+        await asyncio.sleep(0.1)
+
+
+async def run_level(app, args, workers: int, concurrency: int) -> dict:
+    run = LoadRun(args)
+    await http_client.start_clients({"google": run.google_transport, "strava": run.strava_transport})
+    athletes = args.athletes if args.target == "webhooks" else args.users
+    await run.seed(athletes)
+    result = {"target": args.target, "workers": workers, "concurrency": concurrency, "athletes": athletes}
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load") as client:
+            if args.target == "webhooks":
+                events = run.webhook_events(args.events, args.mix, args.burst)
+                requests = [("POST", "/strava/webhook/", {"json": event}) for event in events]
+                await start_sync_workers(workers)
+                started = time.perf_counter()
+                # "queued", "coalesced" into a pending job or "duplicate" (a Strava retry)
+                result.update(await send_closed_loop(
+                    client, requests, concurrency, lambda response: response.json().get("status", "error")
+                ))
+                drain, jobs = await wait_for_drain(run, args.drain_timeout) if workers else (None, await run.job_counts())
+                result["drain_s"] = round(time.perf_counter() - started, 3) if drain is not None else None
+                result["jobs"] = dict(jobs)
+                done = jobs["done"] + jobs["failed"] + jobs["superseded"]
+                result["jobs_per_s"] = round(done / result["drain_s"], 1) if result["drain_s"] else None
+                result["upstream_calls"] = dict(run.google.calls + run.strava.calls)
+            else:
+                requests = [("GET", url, kwargs) for url, kwargs in run.auth_requests(args.requests, args.endpoints)]
+                result.update(await send_closed_loop(client, requests, concurrency))
+    finally:
+        await stop_sync_workers()
+        await run.cleanup()
+        await http_client.close_clients()
+    return result
+
+
+def format_result(result: dict) -> str:
+    line = (
+        f"{result['target']:<8} workers={result['workers']:<2} conc={result['concurrency']:<4} "
+        f"{result['throughput_rps']:>8} req/s  p50 {result['p50_ms']}ms  p90 {result['p90_ms']}ms  "
+        f"p99 {result['p99_ms']}ms  max {result['max_ms']}ms  errors {result['error_rate']:.2%}"
+    )
+    if result["target"] == "webhooks":
+        drain = f"{result['drain_s']}s" if result["drain_s"] is not None else "timed out"
+        line += f"  {result['outcomes']}  drained in {drain} ({result['jobs_per_s']} jobs/s) jobs {result['jobs']}"
+    return line
+
+
+async def main(args):
+    # Imported here: main.py creates the tables on import
+    from main import app
+
+    # One INFO line per fake upstream request would drown the results
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    os.environ["WEBHOOK_DEBOUNCE_SECONDS"] = str(args.debounce)
+    if args.auth_cache_ttl is not None:
+        os.environ["AUTH_USER_CACHE_TTL_SECONDS"] = str(args.auth_cache_ttl)
+
+    results = []
+    for workers in (args.workers if args.target == "webhooks" else [0]):
+        for concurrency in args.concurrency:
+            result = await run_level(app, args, workers, concurrency)
+            print(format_result(result), flush=True)
+            results.append(result)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+        print(f"📝 Results written to {args.json}")
+    await async_engine.dispose()
+
+
+def int_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(",")]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Webhook and auth endpoint load generator")
+    parser.add_argument("target", choices=["webhooks", "auth"])
+    parser.add_argument("--concurrency", type=int_list, default=[1, 8, 32, 128],
+                        help="Comma-separated concurrent client counts (default: 1,8,32,128)")
+    parser.add_argument("--workers", type=int_list, default=[2],
+                        help="Comma-separated in-process sync worker counts, webhooks only (default: 2)")
+    parser.add_argument("--athletes", type=int, default=50, help="Athletes sending webhook events")
+    parser.add_argument("--events", type=int, default=1000, help="Webhook events per run")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("create=0.3,update=0.6,delete=0.1"),
+                        help="Aspect type weights (default: create=0.3,update=0.6,delete=0.1)")
+    parser.add_argument("--burst", type=int, default=5, help="Max update events in one burst for an activity")
+    parser.add_argument("--debounce", type=float, default=0,
+                        help="WEBHOOK_DEBOUNCE_SECONDS for the run (default 0 so jobs are due at once)")
+    parser.add_argument("--drain-timeout", type=float, default=300, help="Seconds to wait for the queue to drain")
+    parser.add_argument("--users", type=int, default=20, help="Users polling the auth endpoints")
+    parser.add_argument("--requests", type=int, default=2000, help="Auth requests per run")
+    parser.add_argument("--endpoints", type=lambda value: value.split(","), default=["validate", "me", "status"],
+                        help="Auth endpoints to cycle through: validate, me, status")
+    parser.add_argument("--auth-cache-ttl", type=float, help="AUTH_USER_CACHE_TTL_SECONDS (0 disables the user cache)")
+    parser.add_argument("--google-latency", type=float, default=0, help="Seconds added to every Google request")
+    parser.add_argument("--strava-latency", type=float, default=0, help="Seconds added to every Strava request")
+    parser.add_argument("--google-error-rate", type=float, default=0, help="Share of Google requests that fail")
+    parser.add_argument("--strava-error-rate", type=float, default=0, help="Share of Strava requests that fail")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,57 @@
+"""
+crud/calendar_sync_state.py - Pure data access: fetch, insert, update
+
+This contains pure database access functions only for
+the CalendarSyncState table (Google Calendar sync tokens).
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+from models.calendar_sync_state import CalendarSyncState
+from datetime import datetime, timezone
+from uuid import UUID
+
+async def get_calendar_sync_state(db: AsyncSession, user_id: UUID):
+    """
+    Fetch a user's calendar sync state.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user_id (UUID): The user's ID.
+
+    Returns:
+        CalendarSyncState | None: The stored state, or None before the first reconciliation.
+    """
+    return await db.get(CalendarSyncState, user_id)
+
+async def save_calendar_sync_state(
+    db: AsyncSession,
+    user_id: UUID,
+    calendar_id: str,
+    sync_token: str | None,
+    full_sync: bool
+):
+    """
+    Store the sync token reached by a reconciliation pass.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user_id (UUID): The user's ID.
+        calendar_id (str): The calendar the token belongs to.
+        sync_token (str | None): Google's nextSyncToken.
+        full_sync (bool): Whether the pass listed the whole calendar.
+
+    Returns:
+        None
+    """
+    now = datetime.now(timezone.utc)
+    values = {"calendar_id": calendar_id, "sync_token": sync_token, "last_reconciled_at": now}
+    if full_sync:
+        values["last_full_sync_at"] = now
+    statement = insert(CalendarSyncState).values(user_id=user_id, **values)
+    statement = statement.on_conflict_do_update(index_elements=["user_id"], set_=values)
+    try:
+        await db.execute(statement)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to save calendar sync state: {e}")
@@ -0,0 +1,141 @@
+"""
+crud/strava_activity_cache.py - Pure data access: fetch, insert, update
+
+This contains pure database access functions only for
+the StravaActivityCache table (raw Strava activity payloads).
+"""
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+from models.strava_activity_cache import StravaActivityCache
+from datetime import datetime, timezone
+from uuid import UUID
+
+async def get_cached_activities(db: AsyncSession, activity_ids: list[int]):
+    """
+    Fetch cached payloads for a set of Strava activities in one query.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        activity_ids (list[int]): Strava activity IDs to look up.
+
+    Returns:
+        dict[int, StravaActivityCache]: Cache rows keyed by Strava activity ID (missing IDs are absent).
+    """
+    if not activity_ids:
+        return {}
+    rows = await db.scalars(
+        select(StravaActivityCache).where(StravaActivityCache.strava_activity_id.in_(activity_ids))
+    )
+    return {row.strava_activity_id: row for row in rows}
+
+async def get_cached_activity_page(db: AsyncSession, user_id: UUID, after_id: int | None = None, limit: int = 200):
+    """
+    Fetch one page of a user's cached activities, in activity ID order.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user_id (UUID): The owning user's ID.
+        after_id (int | None): Last activity ID of the previous page (keyset pagination).
+        limit (int): Page size.
+
+    Returns:
+        list[dict]: The cached payloads.
+    """
+    statement = select(StravaActivityCache.payload).where(StravaActivityCache.user_id == user_id)
+    if after_id is not None:
+        statement = statement.where(StravaActivityCache.strava_activity_id > after_id)
+    payloads = await db.scalars(statement.order_by(StravaActivityCache.strava_activity_id).limit(limit))
+    return list(payloads)
+
+async def cache_activities(db: AsyncSession, user_id: UUID, activities: list[dict], etags: dict[int, str] | None = None):
+    """
+    Insert or merge raw activity payloads.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user_id (UUID): The owning user's ID.
+        activities (list[dict]): Activity JSON from Strava (summaries or detailed).
+        etags (dict[int, str] | None): ETag of detailed fetches keyed by Strava activity ID.
+
+    Returns:
+        None
+
+    Notes:
+        - New keys overwrite stored ones, keys missing from the new payload are kept, so
+          a summary refreshes a detailed payload without dropping its extra fields.
+        - A payload without an ETag keeps the stored one: it only changes when the detailed
+          resource is fetched again, and that fetch returns 200 anyway if the activity changed.
+    """
+    if not activities:
+        return
+    etags = etags or {}
+    now = datetime.now(timezone.utc)
+    statement = insert(StravaActivityCache).values([
+        {
+            "strava_activity_id": activity["id"],
+            "user_id": user_id,
+            "payload": activity,
+            "resource_state": activity.get("resource_state"),
+            "etag": etags.get(activity["id"]),
+            "fetched_at": now,
+        }
+        for activity in activities
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=[StravaActivityCache.strava_activity_id],
+        set_={
+            "user_id": statement.excluded.user_id,
+            "payload": StravaActivityCache.payload.op("||")(statement.excluded.payload),
+            "resource_state": func.greatest(StravaActivityCache.resource_state, statement.excluded.resource_state),
+            "etag": func.coalesce(statement.excluded.etag, StravaActivityCache.etag),
+            "fetched_at": statement.excluded.fetched_at,
+        }
+    )
+    try:
+        await db.execute(statement)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to cache Strava activities: {e}")
+
+async def mark_revalidated(db: AsyncSession, activity_id: int):
+    """
+    Record that Strava confirmed the cached payload is current (304 Not Modified).
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        activity_id (int): The Strava activity ID.
+
+    Returns:
+        None
+    """
+    try:
+        await db.execute(
+            update(StravaActivityCache)
+            .where(StravaActivityCache.strava_activity_id == activity_id)
+            .values(revalidated_at=datetime.now(timezone.utc)),
+            execution_options={"synchronize_session": False}
+        )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to mark cached activity as revalidated: {e}")
+
+async def delete_cached_activity(db: AsyncSession, activity_id: int):
+    """
+    Remove the cached payload of an activity deleted on Strava.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        activity_id (int): The Strava activity ID.
+
+    Returns:
+        None
+    """
+    try:
+        await db.execute(delete(StravaActivityCache).filter_by(strava_activity_id=activity_id))
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to delete cached activity: {e}")
@@ -0,0 +1,153 @@
+"""
+crud/strava_rate_limit.py - Pure data access: fetch, insert, update
+
+This contains pure database access functions only for
+the StravaRateLimit table (Strava usage shared across workers).
+"""
+from sqlalchemy import case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+from models.strava_rate_limit import StravaRateLimit
+
+def _usage_in(column, window_column, window: int):
+    """Usage counted in the given window (0 once the stored window has rolled over)."""
+    return case((window_column == window, column), else_=0)
+
+async def ensure_rate_limit_buckets(db: AsyncSession, defaults: dict[str, tuple[int, int]]):
+    """
+    Create missing bucket rows with Strava's default limits.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        defaults (dict[str, tuple[int, int]]): (15-minute limit, daily limit) keyed by bucket.
+
+    Returns:
+        None
+    """
+    statement = insert(StravaRateLimit).values([
+        {"bucket": bucket, "short_limit": short_limit, "daily_limit": daily_limit}
+        for bucket, (short_limit, daily_limit) in defaults.items()
+    ]).on_conflict_do_nothing(index_elements=["bucket"])
+    try:
+        await db.execute(statement)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to create Strava rate limit buckets: {e}")
+
+async def reserve_rate_limit(
+    db: AsyncSession,
+    buckets: list[str],
+    short_window: int,
+    daily_window: int,
+    max_fraction: float
+) -> bool:
+    """
+    Atomically count one call against every given bucket if all of them have room.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        buckets (list[str]): Buckets the call counts against (e.g. ["overall", "read"]).
+        short_window (int): Start of the current 15-minute window (UNIX seconds).
+        daily_window (int): Start of the current UTC day (UNIX seconds).
+        max_fraction (float): Fraction of each limit that may be used before calls must wait.
+
+    Returns:
+        bool: True if the call was counted, False if a bucket is at its threshold (nothing is counted).
+
+    Notes:
+        - Each UPDATE checks and increments in one statement, so concurrent
+          workers can never both take the last slot.
+    """
+    try:
+        for bucket in buckets:
+            short_usage = _usage_in(StravaRateLimit.short_usage, StravaRateLimit.short_window, short_window)
+            daily_usage = _usage_in(StravaRateLimit.daily_usage, StravaRateLimit.daily_window, daily_window)
+            result = await db.execute(
+                update(StravaRateLimit)
+                .where(
+                    StravaRateLimit.bucket == bucket,
+                    short_usage < StravaRateLimit.short_limit * max_fraction,
+                    daily_usage < StravaRateLimit.daily_limit * max_fraction,
+                )
+                .values(
+                    short_usage=short_usage + 1,
+                    short_window=short_window,
+                    daily_usage=daily_usage + 1,
+                    daily_window=daily_window,
+                )
+            )
+            if result.rowcount == 0:
+                await db.rollback()
+                return False
+        await db.commit()
+        return True
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to reserve Strava rate limit: {e}")
+
+async def record_rate_limit_usage(
+    db: AsyncSession,
+    bucket: str,
+    limits: tuple[int, int],
+    usage: tuple[int, int],
+    short_window: int,
+    daily_window: int
+):
+    """
+    Store the limits and usage Strava reported in its response headers.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        bucket (str): The bucket the headers describe ("overall" or "read").
+        limits (tuple[int, int]): (15-minute limit, daily limit).
+        usage (tuple[int, int]): (15-minute usage, daily usage).
+        short_window (int): Start of the current 15-minute window (UNIX seconds).
+        daily_window (int): Start of the current UTC day (UNIX seconds).
+
+    Returns:
+        None
+
+    Notes:
+        - Strava's counters are authoritative (they include calls from every process),
+          so they replace the locally counted usage once the window rolled over.
+        - Within a window the larger usage is kept: responses finish out of order, and an
+          older response must not lower the usage a newer one already reported.
+    """
+    values = {
+        "short_limit": limits[0],
+        "daily_limit": limits[1],
+        "short_usage": usage[0],
+        "daily_usage": usage[1],
+        "short_window": short_window,
+        "daily_window": daily_window,
+    }
+    statement = insert(StravaRateLimit).values(bucket=bucket, **values)
+    statement = statement.on_conflict_do_update(index_elements=["bucket"], set_={
+        **values,
+        "short_usage": func.greatest(
+            _usage_in(StravaRateLimit.short_usage, StravaRateLimit.short_window, short_window), statement.excluded.short_usage
+        ),
+        "daily_usage": func.greatest(
+            _usage_in(StravaRateLimit.daily_usage, StravaRateLimit.daily_window, daily_window), statement.excluded.daily_usage
+        ),
+    })
+    try:
+        await db.execute(statement)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to record Strava rate limit usage: {e}")
+
+async def get_rate_limits(db: AsyncSession):
+    """
+    Fetch the stored rate limit state of every bucket.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+
+    Returns:
+        dict[str, StravaRateLimit]: Rows keyed by bucket.
+    """
+    rows = await db.scalars(select(StravaRateLimit))
+    return {row.bucket: row for row in rows}
@@ -0,0 +1,277 @@
+"""
+crud/sync_job.py - Pure data access: fetch, insert, update
+
+This contains pure database access functions only for
+the SyncJob table (durable queue of Strava webhook events).
+"""
+from sqlalchemy import and_, exists, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.postgresql import insert
+from models.sync_job import SyncJob
+from datetime import datetime, timedelta, timezone
+
+def sync_event_key(payload: dict) -> str:
+    """Identify a webhook event by aspect_type and Strava's event_time (Strava retries reuse both)."""
+    return f"{payload['aspect_type']}:{payload.get('event_time')}"
+
+async def enqueue_sync_job(db: AsyncSession, payload: dict, run_after: datetime | None = None):
+    """
+    Store a Strava webhook event as a pending sync job.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        payload (dict): The raw webhook payload (owner_id, object_id, aspect_type, event_time, ...).
+        run_after (datetime | None): Earliest time a worker may run the job (defaults to now).
+
+    Returns:
+        SyncJob | None: The stored job, or None if the activity already has a pending job.
+    """
+    statement = (
+        insert(SyncJob)
+        .values(
+            athlete_id=str(payload["owner_id"]),
+            activity_id=int(payload["object_id"]),
+            aspect_type=payload["aspect_type"],
+            event_time=payload.get("event_time"),
+            payload=payload,
+            events=[sync_event_key(payload)],
+            status="pending",
+            attempts=0,
+            run_after=run_after or datetime.now(timezone.utc),
+        )
+        .on_conflict_do_nothing(
+            index_elements=["athlete_id", "activity_id"], index_where=text("status = 'pending'")
+        )
+        .returning(SyncJob.id)
+    )
+    try:
+        job_id = (await db.execute(statement)).scalar_one_or_none()
+        await db.commit()
+        return await db.get(SyncJob, job_id) if job_id else None
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to enqueue sync job: {e}")
+
+async def get_pending_sync_job(db: AsyncSession, athlete_id: str, activity_id: int):
+    """
+    Fetch and lock the pending job for an activity, if there is one.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        athlete_id (str): The Strava athlete ID.
+        activity_id (int): The Strava activity ID.
+
+    Returns:
+        SyncJob | None: The pending job (row-locked until the next commit), or None.
+    """
+    return await db.scalar(
+        select(SyncJob)
+        .filter_by(athlete_id=athlete_id, activity_id=activity_id, status="pending")
+        .with_for_update()
+    )
+
+async def has_seen_sync_event(db: AsyncSession, athlete_id: str, activity_id: int, event_key: str) -> bool:
+    """
+    Check whether a webhook event was already queued (and possibly processed).
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        athlete_id (str): The Strava athlete ID.
+        activity_id (int): The Strava activity ID.
+        event_key (str): The event's sync_event_key.
+
+    Returns:
+        bool: True if any job for the activity already contains the event.
+    """
+    return await db.scalar(
+        select(exists().where(
+            SyncJob.athlete_id == athlete_id,
+            SyncJob.activity_id == activity_id,
+            SyncJob.events.contains([event_key]),
+        ))
+    )
+
+async def has_active_sync_job(db: AsyncSession, athlete_id: str) -> bool:
+    """
+    Check whether an athlete has a pending or running job.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        athlete_id (str): The Strava athlete ID.
+
+    Returns:
+        bool: True if a worker is about to run (or is running) a job for the athlete.
+    """
+    return await db.scalar(
+        select(exists().where(SyncJob.athlete_id == athlete_id, SyncJob.status.in_(["pending", "running"])))
+    )
+
+async def merge_sync_job(db: AsyncSession, job: SyncJob, aspect_type: str, payload: dict, run_after: datetime):
+    """
+    Fold a later webhook event into an existing pending job.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        job (SyncJob): The pending job (locked with get_pending_sync_job).
+        aspect_type (str): The combined action the job should now run.
+        payload (dict): The newer webhook payload.
+        run_after (datetime): The new debounce deadline.
+
+    Returns:
+        SyncJob: The updated job.
+    """
+    try:
+        job.aspect_type = aspect_type
+        job.payload = payload
+        job.event_time = max(job.event_time or 0, payload.get("event_time") or 0) or None
+        event_key = sync_event_key(payload)
+        if event_key not in job.events:
+            job.events = [*job.events, event_key]
+        job.run_after = run_after
+        await db.commit()
+        return job
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to merge sync job: {e}")
+
+async def claim_sync_job(db: AsyncSession):
+    """
+    Claim the oldest due pending job and mark it running.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+
+    Returns:
+        SyncJob | None: The claimed job, or None if nothing is due.
+
+    Notes:
+        - Uses FOR UPDATE SKIP LOCKED so concurrent workers never claim the same row.
+        - Skips athletes that already have a running job, so one athlete's
+          events are processed one at a time and in order.
+    """
+    now = datetime.now(timezone.utc)
+    running = aliased(SyncJob)
+    statement = (
+        select(SyncJob)
+        .where(
+            SyncJob.status == "pending",
+            SyncJob.run_after <= now,
+            ~exists().where(and_(running.athlete_id == SyncJob.athlete_id, running.status == "running")),
+        )
+        .order_by(SyncJob.run_after, SyncJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True, of=SyncJob)
+    )
+    try:
+        job = await db.scalar(statement)
+        if job is None:
+            # End the transaction without expiring objects the caller still holds
+            await db.commit()
+            return None
+        job.status = "running"
+        job.attempts += 1
+        job.locked_at = now
+        await db.commit()
+        await db.refresh(job)
+        return job
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to claim sync job: {e}")
+
+async def complete_sync_job(db: AsyncSession, job: SyncJob, result: str):
+    """
+    Mark a job as done.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        job (SyncJob): The job that finished.
+        result (str): Outcome of the run (e.g. "processed", "no_user").
+
+    Returns:
+        None
+    """
+    try:
+        job.status = "done"
+        job.result = result
+        job.last_error = None
+        job.locked_at = None
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to complete sync job: {e}")
+
+async def fail_sync_job(db: AsyncSession, job: SyncJob, error: str, retry_in: timedelta | None, superseded: bool = False):
+    """
+    Record a failed run and either schedule a retry or give up.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        job (SyncJob): The job that failed.
+        error (str): The error message to store.
+        retry_in (timedelta | None): Delay before the next attempt, or None to mark the job failed.
+        superseded (bool): A newer pending job for the same activity took over the work.
+
+    Returns:
+        None
+
+    Notes:
+        - If a webhook enqueued a new pending job for the activity after the caller checked,
+          the retry would break the one-pending-job-per-activity index; the job is marked
+          superseded instead, since the newer job already carries the latest action.
+    """
+    try:
+        job.last_error = error
+        job.locked_at = None
+        if superseded:
+            job.status = "superseded"
+        elif retry_in is None:
+            job.status = "failed"
+        else:
+            job.status = "pending"
+            job.run_after = datetime.now(timezone.utc) + retry_in
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if superseded or retry_in is None:
+            raise Exception(f"Failed to record sync job failure: {e}")
+        # Rolling back expires the job, reload it before marking it superseded
+        await db.refresh(job)
+        await fail_sync_job(db, job, error, retry_in, superseded=True)
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to record sync job failure: {e}")
+
+async def requeue_stale_jobs(db: AsyncSession, locked_before: datetime):
+    """
+    Put jobs left running by a crashed worker back in the queue.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        locked_before (datetime): Running jobs claimed before this time are considered abandoned.
+
+    Returns:
+        int: Number of jobs requeued.
+    """
+    pending = aliased(SyncJob)
+    has_pending = exists().where(and_(
+        pending.athlete_id == SyncJob.athlete_id,
+        pending.activity_id == SyncJob.activity_id,
+        pending.status == "pending",
+    ))
+    stale = update(SyncJob).where(SyncJob.status == "running", SyncJob.locked_at < locked_before)
+    try:
+        # A newer pending job for the same activity already carries the latest action
+        await db.execute(
+            stale.where(has_pending).values(status="superseded", locked_at=None),
+            execution_options={"synchronize_session": False}
+        )
+        result = await db.execute(
+            stale.values(status="pending", locked_at=None), execution_options={"synchronize_session": False}
+        )
+        await db.commit()
+        return result.rowcount
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to requeue stale sync jobs: {e}")
@@ -0,0 +1,266 @@
+"""
+crud/sync_ledger.py - Pure data access: fetch, insert, update
+
+This contains pure database access functions only for
+the SyncLedgerEntry table (Strava activity id -> Google Calendar event id)
+and the SyncTombstone table (Strava activities deleted on Strava).
+"""
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+from models.sync_ledger import SyncLedgerEntry
+from models.sync_tombstone import SyncTombstone
+from datetime import datetime, timezone
+from uuid import UUID
+
+async def get_ledger_entries(db: AsyncSession, user_id: UUID, activity_ids: list[int]):
+    """
+    Fetch ledger entries for a set of Strava activities in one query.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user_id (UUID): The owning user's ID.
+        activity_ids (list[int]): Strava activity IDs to look up.
+
+    Returns:
+        dict[int, SyncLedgerEntry]: Entries keyed by Strava activity ID (missing IDs are absent).
+    """
+    if not activity_ids:
+        return {}
+    entries = await db.scalars(
+        select(SyncLedgerEntry)
+        .where(SyncLedgerEntry.user_id == user_id, SyncLedgerEntry.strava_activity_id.in_(activity_ids))
+    )
+    return {entry.strava_activity_id: entry for entry in entries}
+
+async def record_ledger_entries(
+    db: AsyncSession,
+    user_id: UUID,
+    calendar_id: str,
+    event_ids: dict[int, str],
+    fingerprints: dict[int, tuple[str, dict[str, str]]] | None = None
+):
+    """
+    Insert or update ledger entries after events were created or updated.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user_id (UUID): The owning user's ID.
+        calendar_id (str): The Google Calendar ID the events live in.
+        event_ids (dict[int, str]): Google event IDs keyed by Strava activity ID.
+        fingerprints (dict[int, tuple[str, dict[str, str]]] | None): (content hash, field hashes)
+            of the written bodies keyed by Strava activity ID. Missing means unknown content.
+
+    Returns:
+        None
+    """
+    if not event_ids:
+        return
+    fingerprints = fingerprints or {}
+    now = datetime.now(timezone.utc)
+    statement = insert(SyncLedgerEntry).values([
+        {
+            "user_id": user_id,
+            "strava_activity_id": activity_id,
+            "google_event_id": event_id,
+            "calendar_id": calendar_id,
+            "last_written_at": now,
+            "content_hash": fingerprints.get(activity_id, (None, None))[0],
+            "field_hashes": fingerprints.get(activity_id, (None, None))[1],
+        }
+        for activity_id, event_id in event_ids.items()
+    ])
+    statement = statement.on_conflict_do_update(
+        constraint="uq_sync_ledger_user_activity",
+        set_={
+            "google_event_id": statement.excluded.google_event_id,
+            "calendar_id": statement.excluded.calendar_id,
+            "last_written_at": statement.excluded.last_written_at,
+            "content_hash": statement.excluded.content_hash,
+            "field_hashes": statement.excluded.field_hashes,
+            # The write replaced any manual edit
+            "remote_updated_at": None,
+        }
+    )
+    try:
+        await db.execute(statement)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to record sync ledger entries: {e}")
+
+async def delete_ledger_entry(db: AsyncSession, user_id: UUID, activity_id: int):
+    """
+    Remove the ledger entry for a Strava activity whose event was deleted.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user_id (UUID): The owning user's ID.
+        activity_id (int): The Strava activity ID.
+
+    Returns:
+        None
+    """
+    try:
+        await db.execute(delete(SyncLedgerEntry).filter_by(user_id=user_id, strava_activity_id=activity_id))
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to delete sync ledger entry: {e}")
+
+async def record_tombstone(db: AsyncSession, user_id: UUID, activity_id: int, event_id: str | None = None):
+    """
+    Mark a Strava activity as deleted so its event is never written again.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user_id (UUID): The owning user's ID.
+        activity_id (int): The deleted Strava activity ID.
+        event_id (str | None): The Google event being removed, if one was found.
+
+    Returns:
+        None
+
+    Notes:
+        - Idempotent: recording an existing tombstone only fills in a missing event ID.
+    """
+    statement = insert(SyncTombstone).values(user_id=user_id, strava_activity_id=activity_id, google_event_id=event_id)
+    statement = statement.on_conflict_do_update(
+        constraint="uq_sync_tombstones_user_activity",
+        set_={"google_event_id": func.coalesce(SyncTombstone.google_event_id, statement.excluded.google_event_id)}
+    )
+    try:
+        await db.execute(statement)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to record sync tombstone: {e}")
+
+async def get_tombstoned_activity_ids(db: AsyncSession, user_id: UUID, activity_ids: list[int]) -> set[int]:
+    """
+    Find which of the given Strava activities were deleted on Strava.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user_id (UUID): The owning user's ID.
+        activity_ids (list[int]): Strava activity IDs to check.
+
+    Returns:
+        set[int]: The tombstoned activity IDs.
+    """
+    if not activity_ids:
+        return set()
+    result = await db.scalars(
+        select(SyncTombstone.strava_activity_id)
+        .where(SyncTombstone.user_id == user_id, SyncTombstone.strava_activity_id.in_(activity_ids))
+    )
+    return set(result)
+
+async def get_ledger_entries_by_event_ids(db: AsyncSession, user_id: UUID, event_ids: list[str]):
+    """
+    Fetch ledger entries for a set of Google Calendar events in one query.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user_id (UUID): The owning user's ID.
+        event_ids (list[str]): Google event IDs to look up.
+
+    Returns:
+        dict[str, SyncLedgerEntry]: Entries keyed by Google event ID (unknown events are absent).
+    """
+    if not event_ids:
+        return {}
+    entries = await db.scalars(
+        select(SyncLedgerEntry)
+        .where(SyncLedgerEntry.user_id == user_id, SyncLedgerEntry.google_event_id.in_(event_ids))
+    )
+    return {entry.google_event_id: entry for entry in entries}
+
+async def delete_ledger_entries_by_event_ids(db: AsyncSession, user_id: UUID, event_ids: list[str]):
+    """
+    Remove the ledger entries of events that were deleted in Google Calendar.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user_id (UUID): The owning user's ID.
+        event_ids (list[str]): Google event IDs that no longer exist.
+
+    Returns:
+        list[int]: Strava activity IDs whose entries were removed.
+    """
+    if not event_ids:
+        return []
+    try:
+        result = await db.execute(
+            delete(SyncLedgerEntry)
+            .where(SyncLedgerEntry.user_id == user_id, SyncLedgerEntry.google_event_id.in_(event_ids))
+            .returning(SyncLedgerEntry.strava_activity_id)
+        )
+        removed = list(result.scalars())
+        await db.commit()
+        return removed
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to delete sync ledger entries: {e}")
+
+async def delete_ledger_entries_except(db: AsyncSession, user_id: UUID, calendar_id: str, event_ids: list[str]):
+    """
+    Remove every ledger entry of a user except those pointing at the given events of the given calendar.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user_id (UUID): The owning user's ID.
+        calendar_id (str): The user's current Strava calendar.
+        event_ids (list[str]): Google event IDs that still exist in that calendar.
+
+    Returns:
+        list[int]: Strava activity IDs whose entries were removed.
+
+    Notes:
+        - Used after a full listing of the calendar, when any entry not seen is stale.
+    """
+    try:
+        result = await db.execute(
+            delete(SyncLedgerEntry)
+            .where(
+                SyncLedgerEntry.user_id == user_id,
+                (SyncLedgerEntry.calendar_id != calendar_id) | SyncLedgerEntry.google_event_id.not_in(event_ids),
+            )
+            .returning(SyncLedgerEntry.strava_activity_id)
+        )
+        removed = list(result.scalars())
+        await db.commit()
+        return removed
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to delete stale sync ledger entries: {e}")
+
+async def record_remote_updates(db: AsyncSession, user_id: UUID, updated: dict[str, datetime]):
+    """
+    Store when events were last changed in Google Calendar outside of the sync.
+
+    The stored fingerprints no longer describe the events, so they are cleared:
+    the next write for the activity sends the whole body and restores the event.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        user_id (UUID): The owning user's ID.
+        updated (dict[str, datetime]): Google's "updated" time keyed by Google event ID.
+
+    Returns:
+        None
+    """
+    if not updated:
+        return
+    try:
+        for event_id, updated_at in updated.items():
+            await db.execute(
+                update(SyncLedgerEntry)
+                .where(SyncLedgerEntry.user_id == user_id, SyncLedgerEntry.google_event_id == event_id)
+                .values(remote_updated_at=updated_at, content_hash=None, field_hashes=None),
+                execution_options={"synchronize_session": False}
+            )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to record remote event updates: {e}")
@@ -4,21 +4,24 @@ crud/user.py - Pure data access: fetch, insert, update
 This contains pure database access functions only for 
 User-related tables (User, GoogleUser, StravaUser).
 """
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from schemas.user import UserCreate
 from schemas.strava_user import StravaUserCreate
 from models.user import User
 from models.google_user import GoogleUser
 from models.strava_user import StravaUser
 from sqlalchemy.exc import IntegrityError
+from datetime import datetime
 import os
 
-def create_or_get_user(db: Session, user: UserCreate):
+async def create_or_get_user(db: AsyncSession, user: UserCreate):
     """
     Create or update a User record along with its linked GoogleUser.
 
     Args:
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy async database session.
         user (UserCreate): Pydantic schema containing user and Google user data.
 
     Returns:
@@ -26,7 +29,7 @@ def create_or_get_user(db: Session, user: UserCreate):
     """
     try:
         # Use sub because there is no id when first creating an account
-        db_google_user = db.query(GoogleUser).filter_by(sub=user.google_data.sub).first()
+        db_google_user = await db.scalar(select(GoogleUser).filter_by(sub=user.google_data.sub))
 
         if db_google_user:
             db_google_user.access_token = user.google_data.access_token
@@ -35,7 +38,7 @@ def create_or_get_user(db: Session, user: UserCreate):
             db_google_user.refresh_token_expiry = user.google_data.refresh_token_expiry
 
             # Get user via foreign key
-            db_user = db.query(User).filter_by(id=db_google_user.user_id).first()
+            db_user = await db.scalar(select(User).filter_by(id=db_google_user.user_id))
         else:
             # Create new User and linked GoogleUser
             # Create SQLAlchemy models, not Pydantic schemas
@@ -49,22 +52,22 @@ def create_or_get_user(db: Session, user: UserCreate):
             )
             db.add(db_user)
 
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         return db_user
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise ValueError("Possibly invalid data")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise Exception(f"Unexpected error while creating user: {str(e)}")
 
-def create_or_get_strava_user(db: Session, strava_user: StravaUserCreate, token_data: dict):
+async def create_or_get_strava_user(db: AsyncSession, strava_user: StravaUserCreate, token_data: dict):
     """
     Create or update a StravaUser record.
 
     Args:
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy async database session.
         strava_user (StravaUserCreate): Pydantic schema containing Strava user data.
         token_data (dict): Raw token data returned by Strava's OAuth API.
 
@@ -73,7 +76,7 @@ def create_or_get_strava_user(db: Session, strava_user: StravaUserCreate, token_
     """
     try:
        # Create or update StravaUser row
-        db_strava_user = db.query(StravaUser).filter_by(user_id=strava_user.user_id).first()
+        db_strava_user = await db.scalar(select(StravaUser).filter_by(user_id=strava_user.user_id))
         if db_strava_user:
             # Update existing tokens
             db_strava_user.access_token = strava_user.access_token
@@ -85,30 +88,80 @@ def create_or_get_strava_user(db: Session, strava_user: StravaUserCreate, token_
             db_strava_user = StravaUser(**strava_user.model_dump())
             db.add(db_strava_user)
 
-        db.commit()
-        db.refresh(db_strava_user)
+        await db.commit()
+        await db.refresh(db_strava_user)
         return db_strava_user
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise ValueError("Possibly invalid data")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise Exception(f"Unexpected error while creating strava user: {str(e)}")
 
 
-def get_user_by_id(db: Session, user_id: str):
+async def save_google_tokens(db: AsyncSession, google_user_id, access_token: str, access_token_expiry: datetime):
+    """
+    Persist a refreshed Google access token. The single place refreshed Google tokens are written.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        google_user_id (UUID): The GoogleUser's ID.
+        access_token (str): The new Google access token.
+        access_token_expiry (datetime): When the new access token expires.
+
+    Returns:
+        None
+    """
+    try:
+        await db.execute(
+            update(GoogleUser)
+            .where(GoogleUser.id == google_user_id)
+            .values(access_token=access_token, access_token_expiry=access_token_expiry)
+        )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to save refreshed Google token: {e}")
+
+async def save_strava_tokens(db: AsyncSession, strava_user_id, access_token: str, refresh_token: str, expires_at: datetime):
+    """
+    Persist refreshed Strava tokens. The single place refreshed Strava tokens are written.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        strava_user_id (UUID): The StravaUser's ID.
+        access_token (str): The new Strava access token.
+        refresh_token (str): The (possibly rotated) Strava refresh token.
+        expires_at (datetime): When the new access token expires.
+
+    Returns:
+        None
+    """
+    try:
+        await db.execute(
+            update(StravaUser)
+            .where(StravaUser.id == strava_user_id)
+            .values(access_token=access_token, refresh_token=refresh_token, expires_at=expires_at)
+        )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise Exception(f"Failed to save refreshed Strava token: {e}")
+
+
+async def get_user_by_id(db: AsyncSession, user_id: str):
     """
     Fetch a User by their unique ID.
 
     Args:
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy async database session.
         user_id (str): The unique ID of the user.
 
     Returns:
         User: The matching User ORM object.
     """
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.scalar(select(User).filter(User.id == user_id))
         if user is None:
             raise ValueError("User not found")
         return user
@@ -116,12 +169,53 @@ def get_user_by_id(db: Session, user_id: str):
          raise Exception("Failed to fetch user by user_id")
 
 
-def get_all_users(db: Session):
+async def get_strava_user_by_athlete_id(db: AsyncSession, athlete_id: str):
+    """
+    Fetch a StravaUser by Strava athlete ID, with its User and GoogleUser loaded.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+        athlete_id (str): The Strava athlete ID (webhook owner_id).
+
+    Returns:
+        StravaUser | None: The matching StravaUser, or None if no user has connected this athlete.
+
+    Notes:
+        - Eager-loads user.google_data and user.strava_data (and reloads objects already
+          in the session), because an async session cannot lazily load them later.
+    """
+    return await db.scalar(
+        select(StravaUser)
+        .where(StravaUser.athlete_id == athlete_id)
+        .options(
+            joinedload(StravaUser.user).joinedload(User.google_data),
+            joinedload(StravaUser.user).joinedload(User.strava_data),
+        )
+        .execution_options(populate_existing=True)
+    )
+
+
+async def get_connected_athlete_ids(db: AsyncSession) -> list[str]:
+    """
+    Fetch the Strava athlete IDs of every connected StravaUser.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async database session.
+
+    Returns:
+        list[str]: Athlete IDs of StravaUsers with is_connected set.
+    """
+    return list(await db.scalars(
+        select(StravaUser.athlete_id).where(StravaUser.is_connected.is_(True), StravaUser.athlete_id.is_not(None))
+    ))
+
+
+async def get_all_users(db: AsyncSession):
     """
     Fetch all users from the database (development mode only).
 
     Args:
-        db (Session): SQLAlchemy database session.
+        db (AsyncSession): SQLAlchemy async database session.
 
     Returns:
         list[User]: List of all User ORM objects.
@@ -130,6 +224,6 @@ def get_all_users(db: Session):
         raise PermissionError("Fetching all users is restricted to development mode")
     
     try:
-        return db.query(User).all()
+        return (await db.scalars(select(User))).unique().all()
     except Exception as e:
         raise Exception(f"Failed to fetch all users: {e}")
\ No newline at end of file
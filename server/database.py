@@ -1,8 +1,13 @@
 # database.py - Database connection setup and session management
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from utils.metrics import DB_POOL_CHECKOUT_SECONDS, DB_POOL_CHECKED_OUT
 from dotenv import load_dotenv
 import os
+import time
 
 load_dotenv()
 
@@ -22,6 +27,60 @@ SessionLocal = sessionmaker(
     autoflush=False,      # Don't automatically send uncommitted changes to the database before calling commit()
     bind=engine           # Bind the session to database engine
 )
+def async_database_url(url: str):
+    """Point DATABASE_URL at the asyncpg driver (asyncpg takes `ssl` instead of libpq's `sslmode`)."""
+    url = make_url(url).set(drivername="postgresql+asyncpg")
+    if "sslmode" in url.query:
+        url = url.update_query_dict({"ssl": url.query["sslmode"]}).difference_update_query(["sslmode"])
+    return url
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Async pool that records how long each checkout waits for a connection (db_pool_checkout_seconds)."""
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+# Async engine for the request path and sync workers, so waiting on Postgres
+# yields the event loop instead of stalling every other request in the worker.
+# The sync engine above is kept for create_all and scripts.
+async_engine = create_async_engine(
+    async_database_url(DATABASE_URL),
+    poolclass=InstrumentedAsyncPool,
+    pool_pre_ping=True,
+    pool_size=5,
+    max_overflow=5
+)
+DB_POOL_CHECKED_OUT.set_function(async_engine.pool.checkedout)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    # Objects stay readable after commit; an async session cannot lazily reload expired attributes
+    expire_on_commit=False
+)
+
 # Base class for all ORM models 
 # all tables should inherit from this to be registered with SQLAlchemy
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+
+def create_tables():
+    """Create missing tables for every registered model (run by migrate.py, or at boot outside STARTUP_MODE=fast)."""
+    import models  # registers every model with Base
+
+    Base.metadata.create_all(bind=engine)
+
+async def ping_database() -> float:
+    """
+    Run `SELECT 1` on the async pool, opening a connection if the pool has none yet.
+
+    Returns:
+        float: Round trip time in seconds.
+    """
+    started = time.perf_counter()
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+    return time.perf_counter() - started
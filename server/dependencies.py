@@ -1,8 +1,16 @@
-from database import SessionLocal
+from fastapi import Header, HTTPException
+from database import AsyncSessionLocal
+import secrets
+import os
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+def require_admin(x_admin_token: str | None = Header(default=None)):
+    """Allow only requests carrying ADMIN_TOKEN in X-Admin-Token (admin routes are off without it)."""
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
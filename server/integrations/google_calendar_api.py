@@ -7,9 +7,12 @@ Contains direct HTTP calls to an external service and no application business lo
 """
 from fastapi import HTTPException
 from schemas.calendar import CalendarEventCreate
+from integrations.google_calendar_retry import send_calendar_request
+from utils.metrics import observe_upstream
 from datetime import timezone
 import httpx
 
+@observe_upstream("google")
 async def get_or_create_strava_calendar(access_token: str):
     """"
     Return the calendar ID for a 'Strava' calendar. If it doesn't exist, create it.
@@ -21,48 +24,76 @@ async def get_or_create_strava_calendar(access_token: str):
         str: The ID of the "Strava" calendar.
     """
     try:
-        async with httpx.AsyncClient() as client:
-            # List all calendars
-            response = await client.get(
-                "https://www.googleapis.com/calendar/v3/users/me/calendarList",
-                headers={"Authorization": f"Bearer {access_token}"}
-            )
-            # Raises an exception if the HTTP response is not a 2xx status code
-            response.raise_for_status()
-            # Extracts the items list with empty list as default
-            calendars = response.json().get("items", [])
-
-            # Look for an existing calendar named strava
-            for calendar in calendars:
-                if calendar.get("summary", "").lower() == "strava":
-                    return calendar["id"]
+        # List all calendars
+        response = await send_calendar_request(
+            "GET",
+            "https://www.googleapis.com/calendar/v3/users/me/calendarList",
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
+        # Raises an exception if the HTTP response is not a 2xx status code
+        response.raise_for_status()
+        # Extracts the items list with empty list as default
+        calendars = response.json().get("items", [])
+
+        # Look for an existing calendar named strava
+        for calendar in calendars:
+            if calendar.get("summary", "").lower() == "strava":
+                return calendar["id"]
                 
-            # If not found, create Strava Calendar
-            create_response = await client.post(
-                "https://www.googleapis.com/calendar/v3/calendars",
-                headers={"Authorization": f"Bearer {access_token}"},
-                json={
-                    "summary": "Strava",
-                    "timeZone": "America/Chicago" # not sure how to give user control over this
-                }
-            )
-            create_response.raise_for_status()
-            calendar_id = create_response.json()["id"]
-
-            # Google does not allow setting the calendar color during creation.
-            # Using PATCH to partially update a resource (change calendar color)
-            # 4 is Tangerine (didn't see documentation so just did guess and check)
-            await client.patch(
-                f"https://www.googleapis.com/calendar/v3/users/me/calendarList/{calendar_id}",
-                headers={"Authorization": f"Bearer {access_token}"},
-                json={"colorId": "4"}
-            )
-
-            return calendar_id
+        # If not found, create Strava Calendar
+        create_response = await send_calendar_request(
+            "POST",
+            "https://www.googleapis.com/calendar/v3/calendars",
+            headers={"Authorization": f"Bearer {access_token}"},
+            json={
+                "summary": "Strava",
+                "timeZone": "America/Chicago" # not sure how to give user control over this
+            }
+        )
+        create_response.raise_for_status()
+        calendar_id = create_response.json()["id"]
+
+        # Google does not allow setting the calendar color during creation.
+        # Using PATCH to partially update a resource (change calendar color)
+        # 4 is Tangerine (didn't see documentation so just did guess and check)
+        await send_calendar_request(
+            "PATCH",
+            f"https://www.googleapis.com/calendar/v3/users/me/calendarList/{calendar_id}",
+            headers={"Authorization": f"Bearer {access_token}"},
+            json={"colorId": "4"}
+        )
+
+        return calendar_id
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error in get_or_create_strava_calendar: {str(e)}")
 
     
+@observe_upstream("google")
+async def get_calendar(access_token: str, calendar_id: str):
+    """
+    Return a single calendar's metadata, or None if it no longer exists.
+
+    Args:
+        access_token (str): The Google OAuth access token for the authenticated user.
+        calendar_id (str): The Google Calendar ID to check.
+
+    Returns:
+        dict | None: The calendar resource, or None on 404/410.
+
+    Notes:
+        - Much cheaper than listing the whole calendarList; used to confirm a stored calendar_id.
+    """
+    response = await send_calendar_request(
+        "GET",
+        f"https://www.googleapis.com/calendar/v3/calendars/{calendar_id}",
+        headers={"Authorization": f"Bearer {access_token}"}
+    )
+    if response.status_code in (404, 410):
+        return None
+    response.raise_for_status()
+    return response.json()
+
+
 def build_event_data( event_data: CalendarEventCreate ):
     """
     Convert raw input (CalendarEventCreate object) into Google Calendar event JSON format
@@ -89,6 +120,7 @@ def build_event_data( event_data: CalendarEventCreate ):
         }
     }
 
+@observe_upstream("google")
 async def event_exists(
     access_token: str,
     calendar_id: str,
@@ -106,34 +138,35 @@ async def event_exists(
         bool: True if an identical event exists, False otherwise.
     """
     try:
-        async with httpx.AsyncClient() as client:
-            params = {
-                # Use .astimezone(timezone.utc) to ensure datetimes are timezone-aware
-                # Needed because there is not calendar model that has timezone=true
-                # Filters events that start after or at this datetime.
-                "timeMin": event_data.start_time.astimezone(timezone.utc).isoformat(),
-                # Filters events that start before or at this datetime.
-                "timeMax": event_data.end_time.astimezone(timezone.utc).isoformat(),
-                # Expands recurring events into individual instances.
-                "singleEvents": True,
-                "orderBy": "startTime"
-            }
-            response = await client.get(
-                f"https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events",
-                headers={"Authorization": f"Bearer {access_token}"},
-                params=params
-            )
-            response.raise_for_status()
-            events = response.json().get("items", [])
-
-            for event in events:
-                if (event.get("summary") == event_data.summary and
-                    event.get("description") == event_data.description):
-                    return True
+        params = {
+            # Use .astimezone(timezone.utc) to ensure datetimes are timezone-aware
+            # Needed because there is not calendar model that has timezone=true
+            # Filters events that start after or at this datetime.
+            "timeMin": event_data.start_time.astimezone(timezone.utc).isoformat(),
+            # Filters events that start before or at this datetime.
+            "timeMax": event_data.end_time.astimezone(timezone.utc).isoformat(),
+            # Expands recurring events into individual instances.
+            "singleEvents": True,
+            "orderBy": "startTime"
+        }
+        response = await send_calendar_request(
+            "GET",
+            f"https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events",
+            headers={"Authorization": f"Bearer {access_token}"},
+            params=params
+        )
+        response.raise_for_status()
+        events = response.json().get("items", [])
+
+        for event in events:
+            if (event.get("summary") == event_data.summary and
+                event.get("description") == event_data.description):
+                return True
         return False
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error checking existing events: {str(e)}")
     
+@observe_upstream("google")
 async def create_google_calendar_event(access_token: str, calendar_id: str, event_data_json: dict):
     """
     Create an event on a given Google Calendar
@@ -147,21 +180,26 @@ async def create_google_calendar_event(access_token: str, calendar_id: str, even
         dict: The created event resource from Google Calendar.
     """
     try:
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events",
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Content-Type": "application/json"
-                },
-                json=event_data_json
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await send_calendar_request(
+            "POST",
+            f"https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events",
+            headers={
+                "Authorization": f"Bearer {access_token}",
+                "Content-Type": "application/json"
+            },
+            json=event_data_json
+        )
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        # The calendar itself no longer exists
+        if e.response.status_code in (404, 410):
+            raise HTTPException(status_code=404, detail=f"Calendar {calendar_id} not found")
+        raise HTTPException(status_code=500, detail=f"Unexpected error in create_google_calendar_event: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error in create_google_calendar_event: {str(e)}")
 
+@observe_upstream("google")
 async def update_google_calendar_event(
     access_token: str,
     calendar_id: str,
@@ -181,20 +219,26 @@ async def update_google_calendar_event(
         dict: The updated event resource from Google Calendar.
     """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.patch(
-                f"https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events/{event_id}",
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Content-Type": "application/json"
-                },
-                json=event_data_json
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await send_calendar_request(
+            "PATCH",
+            f"https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events/{event_id}",
+            headers={
+                "Authorization": f"Bearer {access_token}",
+                "Content-Type": "application/json"
+            },
+            json=event_data_json
+        )
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        # Keep "event is gone" distinguishable so callers can re-create it
+        if e.response.status_code in (404, 410):
+            raise HTTPException(status_code=404, detail=f"Event {event_id} not found in calendar {calendar_id}")
+        raise HTTPException(status_code=500, detail=f"Unexpected error in update_google_calendar_event: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error in update_google_calendar_event: {str(e)}")
 
+@observe_upstream("google")
 async def find_event_by_strava_id(access_token: str, calendar_id: str, activity_id: int):
     """
     Return the Google event id that has the given Strava activity_id in private extendedProperties.
@@ -217,12 +261,78 @@ async def find_event_by_strava_id(access_token: str, calendar_id: str, activity_
         "singleEvents": True,
         "privateExtendedProperty": f"strava_activity_id={activity_id}"
     }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
+    response = await send_calendar_request(
+        "GET",
+        f"https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events",
+        headers={"Authorization": f"Bearer {access_token}"},
+        params=params,
+    )
+    response.raise_for_status()
+    events = response.json().get("items", [])
+    return events[0]["id"] if events else None
+
+@observe_upstream("google")
+async def delete_google_calendar_event(access_token: str, calendar_id: str, event_id: str):
+    """
+    Delete an event from a given Google Calendar
+
+    Args:
+        access_token (str): The Google OAuth access token for the authenticated user.
+        calendar_id (str): The Google Calendar ID containing the event.
+        event_id (str): The ID of the event to delete.
+
+    Returns:
+        None
+    """
+    response = await send_calendar_request(
+        "DELETE",
+        f"https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events/{event_id}",
+        headers={"Authorization": f"Bearer {access_token}"}
+    )
+    response.raise_for_status()
+
+@observe_upstream("google")
+async def list_event_changes(access_token: str, calendar_id: str, sync_token: str | None = None):
+    """
+    List the events of a calendar, or only those changed since a previous listing.
+
+    Args:
+        access_token (str): The Google OAuth access token for the authenticated user.
+        calendar_id (str): The Google Calendar ID to list.
+        sync_token (str | None): nextSyncToken from a previous call. None lists every event (full sync).
+
+    Returns:
+        tuple[list[dict], str | None]: The events (id, status, updated, private extendedProperties;
+                                       deleted events have status "cancelled" when listing
+                                       incrementally) and the nextSyncToken for the next call.
+
+    Notes:
+        - Raises HTTPException(410) when Google expired the sync token; the caller must
+          drop its token and do a full sync.
+        - Google rejects filters (timeMin, privateExtendedProperty, ...) together with
+          sync tokens, so the full listing is unfiltered too.
+    """
+    params = {
+        "maxResults": 2500,
+        # Only what reconciliation needs, keeps pages small
+        "fields": "items(id,status,updated,extendedProperties/private),nextPageToken,nextSyncToken",
+    }
+    if sync_token:
+        params["syncToken"] = sync_token
+
+    events = []
+    while True:
+        response = await send_calendar_request(
+            "GET",
             f"https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events",
             headers={"Authorization": f"Bearer {access_token}"},
             params=params,
         )
+        if response.status_code == 410:
+            raise HTTPException(status_code=410, detail=f"Sync token for calendar {calendar_id} expired")
         response.raise_for_status()
-        events = response.json().get("items", [])
-        return events[0]["id"] if events else None
+        body = response.json()
+        events.extend(body.get("items", []))
+        if not body.get("nextPageToken"):
+            return events, body.get("nextSyncToken")
+        params["pageToken"] = body["nextPageToken"]
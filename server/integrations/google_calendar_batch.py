@@ -0,0 +1,230 @@
+"""
+integrations/google_calendar_batch.py
+
+Batched writes for the Google Calendar API.
+
+Groups insert, patch and delete operations into Google's multipart/mixed batch
+endpoint (up to 50 operations per HTTP request). Operations that fail inside a
+batch are retried one by one through the single-event functions, which back off
+on quota and transient errors (see google_calendar_retry.py).
+
+Contains direct HTTP calls to an external service and no application business logic.
+"""
+from schemas.calendar import CalendarBatchOperation, CalendarBatchResult
+from integrations.google_calendar_retry import send_calendar_request
+import integrations.google_calendar_api as calendar_api
+from utils.metrics import observe_upstream
+from urllib.parse import quote
+import json
+import uuid
+
+BATCH_URL = "https://www.googleapis.com/batch/calendar/v3"
+# Google rejects Calendar batches with more than 50 requests
+MAX_BATCH_SIZE = 50
+
+_METHODS = {"insert": "POST", "patch": "PATCH", "delete": "DELETE"}
+
+
+def build_batch_request(calendar_id: str, operations: list[CalendarBatchOperation], boundary: str) -> bytes:
+    """
+    Encode operations as a multipart/mixed batch request body.
+
+    Args:
+        calendar_id (str): The Google Calendar ID the operations apply to.
+        operations (list[CalendarBatchOperation]): The operations to encode (at most MAX_BATCH_SIZE).
+        boundary (str): The multipart boundary string.
+
+    Returns:
+        bytes: The encoded request body.
+
+    Notes:
+        - Each part gets Content-ID <item-N> where N is the operation's index,
+          Google answers with <response-item-N> so results can be matched back.
+    """
+    events_path = f"/calendar/v3/calendars/{quote(calendar_id, safe='')}/events"
+    parts = []
+    for index, operation in enumerate(operations):
+        path = events_path if operation.method == "insert" else f"{events_path}/{quote(operation.event_id, safe='')}"
+        part = (
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <item-{index}>\r\n\r\n"
+            f"{_METHODS[operation.method]} {path} HTTP/1.1\r\n"
+        )
+        if operation.body is not None:
+            part += f"Content-Type: application/json\r\n\r\n{json.dumps(operation.body)}\r\n"
+        else:
+            part += "\r\n"
+        parts.append(part)
+    parts.append(f"--{boundary}--\r\n")
+    return "".join(parts).encode("utf-8")
+
+
+def _split_head(text: str) -> tuple[str, str]:
+    """Split a MIME/HTTP message into (head, body) on the first blank line."""
+    head, _, body = text.partition("\n\n")
+    return head, body
+
+
+def parse_batch_response(content_type: str, content: bytes) -> dict[int, tuple[int, dict | None]]:
+    """
+    Decode a multipart/mixed batch response.
+
+    Args:
+        content_type (str): The Content-Type header of the batch response (carries the boundary).
+        content (bytes): The raw response body.
+
+    Returns:
+        dict[int, tuple[int, dict | None]]: Maps operation index to (status code, JSON body or None).
+    """
+    boundary = None
+    for param in content_type.split(";"):
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "boundary":
+            boundary = value.strip('"')
+    if not boundary:
+        raise ValueError("Batch response is missing a multipart boundary")
+
+    text = content.decode("utf-8").replace("\r\n", "\n")
+    results = {}
+    for part in text.split(f"--{boundary}"):
+        part = part.strip("\n")
+        if not part or part == "--":
+            continue
+
+        part_head, http_message = _split_head(part)
+        content_id = None
+        for header in part_head.split("\n"):
+            name, _, value = header.partition(":")
+            if name.strip().lower() == "content-id":
+                content_id = value.strip().strip("<>")
+        if content_id is None:
+            continue
+
+        http_head, body = _split_head(http_message)
+        # Status line looks like "HTTP/1.1 200 OK"
+        status_code = int(http_head.split("\n", 1)[0].split(" ")[1])
+        body = body.strip()
+        index = int(content_id.rsplit("-", 1)[1])
+        results[index] = (status_code, json.loads(body) if body else None)
+    return results
+
+
+@observe_upstream("google")
+async def _send_batch(access_token: str, calendar_id: str, operations: list[CalendarBatchOperation]):
+    """Send one batch request (at most MAX_BATCH_SIZE operations) and return the parsed parts."""
+    boundary = f"batch_{uuid.uuid4().hex}"
+    response = await send_calendar_request(
+        "POST",
+        BATCH_URL,
+        # Resending a batch after a 5xx could insert its events twice
+        idempotent=all(operation.method != "insert" for operation in operations),
+        headers={
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": f"multipart/mixed; boundary={boundary}"
+        },
+        content=build_batch_request(calendar_id, operations, boundary)
+    )
+    response.raise_for_status()
+    return parse_batch_response(response.headers.get("Content-Type", ""), response.content)
+
+
+async def _run_single(access_token: str, calendar_id: str, operation: CalendarBatchOperation) -> CalendarBatchResult:
+    """Run one operation through the single-event API (used to retry failed batch parts)."""
+    try:
+        if operation.method == "insert":
+            event = await calendar_api.create_google_calendar_event(access_token, calendar_id, operation.body)
+        elif operation.method == "patch":
+            event = await calendar_api.update_google_calendar_event(
+                access_token, calendar_id, operation.event_id, operation.body
+            )
+        else:
+            await calendar_api.delete_google_calendar_event(access_token, calendar_id, operation.event_id)
+            event = None
+        return CalendarBatchResult(
+            activity_id=operation.activity_id, method=operation.method, status_code=200, event=event
+        )
+    except Exception as e:
+        status_code = getattr(getattr(e, "response", None), "status_code", None) or getattr(e, "status_code", 500)
+        detail = getattr(e, "detail", None) or str(e)
+        return CalendarBatchResult(
+            activity_id=operation.activity_id, method=operation.method, status_code=status_code, error=detail
+        )
+
+
+async def _recover_insert(access_token: str, calendar_id: str, operation: CalendarBatchOperation) -> CalendarBatchResult:
+    """
+    Retry an insert whose whole batch failed without a per-operation answer.
+
+    Google may have applied the batch before the error (e.g. a read timeout), so the event
+    is looked up by its Strava activity id first and only inserted again when it is missing.
+    """
+    try:
+        event_id = await calendar_api.find_event_by_strava_id(access_token, calendar_id, operation.activity_id)
+    except Exception as e:
+        # Reported as failed: the sync cursor stays before it and the next sync tries again
+        status_code = getattr(getattr(e, "response", None), "status_code", None) or getattr(e, "status_code", 500)
+        return CalendarBatchResult(
+            activity_id=operation.activity_id, method=operation.method, status_code=status_code,
+            error=getattr(e, "detail", None) or str(e)
+        )
+    if event_id:
+        return CalendarBatchResult(
+            activity_id=operation.activity_id, method=operation.method, status_code=200, event={"id": event_id}
+        )
+    return await _run_single(access_token, calendar_id, operation)
+
+
+async def execute_calendar_batch(
+    access_token: str,
+    calendar_id: str,
+    operations: list[CalendarBatchOperation]
+) -> dict[int, CalendarBatchResult]:
+    """
+    Run insert/patch/delete operations through Google's batch endpoint.
+
+    Args:
+        access_token (str): The Google OAuth access token for the authenticated user.
+        calendar_id (str): The Google Calendar ID the operations apply to.
+        operations (list[CalendarBatchOperation]): Operations to run, split into chunks of MAX_BATCH_SIZE.
+
+    Returns:
+        dict[int, CalendarBatchResult]: Result of each operation keyed by Strava activity id.
+
+    Notes:
+        - Any operation that fails inside a batch (or whose whole batch fails)
+          is retried once on its own before being reported as failed.
+        - When the whole batch fails, Google may still have applied it. Its inserts are only
+          sent again if no event for their activity exists yet, so they are never duplicated.
+    """
+    results: dict[int, CalendarBatchResult] = {}
+    retry: list[CalendarBatchOperation] = []
+    # Inserts of batches that failed as a whole, possibly already applied
+    uncertain: list[CalendarBatchOperation] = []
+
+    for start in range(0, len(operations), MAX_BATCH_SIZE):
+        chunk = operations[start:start + MAX_BATCH_SIZE]
+        try:
+            parts = await _send_batch(access_token, calendar_id, chunk)
+        except Exception:
+            # The whole batch request failed, fall back to sending each operation on its own
+            # (patches and deletes can safely be applied twice, inserts cannot)
+            retry.extend(operation for operation in chunk if operation.method != "insert")
+            uncertain.extend(operation for operation in chunk if operation.method == "insert")
+            continue
+
+        for index, operation in enumerate(chunk):
+            status_code, body = parts.get(index, (500, None))
+            if 200 <= status_code < 300:
+                results[operation.activity_id] = CalendarBatchResult(
+                    activity_id=operation.activity_id, method=operation.method, status_code=status_code, event=body
+                )
+            else:
+                retry.append(operation)
+
+    for operation in retry:
+        results[operation.activity_id] = await _run_single(access_token, calendar_id, operation)
+    for operation in uncertain:
+        results[operation.activity_id] = await _recover_insert(access_token, calendar_id, operation)
+
+    return results
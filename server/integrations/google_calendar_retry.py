@@ -0,0 +1,135 @@
+"""
+integrations/google_calendar_retry.py
+
+Retry layer for Google Calendar API requests.
+
+Google asks clients to retry quota errors (429, 403 rateLimitExceeded/userRateLimitExceeded)
+and transient server errors (500, 502, 503, 504) with exponential backoff. Every Calendar
+request goes through send_calendar_request, which retries them with full jitter,
+honours Retry-After and gives up once GOOGLE_CALENDAR_RETRY_DEADLINE_SECONDS has passed.
+
+Contains direct HTTP calls to an external service and no application business logic.
+"""
+from integrations.http_client import get_client
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import asyncio
+import httpx
+import os
+import random
+import time
+
+# 403 reasons that mean "slow down", as opposed to a real permission error
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+TRANSIENT_STATUSES = {500, 502, 503, 504}
+
+
+def _float_setting(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def is_rate_limited(response: httpx.Response) -> bool:
+    """True for 429 and for 403 responses whose error reason is a rate limit."""
+    if response.status_code == 429:
+        return True
+    if response.status_code != 403:
+        return False
+    try:
+        errors = response.json().get("error", {}).get("errors", [])
+    except ValueError:
+        return False
+    return any(error.get("reason") in RATE_LIMIT_REASONS for error in errors)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """
+    Delay before the next attempt.
+
+    Args:
+        attempt (int): Number of attempts already made (1 after the first failure).
+        retry_after (float | None): Seconds the server asked us to wait, if any.
+
+    Returns:
+        float: A full-jitter delay, uniform(0, min(cap, base * 2^(attempt - 1))),
+               but never shorter than retry_after.
+    """
+    base = _float_setting("GOOGLE_CALENDAR_RETRY_BASE_SECONDS", 0.5)
+    cap = _float_setting("GOOGLE_CALENDAR_RETRY_MAX_BACKOFF_SECONDS", 16)
+    delay = random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+    return max(delay, retry_after or 0.0)
+
+
+async def send_calendar_request(
+    method: str,
+    url: str,
+    idempotent: bool | None = None,
+    **kwargs
+) -> httpx.Response:
+    """
+    Send a Google Calendar request, retrying throttled and transient failures.
+
+    Args:
+        method (str): HTTP method.
+        url (str): Request URL.
+        idempotent (bool | None): Whether repeating the request cannot duplicate its effect.
+                                  Defaults to True for everything except POST.
+        **kwargs: Passed to httpx.AsyncClient.request (headers, params, json, content, ...).
+
+    Returns:
+        httpx.Response: The last response (the caller still checks its status).
+
+    Notes:
+        - Throttled requests (429 / 403 rate limit) were rejected before being applied,
+          so they are retried even when not idempotent (e.g. event inserts).
+        - 5xx responses and dropped connections may have been applied,
+          so they are only retried for idempotent requests.
+        - Retries stop once the next wait would end after the deadline.
+    """
+    if idempotent is None:
+        idempotent = method.upper() != "POST"
+    deadline = time.monotonic() + _float_setting("GOOGLE_CALENDAR_RETRY_DEADLINE_SECONDS", 30)
+    max_attempts = int(_float_setting("GOOGLE_CALENDAR_RETRY_MAX_ATTEMPTS", 6))
+
+    attempt = 0
+    while True:
+        attempt += 1
+        response = None
+        try:
+            response = await get_client("google").request(method, url, **kwargs)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            # Never reached Google, safe to resend anything
+            error, retryable, retry_after = e, True, None
+        except httpx.TransportError as e:
+            if not idempotent:
+                raise
+            error, retryable, retry_after = e, True, None
+        else:
+            retryable = is_rate_limited(response) or (idempotent and response.status_code in TRANSIENT_STATUSES)
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+        if not retryable:
+            return response
+
+        delay = backoff_delay(attempt, retry_after)
+        if attempt >= max_attempts or time.monotonic() + delay > deadline:
+            if response is None:
+                raise error
+            return response
+        outcome = response.status_code if response is not None else type(error).__name__
+        print(f"🔁 Google Calendar {method} failed ({outcome}), retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
@@ -0,0 +1,151 @@
+"""
+integrations/http_client.py
+
+Shared, pooled httpx clients for upstream APIs (Google, Strava).
+
+Clients are created once per process from the FastAPI lifespan and reused by every
+integration call so that bursts of requests reuse warm keep-alive connections
+instead of paying a TCP + TLS handshake per call.
+"""
+import asyncio
+import httpx
+import os
+
+# Per-upstream pool and timeout settings. Each value can be tuned with an env var
+# prefixed by the upstream name, e.g. GOOGLE_HTTP_MAX_CONNECTIONS or STRAVA_HTTP_TIMEOUT.
+UPSTREAMS = {
+    "google": {
+        "max_connections": 20,
+        "max_keepalive_connections": 10,
+        "keepalive_expiry": 60.0,
+        "timeout": 15.0,
+        "connect_timeout": 5.0,
+    },
+    "strava": {
+        "max_connections": 10,
+        "max_keepalive_connections": 5,
+        "keepalive_expiry": 60.0,
+        "timeout": 15.0,
+        "connect_timeout": 5.0,
+    },
+}
+
+# Requested by warm_clients() only to leave an open connection in the pool; the response is ignored
+WARMUP_URLS = {
+    "google": "https://www.googleapis.com/",
+    "strava": "https://www.strava.com/api/v3/",
+}
+
+_clients: dict[str, httpx.AsyncClient] = {}
+# Upstreams whose current client already has a warm connection
+_warmed: set[str] = set()
+
+
+def _setting(upstream: str, key: str, default: float) -> float:
+    """Read a pool/timeout override from the environment, falling back to the default."""
+    value = os.getenv(f"{upstream.upper()}_HTTP_{key.upper()}")
+    return float(value) if value else default
+
+
+def _build_client(upstream: str, transport: httpx.AsyncBaseTransport | None = None) -> httpx.AsyncClient:
+    """
+    Create an AsyncClient configured for the given upstream.
+
+    Args:
+        upstream (str): Name of the upstream ("google" or "strava").
+        transport (httpx.AsyncBaseTransport | None): Optional transport override (used by tests and benchmarks).
+
+    Returns:
+        httpx.AsyncClient: A client with keep-alive pooling and timeouts applied.
+    """
+    config = UPSTREAMS[upstream]
+    limits = httpx.Limits(
+        max_connections=int(_setting(upstream, "max_connections", config["max_connections"])),
+        max_keepalive_connections=int(_setting(upstream, "max_keepalive_connections", config["max_keepalive_connections"])),
+        keepalive_expiry=_setting(upstream, "keepalive_expiry", config["keepalive_expiry"]),
+    )
+    timeout = httpx.Timeout(
+        _setting(upstream, "timeout", config["timeout"]),
+        connect=_setting(upstream, "connect_timeout", config["connect_timeout"]),
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout, transport=transport)
+
+
+async def start_clients(transports: dict[str, httpx.AsyncBaseTransport] | None = None):
+    """
+    Create the shared clients for every upstream. Called once from the FastAPI lifespan.
+
+    Args:
+        transports (dict | None): Optional mapping of upstream name to transport override.
+                                  An override replaces an already started client for that upstream.
+
+    Returns:
+        None
+    """
+    transports = transports or {}
+    for upstream in UPSTREAMS:
+        if upstream in _clients and upstream not in transports:
+            continue
+        previous = _clients.pop(upstream, None)
+        _warmed.discard(upstream)
+        if previous is not None:
+            await previous.aclose()
+        _clients[upstream] = _build_client(upstream, transports.get(upstream))
+
+
+async def close_clients():
+    """
+    Close every shared client and release pooled connections. Called on app shutdown.
+
+    Returns:
+        None
+    """
+    _warmed.clear()
+    while _clients:
+        _, client = _clients.popitem()
+        await client.aclose()
+
+
+async def warm_clients(timeout: float = 3.0):
+    """
+    Open a keep-alive connection to every upstream not warmed yet, so the first real call
+    after a cold start skips DNS, TCP and TLS setup. Called from the /ready endpoint.
+
+    Args:
+        timeout (float): Seconds to wait for each upstream.
+
+    Returns:
+        None
+
+    Notes:
+        - Failures are only logged (and retried on the next call): an unreachable
+          upstream should not keep the API from serving requests.
+    """
+    async def warm(upstream: str):
+        try:
+            await get_client(upstream).head(WARMUP_URLS[upstream], timeout=timeout)
+            _warmed.add(upstream)
+        except Exception as e:
+            print(f"⚠️ Could not warm {upstream} connection: {e!r}")
+
+    await asyncio.gather(*(warm(upstream) for upstream in UPSTREAMS if upstream not in _warmed))
+
+
+def get_client(upstream: str) -> httpx.AsyncClient:
+    """
+    Return the shared client for an upstream.
+
+    Args:
+        upstream (str): Name of the upstream ("google" or "strava").
+
+    Returns:
+        httpx.AsyncClient: The pooled client for the upstream.
+
+    Notes:
+        - Lazily creates the client if the lifespan has not run (e.g. scripts or tests),
+          so callers never need to manage client lifetimes themselves.
+    """
+    client = _clients.get(upstream)
+    if client is None or client.is_closed:
+        client = _clients[upstream] = _build_client(upstream)
+    return client
@@ -7,35 +7,119 @@ Contains direct HTTP calls to an external service and no application business lo
 """
 from fastapi import HTTPException
 from models.strava_user import StravaUser
-import httpx
+from integrations.http_client import get_client
+from integrations.strava_rate_limit import governor
+from utils.metrics import observe_upstream
+import asyncio
 
-async def get_strava_activities(access_token: str, after: int | None = None):
+# Strava caps /athlete/activities at 200 activities per page
+MAX_PER_PAGE = 200
+
+async def _strava_request(url: str, access_token: str, params: dict | None = None, headers: dict | None = None):
     """
-    Retrieve a list of recent Strava activities for the authenticated athlete.
-    
+    GET a Strava API resource within the shared rate-limit budget.
+
+    Waits for room in the budget before sending (see integrations/strava_rate_limit.py)
+    and stores the usage Strava reports in the response headers.
+
+    Returns:
+        httpx.Response: The 2xx or 304 Not Modified response (other statuses raise).
+    """
+    await governor.acquire(read=True)
+    client = get_client("strava")
+    response = await client.get(
+        url, headers={"Authorization": f"Bearer {access_token}", **(headers or {})}, params=params
+    )
+    await governor.record(response)
+    if response.status_code == 429:
+        raise HTTPException(status_code=429, detail="Strava rate limit exceeded")
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response
+
+async def _strava_get(url: str, access_token: str, params: dict | None = None):
+    """GET a Strava API resource within the shared rate-limit budget and return its JSON."""
+    response = await _strava_request(url, access_token, params)
+    return response.json()
+
+@observe_upstream("strava")
+async def _get_activities_page(access_token: str, params: dict):
+    """Fetch one page of /athlete/activities."""
+    try:
+        return await _strava_get("https://www.strava.com/api/v3/athlete/activities", access_token, params)
+    except HTTPException:
+        # Rate limiting keeps its 429 so callers can back off
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error in get_strava_activities: {str(e)}")
+
+async def iter_strava_activities(
+    access_token: str,
+    after: int | None = None,
+    before: int | None = None,
+    per_page: int = MAX_PER_PAGE
+):
+    """
+    Page through the authenticated athlete's activities, yielding each one as its page arrives.
+
     Args:
         access_token (str): The Strava OAuth access token for the athlete.
         after (int | None): Optional UNIX timestamp (in seconds) to only include activities after this time.
+        before (int | None): Optional UNIX timestamp (in seconds) to only include activities before this time.
+        per_page (int): Page size, clamped to 1..200.
 
-    Returns:
-        list: JSON response containing activity summaries.
-    """
-    params = {"per_page": 10} # Get the last 10 activities
+    Yields:
+        dict: Activity summaries, one page at a time.
 
+    Notes:
+        - The next page is requested while the caller processes the current one,
+          so at most two pages are held in memory regardless of history size.
+    """
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    params = {"per_page": per_page}
     if after:
         params["after"] = after
+    if before:
+        params["before"] = before
 
+    page = 1
+    next_page = asyncio.create_task(_get_activities_page(access_token, {**params, "page": page}))
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://www.strava.com/api/v3/athlete/activities",
-                headers={"Authorization": f"Bearer {access_token}"},
-                params=params
-            )
-            response.raise_for_status()
-            return response.json()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error in get_strava_activities: {str(e)}")
+        while next_page:
+            activities = await next_page
+            next_page = None
+            # A full page means there may be more, start fetching it before handing this one out
+            if len(activities) == per_page:
+                page += 1
+                next_page = asyncio.create_task(_get_activities_page(access_token, {**params, "page": page}))
+            for activity in activities:
+                yield activity
+    finally:
+        if next_page:
+            next_page.cancel()
+
+async def get_strava_activities(
+    access_token: str,
+    after: int | None = None,
+    before: int | None = None,
+    per_page: int = MAX_PER_PAGE
+):
+    """
+    Retrieve every Strava activity for the authenticated athlete in the given window.
+    
+    Args:
+        access_token (str): The Strava OAuth access token for the athlete.
+        after (int | None): Optional UNIX timestamp (in seconds) to only include activities after this time.
+        before (int | None): Optional UNIX timestamp (in seconds) to only include activities before this time.
+        per_page (int): Page size used while paging through the results (max 200).
+
+    Returns:
+        list: JSON response containing activity summaries.
+
+    Notes:
+        - Loads every page into memory, prefer iter_strava_activities for large windows.
+    """
+    return [activity async for activity in iter_strava_activities(access_token, after, before, per_page)]
 
 async def get_strava_activity(strava_user: StravaUser, activity_id: int):
     """
@@ -48,14 +132,38 @@ async def get_strava_activity(strava_user: StravaUser, activity_id: int):
     Returns:
         dict: JSON response containing detailed activity data.
     """
+    activity, _ = await fetch_strava_activity(strava_user.access_token, activity_id)
+    return activity
+
+@observe_upstream("strava")
+async def fetch_strava_activity(access_token: str, activity_id: int, etag: str | None = None):
+    """
+    Retrieve full details of a Strava activity, revalidating a cached copy when its ETag is given.
+
+    Args:
+        access_token (str): The Strava OAuth access token for the athlete.
+        activity_id (int): The ID of the activity to retrieve.
+        etag (str | None): ETag of the cached copy, sent as If-None-Match.
+
+    Returns:
+        tuple[dict | None, str | None]: The detailed activity (None when Strava answered
+                                        304 Not Modified) and the response's ETag, if any.
+
+    Notes:
+        - Without an ETag from Strava there is nothing to revalidate with, and every
+          call is a full fetch.
+    """
     try:
         # Fetch full activity details
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://www.strava.com/api/v3/activities/{activity_id}",
-                headers={"Authorization": f"Bearer {strava_user.access_token}"},
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await _strava_request(
+            f"https://www.strava.com/api/v3/activities/{activity_id}", access_token,
+            headers={"If-None-Match": etag} if etag else None
+        )
+        etag = response.headers.get("ETag") or etag
+        if response.status_code == 304:
+            return None, etag
+        return response.json(), etag
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error in get_strava_activity: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Unexpected error in get_strava_activity: {str(e)}")
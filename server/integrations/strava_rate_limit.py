@@ -0,0 +1,220 @@
+"""
+integrations/strava_rate_limit.py
+
+Governor for Strava's application-wide API rate limits.
+
+Strava allows a number of requests per 15-minute window (reset at :00, :15, :30, :45)
+and per UTC day, with a stricter "read" limit for GET requests. Every response reports
+the limits and current usage in X-RateLimit-* and X-ReadRateLimit-* headers.
+
+Usage is kept in Postgres so all gunicorn workers and sync processes share one budget.
+Before each call a slot is reserved atomically; once usage reaches
+STRAVA_RATE_LIMIT_MAX_FRACTION of a limit, calls wait for the next window instead
+of being sent and rejected with 429.
+"""
+from fastapi import HTTPException
+from database import AsyncSessionLocal
+from schemas.rate_limit import RateLimitWindow, StravaRateLimitBudget
+import crud.strava_rate_limit as rate_limit_crud
+from datetime import datetime, timezone
+import asyncio
+import httpx
+import os
+import random
+
+SHORT_WINDOW_SECONDS = 15 * 60
+DAY_SECONDS = 24 * 60 * 60
+
+# Strava's default application limits: (15-minute, daily)
+DEFAULT_LIMITS = {
+    "overall": (200, 2000),
+    "read": (100, 1000),
+}
+
+# Response headers for each bucket: (limit header, usage header)
+HEADERS = {
+    "overall": ("X-RateLimit-Limit", "X-RateLimit-Usage"),
+    "read": ("X-ReadRateLimit-Limit", "X-ReadRateLimit-Usage"),
+}
+
+
+def current_windows(now: float | None = None) -> tuple[int, int]:
+    """Start of the current 15-minute window and of the current UTC day, as UNIX seconds."""
+    now = int(now if now is not None else datetime.now(timezone.utc).timestamp())
+    return now - now % SHORT_WINDOW_SECONDS, now - now % DAY_SECONDS
+
+
+def parse_rate_limit_headers(headers: httpx.Headers) -> dict[str, tuple[tuple[int, int], tuple[int, int]]]:
+    """
+    Read Strava's rate-limit headers.
+
+    Args:
+        headers (httpx.Headers): Response headers from a Strava API call.
+
+    Returns:
+        dict: ((15-minute limit, daily limit), (15-minute usage, daily usage)) keyed by bucket,
+              only for buckets whose headers are present and well-formed.
+    """
+    parsed = {}
+    for bucket, (limit_header, usage_header) in HEADERS.items():
+        try:
+            short_limit, daily_limit = (int(value) for value in headers[limit_header].split(","))
+            short_usage, daily_usage = (int(value) for value in headers[usage_header].split(","))
+        except (KeyError, ValueError):
+            continue
+        parsed[bucket] = ((short_limit, daily_limit), (short_usage, daily_usage))
+    return parsed
+
+
+class StravaRateLimited(HTTPException):
+    """Raised when the budget will not free up within STRAVA_RATE_LIMIT_MAX_WAIT_SECONDS."""
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status_code=429,
+            detail=f"Strava rate limit reached, budget frees up in {int(retry_after)}s",
+            headers={"Retry-After": str(int(retry_after))}
+        )
+        self.retry_after = retry_after
+
+
+class StravaRateLimitGovernor:
+    """
+    Reserves Strava API calls against the shared budget and records Strava's reported usage.
+
+    Args:
+        session_factory: Creates the AsyncSession used for the shared store
+                         (each reservation uses its own short-lived session).
+    """
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self._buckets_ready = False
+
+    @staticmethod
+    def max_fraction() -> float:
+        return float(os.getenv("STRAVA_RATE_LIMIT_MAX_FRACTION", "0.9"))
+
+    async def _ensure_buckets(self, db):
+        if not self._buckets_ready:
+            await rate_limit_crud.ensure_rate_limit_buckets(db, DEFAULT_LIMITS)
+            self._buckets_ready = True
+
+    async def acquire(self, read: bool = True):
+        """
+        Wait until the call fits in the budget, then count it.
+
+        Args:
+            read (bool): Whether the call is a GET (also counts against the read limit).
+
+        Returns:
+            None
+
+        Notes:
+            - Raises StravaRateLimited (a 429 HTTPException) when the wait would exceed
+              STRAVA_RATE_LIMIT_MAX_WAIT_SECONDS (e.g. the daily limit is used up), so the
+              caller fails fast and its job is retried later.
+        """
+        buckets = ["overall", "read"] if read else ["overall"]
+        max_wait = float(os.getenv("STRAVA_RATE_LIMIT_MAX_WAIT_SECONDS", str(SHORT_WINDOW_SECONDS)))
+
+        while True:
+            short_window, daily_window = current_windows()
+            async with self.session_factory() as db:
+                await self._ensure_buckets(db)
+                if await rate_limit_crud.reserve_rate_limit(
+                    db, buckets, short_window, daily_window, self.max_fraction()
+                ):
+                    return
+                rows = await rate_limit_crud.get_rate_limits(db)
+
+            wait = self._seconds_until_room(rows, buckets, short_window, daily_window)
+            if wait > max_wait:
+                raise StravaRateLimited(wait)
+            print(f"⏳ Strava budget exhausted, waiting {int(wait)}s for the next window")
+            # Spread waiting workers out so they don't all retry at the window boundary at once
+            await asyncio.sleep(wait + random.uniform(0, 2))
+
+    def _seconds_until_room(self, rows, buckets: list[str], short_window: int, daily_window: int) -> float:
+        now = datetime.now(timezone.utc).timestamp()
+        wait = 0.0
+        for bucket in buckets:
+            row = rows.get(bucket)
+            if row is None:
+                continue
+            fraction = self.max_fraction()
+            daily_usage = row.daily_usage if row.daily_window == daily_window else 0
+            short_usage = row.short_usage if row.short_window == short_window else 0
+            if daily_usage >= row.daily_limit * fraction:
+                wait = max(wait, daily_window + DAY_SECONDS - now)
+            elif short_usage >= row.short_limit * fraction:
+                wait = max(wait, short_window + SHORT_WINDOW_SECONDS - now)
+        return max(wait, 0.0)
+
+    async def record(self, response: httpx.Response):
+        """
+        Store the usage Strava reported for a response (and mark the window spent on 429).
+
+        Args:
+            response (httpx.Response): The Strava API response.
+
+        Returns:
+            None
+        """
+        reported = parse_rate_limit_headers(response.headers)
+        if not reported:
+            return
+
+        short_window, daily_window = current_windows()
+        async with self.session_factory() as db:
+            for bucket, (limits, usage) in reported.items():
+                if response.status_code == 429:
+                    # Whatever the counters say, Strava is refusing calls for the rest of this window
+                    usage = (max(usage[0], limits[0]), usage[1])
+                await rate_limit_crud.record_rate_limit_usage(db, bucket, limits, usage, short_window, daily_window)
+
+    async def budget(self) -> list[StravaRateLimitBudget]:
+        """
+        Current budget of every bucket, for callers that want to pace themselves.
+
+        Returns:
+            list[StravaRateLimitBudget]: Limits, usage, calls left before throttling and reset times.
+        """
+        short_window, daily_window = current_windows()
+        async with self.session_factory() as db:
+            await self._ensure_buckets(db)
+            rows = await rate_limit_crud.get_rate_limits(db)
+
+        fraction = self.max_fraction()
+
+        def window(limit: int, usage: int, resets_at: int) -> RateLimitWindow:
+            return RateLimitWindow(
+                limit=limit,
+                usage=usage,
+                remaining=max(0, int(limit * fraction) - usage),
+                resets_at=datetime.fromtimestamp(resets_at, tz=timezone.utc),
+            )
+
+        return [
+            StravaRateLimitBudget(
+                bucket=bucket,
+                short=window(
+                    row.short_limit,
+                    row.short_usage if row.short_window == short_window else 0,
+                    short_window + SHORT_WINDOW_SECONDS,
+                ),
+                daily=window(
+                    row.daily_limit,
+                    row.daily_usage if row.daily_window == daily_window else 0,
+                    daily_window + DAY_SECONDS,
+                ),
+            )
+            for bucket, row in sorted(rows.items())
+        ]
+
+
+# Shared by every Strava call in this process
+governor = StravaRateLimitGovernor()
+
+
+async def get_strava_budget() -> list[StravaRateLimitBudget]:
+    """Current Strava API budget (shared across workers)."""
+    return await governor.budget()
@@ -1,17 +1,23 @@
 # main.py - Request handling: user interaction, errors
-from fastapi import FastAPI, HTTPException, Depends, Header
-from sqlalchemy.orm import Session
-from database import Base, engine
+from fastapi import FastAPI, HTTPException, Depends, Header, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import Base, engine, create_tables, ping_database
 from dependencies import get_db
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from routes.strava import router as strava_router
 from routes.strava_webhook import router as strava_webhook_router
-from routes.google import router as google_router
 from routes.auth import router as auth_router
+from routes.lazy import LazyRouter
+from integrations.http_client import start_clients, close_clients, warm_clients
+from services.sync_worker import start_sync_workers, stop_sync_workers
+from contextlib import asynccontextmanager
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from utils.metrics import record_boot_phase
 import services.user as user_service
 import crud.user as user_crud, schemas.user as user_schemas
 from dotenv import load_dotenv
+import asyncio
 import os
 import logging
 import models # triggers models/__init__.py to load all models
@@ -21,6 +27,9 @@ JWT_ALGORITHM = "HS256"
 
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "").split(",")
 ENV = os.getenv("NODE_ENV", "production").lower()
+# "fast" trims cold starts: no schema check at boot (run `python migrate.py` on deploy),
+# Google login and admin routes imported on first use, sync workers started in the background
+STARTUP_MODE = os.getenv("STARTUP_MODE", "full").lower()
 
 # Set up logging config based on environment
 if ENV == "development":
@@ -33,7 +42,31 @@ else:
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared, pooled HTTP clients for Google and Strava live for the whole app lifetime
+    await start_clients()
+    # Workers drain the webhook job queue in the background
+    workers_starting = None
+    if STARTUP_MODE == "fast":
+        # Starting them requeues stale jobs (a DB round trip); serve requests meanwhile
+        workers_starting = asyncio.create_task(start_sync_workers())
+    else:
+        await start_sync_workers()
+    elapsed = record_boot_phase("ready")
+    if elapsed is not None:
+        print(f"🚀 Ready {elapsed:.2f}s after process start ({STARTUP_MODE} startup)")
+    yield
+    if workers_starting is not None and not workers_starting.done():
+        workers_starting.cancel()
+        try:
+            await workers_starting
+        except asyncio.CancelledError:
+            pass
+    await stop_sync_workers()
+    await close_clients()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -45,23 +78,45 @@ app.add_middleware(
 # Needed for AuthLib
 app.add_middleware(SessionMiddleware, secret_key=os.getenv("SESSION_SECRET"))
 
-app.include_router(auth_router, prefix="/auth")
-app.include_router(google_router, prefix="/google")
-app.include_router(strava_router, prefix="/strava")
-app.include_router(strava_webhook_router, prefix="/strava/webhook")
+def include_routers(app: FastAPI, lazy: bool):
+    """
+    Register every router on the app.
+
+    Args:
+        app (FastAPI): The app.
+        lazy (bool): Mount the rarely used routers (Google login, admin) so their modules
+                     are imported on their first request instead of at boot.
+
+    Returns:
+        None
+    """
+    app.include_router(auth_router, prefix="/auth")
+    app.include_router(strava_router, prefix="/strava")
+    app.include_router(strava_webhook_router, prefix="/strava/webhook")
+    if lazy:
+        app.mount("/google", LazyRouter(app, "routes.google"))
+        app.mount("/admin", LazyRouter(app, "routes.admin"))
+    else:
+        from routes.google import router as google_router
+        from routes.admin import router as admin_router
+        app.include_router(google_router, prefix="/google")
+        app.include_router(admin_router, prefix="/admin", include_in_schema=False)
+
+include_routers(app, lazy=STARTUP_MODE == "fast")
 
 # Drop all tables (needed for development to reset database)
 # Base.metadata.drop_all(bind=engine)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Create tables (in fast startup mode `python migrate.py` does this at deploy time)
+if STARTUP_MODE != "fast":
+    create_tables()
 
 
 # Create a user
 @app.post("/users/", response_model=user_schemas.UserOut)
-def create_user(user: user_schemas.UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: user_schemas.UserCreate, db: AsyncSession = Depends(get_db)):
     try:
-        return user_crud.create_or_get_user(db, user)
+        return await user_crud.create_or_get_user(db, user)
     except ValueError as e:
         logger.warning(f"User creation failed: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -69,20 +124,40 @@ def create_user(user: user_schemas.UserCreate, db: Session = Depends(get_db)):
         logger.exception("Unexpected error during user creation")
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
-# Get current user
+# Get current user (read-only: stored tokens are returned as is, without refreshing)
 @app.get("/users/me", response_model=user_schemas.UserOut)
-def get_current_user(token: str = Header(...), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Header(...), db: AsyncSession = Depends(get_db)):
     try:
-        return user_service.get_current_user(db, token)
+        return await user_service.get_authenticated_user(db, token)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("Error fetching current user")
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
 # Get all users
 @app.get("/users/", response_model=list[user_schemas.UserOut])
-def get_all_users(db: Session = Depends(get_db)):
+async def get_all_users(db: AsyncSession = Depends(get_db)):
     try:
-        return user_crud.get_all_users(db)
+        return await user_crud.get_all_users(db)
     except Exception as e:
         logger.exception("Unexpected error while fetching all users")
-        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+
+# Readiness probe: cheap enough to poll while a cold instance wakes up. Opens a DB connection
+# and, on the first call in this process, keep-alive connections to Google and Strava
+@app.get("/ready", include_in_schema=False)
+async def ready():
+    try:
+        database_seconds, _ = await asyncio.gather(ping_database(), warm_clients())
+    except Exception as e:
+        logger.warning(f"Readiness check failed: {str(e)}")
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return {"status": "ready", "startup_mode": STARTUP_MODE, "database_ms": round(database_seconds * 1000, 1)}
+
+# Prometheus metrics (utils/metrics.py)
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+record_boot_phase("imported")
@@ -0,0 +1,19 @@
+"""
+migrate.py
+
+Create missing tables for every model, as a deploy step.
+
+With STARTUP_MODE=fast the API skips this check at boot, so run it whenever models
+change (render.yaml runs it in the build). Safe to run repeatedly: existing tables are left as is.
+
+Run from server/ with `python migrate.py`.
+"""
+from database import create_tables, engine
+import time
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    create_tables()
+    engine.dispose()
+    print(f"✅ Schema up to date ({time.perf_counter() - started:.2f}s)")
@@ -5,4 +5,10 @@ Makes it so that importing models automatically registers all models
 """
 from .user import User
 from .google_user import GoogleUser
-from .strava_user import StravaUser
\ No newline at end of file
+from .strava_user import StravaUser
+from .sync_ledger import SyncLedgerEntry
+from .sync_tombstone import SyncTombstone
+from .strava_activity_cache import StravaActivityCache
+from .sync_job import SyncJob
+from .strava_rate_limit import StravaRateLimit
+from .calendar_sync_state import CalendarSyncState
@@ -0,0 +1,26 @@
+"""
+models/calendar_sync_state.py
+
+SQLAlchemy ORM models: table structure and relationships
+"""
+from sqlalchemy import Column, String, ForeignKey, DateTime
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from database import Base
+import os
+
+# Google Calendar incremental sync position for a user's Strava calendar.
+# sync_token is the nextSyncToken from the last reconciliation pass; listing events
+# with it returns only events changed (or deleted) since that pass.
+class CalendarSyncState(Base):
+    __tablename__ = 'calendar_sync_states'
+
+    user_id = Column(PG_UUID(as_uuid=True), ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
+    # The token belongs to this calendar, a re-created Strava calendar needs a full pass
+    calendar_id = Column(String, nullable=False)
+    sync_token = Column(String)
+    last_full_sync_at = Column(DateTime(timezone=True))
+    last_reconciled_at = Column(DateTime(timezone=True))
+
+    if os.getenv("NODE_ENV") == "development":
+        def __repr__(self):
+            return f"<CalendarSyncState(user_id={self.user_id}, calendar_id={self.calendar_id})>"
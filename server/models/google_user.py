@@ -23,7 +23,7 @@ class GoogleUser(Base):
 
     # One-to-One relationship with User
     user_id = Column(PG_UUID(as_uuid=True), ForeignKey('users.id'), unique=True)
-    user = relationship("User", back_populates="google_data")
+    user = relationship("User", back_populates="google_data", lazy="joined")
 
     if os.getenv("NODE_ENV") == "development":
         def __repr__(self):
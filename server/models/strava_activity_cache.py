@@ -0,0 +1,39 @@
+"""
+models/strava_activity_cache.py
+
+SQLAlchemy ORM models: table structure and relationships
+"""
+from sqlalchemy import Column, String, ForeignKey, DateTime, BigInteger, Integer, Index, func
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB
+from database import Base
+import os
+
+# Raw Strava activity JSON as last seen, so events can be re-rendered without Strava API calls.
+# Summaries from the activity list are merged key by key into the stored payload, keeping the
+# fields only a detailed fetch returns. Postgres compresses large JSONB values (TOAST) itself.
+class StravaActivityCache(Base):
+    __tablename__ = 'strava_activity_cache'
+    __table_args__ = (
+        # Re-rendering walks a user's activities in id order
+        Index("ix_strava_activity_cache_user_activity", "user_id", "strava_activity_id"),
+    )
+
+    # Strava activity ids are globally unique
+    strava_activity_id = Column(BigInteger, primary_key=True)
+    user_id = Column(PG_UUID(as_uuid=True), ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    payload = Column(JSONB, nullable=False)
+    # Most detailed resource_state stored: 2 (summary, from the list) or 3 (detailed, from /activities/{id});
+    # the payload's own key is that of the last payload merged in
+    resource_state = Column(Integer)
+    # ETag of the last detailed fetch, sent back as If-None-Match to revalidate
+    etag = Column(String)
+    fetched_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Last time Strava answered 304 Not Modified for the stored payload
+    revalidated_at = Column(DateTime(timezone=True))
+
+    if os.getenv("NODE_ENV") == "development":
+        def __repr__(self):
+            return (
+                f"<StravaActivityCache(strava_activity_id={self.strava_activity_id}, "
+                f"user_id={self.user_id}, resource_state={self.resource_state})>"
+            )
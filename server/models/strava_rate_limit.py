@@ -0,0 +1,31 @@
+"""
+models/strava_rate_limit.py
+
+SQLAlchemy ORM models: table structure and relationships
+"""
+from sqlalchemy import Column, String, Integer, DateTime, func
+from database import Base
+import os
+
+# Strava's application-wide rate limits, shared by every gunicorn worker and sync process.
+# One row per bucket: "overall" (all requests) and "read" (GET requests).
+class StravaRateLimit(Base):
+    __tablename__ = 'strava_rate_limits'
+
+    bucket = Column(String, primary_key=True)
+    # 15-minute window: limit, calls used, and the window's start (UNIX seconds)
+    short_limit = Column(Integer, nullable=False)
+    short_usage = Column(Integer, nullable=False, default=0)
+    short_window = Column(Integer, nullable=False, default=0)
+    # Daily window (resets at midnight UTC)
+    daily_limit = Column(Integer, nullable=False)
+    daily_usage = Column(Integer, nullable=False, default=0)
+    daily_window = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    if os.getenv("NODE_ENV") == "development":
+        def __repr__(self):
+            return (
+                f"<StravaRateLimit(bucket={self.bucket}, short={self.short_usage}/{self.short_limit}, "
+                f"daily={self.daily_usage}/{self.daily_limit})>"
+            )
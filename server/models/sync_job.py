@@ -0,0 +1,54 @@
+"""
+models/sync_job.py
+
+SQLAlchemy ORM models: table structure and relationships
+"""
+from sqlalchemy import Column, String, DateTime, BigInteger, Integer, Text, Index, func, text
+import uuid
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB
+from database import Base
+import os
+
+# A Strava webhook event waiting to be (or already) processed by a sync worker.
+# The webhook route only inserts rows; workers claim them with FOR UPDATE SKIP LOCKED.
+# Bursts of events for the same activity are coalesced into one pending job.
+class SyncJob(Base):
+    __tablename__ = 'sync_jobs'
+    __table_args__ = (
+        # Workers poll for the oldest due pending job
+        Index("ix_sync_jobs_status_run_after", "status", "run_after"),
+        Index("ix_sync_jobs_athlete_activity", "athlete_id", "activity_id"),
+        # At most one pending job per activity, later events are merged into it
+        Index(
+            "uq_sync_jobs_pending_activity", "athlete_id", "activity_id",
+            unique=True, postgresql_where=text("status = 'pending'")
+        ),
+    )
+
+    id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    athlete_id = Column(String, nullable=False, index=True)
+    activity_id = Column(BigInteger, nullable=False)
+    aspect_type = Column(String, nullable=False)
+    # Strava's event_time (UNIX seconds) from the webhook payload
+    event_time = Column(BigInteger)
+    payload = Column(JSONB, nullable=False)
+    # "aspect_type:event_time" of every webhook event folded into this job, used to drop Strava retries
+    events = Column(JSONB, nullable=False, default=list)
+    # pending -> running -> done | failed (pending again while retries remain);
+    # superseded when a newer pending job for the same activity took over
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    run_after = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_at = Column(DateTime(timezone=True))
+    # Outcome of the last run ("processed", "no_user", ...) and the last error, if any
+    result = Column(String)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    if os.getenv("NODE_ENV") == "development":
+        def __repr__(self):
+            return (
+                f"<SyncJob(id={self.id}, athlete_id={self.athlete_id}, "
+                f"activity_id={self.activity_id}, aspect_type={self.aspect_type}, status={self.status})>"
+            )
@@ -0,0 +1,43 @@
+"""
+models/sync_ledger.py
+
+SQLAlchemy ORM models: table structure and relationships
+"""
+from sqlalchemy import Column, String, ForeignKey, DateTime, BigInteger, UniqueConstraint, Index
+import uuid
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, JSONB
+from database import Base
+import os
+
+# Maps a user's Strava activity to the Google Calendar event it was written to,
+# so lookups are a local indexed read instead of a Calendar API query
+class SyncLedgerEntry(Base):
+    __tablename__ = 'sync_ledger'
+    # The unique constraint also serves as the (user_id, strava_activity_id) lookup index
+    __table_args__ = (
+        UniqueConstraint("user_id", "strava_activity_id", name="uq_sync_ledger_user_activity"),
+        # Calendar reconciliation maps changed/cancelled events back to activities by event id
+        Index("ix_sync_ledger_user_event", "user_id", "google_event_id"),
+    )
+
+    id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(PG_UUID(as_uuid=True), ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    strava_activity_id = Column(BigInteger, nullable=False)
+    google_event_id = Column(String, nullable=False)
+    calendar_id = Column(String, nullable=False)
+    last_written_at = Column(DateTime(timezone=True))
+    # Fingerprint of the event body last written (whole body and per top-level field),
+    # so unchanged activities are not written again and changed ones only PATCH what differs
+    content_hash = Column(String)
+    field_hashes = Column(JSONB)
+    # Last manual edit of the event seen in Google Calendar (set by reconciliation, which also
+    # clears the hashes so the next write restores the event; cleared again by that write)
+    remote_updated_at = Column(DateTime(timezone=True))
+
+    if os.getenv("NODE_ENV") == "development":
+        def __repr__(self):
+            return (
+                f"<SyncLedgerEntry(user_id={self.user_id}, "
+                f"strava_activity_id={self.strava_activity_id}, "
+                f"google_event_id={self.google_event_id})>"
+            )
@@ -0,0 +1,35 @@
+"""
+models/sync_tombstone.py
+
+SQLAlchemy ORM models: table structure and relationships
+"""
+from sqlalchemy import Column, String, ForeignKey, DateTime, BigInteger, UniqueConstraint, func
+import uuid
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from database import Base
+import os
+
+# A Strava activity that was deleted on Strava. Its Calendar event is removed and must never
+# be written again, e.g. by a sync whose window still covers it or an out-of-order create event.
+# Strava never reuses activity ids, so tombstones are permanent.
+class SyncTombstone(Base):
+    __tablename__ = 'sync_tombstones'
+    # The unique constraint also serves as the (user_id, strava_activity_id) lookup index
+    __table_args__ = (
+        UniqueConstraint("user_id", "strava_activity_id", name="uq_sync_tombstones_user_activity"),
+    )
+
+    id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(PG_UUID(as_uuid=True), ForeignKey('users.id', ondelete="CASCADE"), nullable=False)
+    strava_activity_id = Column(BigInteger, nullable=False)
+    # The event that was removed, if one was found
+    google_event_id = Column(String)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    if os.getenv("NODE_ENV") == "development":
+        def __repr__(self):
+            return (
+                f"<SyncTombstone(user_id={self.user_id}, "
+                f"strava_activity_id={self.strava_activity_id}, "
+                f"google_event_id={self.google_event_id})>"
+            )
@@ -0,0 +1,43 @@
+"""
+routes/admin.py
+
+Admin-only API routes for operating the server (runtime profiling).
+
+Every route requires the X-Admin-Token header to match ADMIN_TOKEN;
+without ADMIN_TOKEN set the routes respond 404.
+"""
+from fastapi import APIRouter, Depends
+from dependencies import require_admin
+from schemas.profiling import ProfilingSettingsUpdate, ProfilingStatus
+from utils.profiling import profiler
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/profiling", response_model=ProfilingStatus)
+def get_profiling():
+    """
+    Current profiling settings of this process and its most recent profiles.
+
+    Returns:
+        ProfilingStatus: Settings plus profile file names, newest first.
+    """
+    return ProfilingStatus(**profiler.settings(), profiles=profiler.profiles())
+
+@router.put("/profiling", response_model=ProfilingStatus)
+def update_profiling(settings: ProfilingSettingsUpdate):
+    """
+    Change profiling settings at runtime, no redeploy needed.
+
+    Args:
+        settings (ProfilingSettingsUpdate): Fields to change; omitted fields are kept.
+
+    Returns:
+        ProfilingStatus: The settings now in effect.
+
+    Notes:
+        - Applies to the process that handles the request. With several API
+          workers, set PROFILE_SAMPLE_RATE instead or call each worker.
+    """
+    profiler.configure(**settings.model_dump(exclude_none=True))
+    return ProfilingStatus(**profiler.settings(), profiles=profiler.profiles())
@@ -8,30 +8,42 @@ delegates database and token logic to `crud/` and `utils/`.
 """
 from fastapi import APIRouter, Request, Depends, HTTPException
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from dependencies import get_db
-from authlib.integrations.starlette_client import OAuth
 from schemas.user import UserCreate
 from schemas.google_user import GoogleUserCreate
 from crud.user import create_or_get_user
+from services.user import invalidate_user_cache
 from utils.cookies import set_auth_cookies
 import utils.jwt as jwt_utils
 from datetime import datetime, timezone, timedelta
+import functools
 import os
 
 
 router = APIRouter()
 
 
-oauth = OAuth()
-oauth.register(
-    name='google',
-    client_id=os.getenv("GOOGLE_CLIENT_ID"),
-    client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
-    server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
-    # Scope is optional here, but sets default scope
-    client_kwargs={'scope': 'openid email profile https://www.googleapis.com/auth/calendar.events'}
-)
+@functools.cache
+def get_oauth():
+    """
+    Authlib OAuth registry with the Google client, created on the first login.
+
+    Authlib (and the crypto libraries it pulls in) is only imported here,
+    so booting the API does not pay for it.
+    """
+    from authlib.integrations.starlette_client import OAuth
+
+    oauth = OAuth()
+    oauth.register(
+        name='google',
+        client_id=os.getenv("GOOGLE_CLIENT_ID"),
+        client_secret=os.getenv("GOOGLE_CLIENT_SECRET"),
+        server_metadata_url='https://accounts.google.com/.well-known/openid-configuration',
+        # Scope is optional here, but sets default scope
+        client_kwargs={'scope': 'openid email profile https://www.googleapis.com/auth/calendar.events'}
+    )
+    return oauth
 
 @router.get("/login")
 async def login_google(request: Request):
@@ -45,7 +57,7 @@ async def login_google(request: Request):
         RedirectResponse: A redirect to Google's OAuth authorization page.
     """
     redirect_uri = f"{os.getenv('BACKEND_URL')}/google/callback"
-    return await oauth.google.authorize_redirect(
+    return await get_oauth().google.authorize_redirect(
         request,
         redirect_uri,
         prompt="consent",          # always show consent screen
@@ -60,13 +72,13 @@ async def login_google(request: Request):
     )
 
 @router.get("/callback")
-async def google_callback(request: Request, db: Session = Depends(get_db)):
+async def google_callback(request: Request, db: AsyncSession = Depends(get_db)):
     """
     Handle Google's OAuth callback after user login.
 
     Args:
         request (Request): The incoming request containing OAuth parameters.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         RedirectResponse: Redirects the user to the frontend after login.
@@ -78,7 +90,7 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
         issues JWT access/refresh tokens, and sets authentication cookies in the response.
     """
     try:
-        token = await oauth.google.authorize_access_token(request)
+        token = await get_oauth().google.authorize_access_token(request)
         if not token:
             raise HTTPException(status_code=400, detail="Failed to retrieve access token")
         
@@ -102,7 +114,9 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
             )
         )
         
-        user = create_or_get_user(db=db, user=user_data)
+        user = await create_or_get_user(db=db, user=user_data)
+        # Signing in again replaces the Google tokens
+        invalidate_user_cache(user.id)
 
         # Create access and refresh token
         access_token = jwt_utils.create_access_token(user.id)
@@ -0,0 +1,42 @@
+"""
+routes/lazy.py
+
+Mount a router whose module is only imported when its first request arrives.
+
+Used for rarely hit routers (Google login, admin) in STARTUP_MODE=fast, so a cold
+process can answer webhooks before importing them.
+"""
+from fastapi import APIRouter, FastAPI
+import importlib
+
+
+class LazyRouter:
+    """
+    ASGI app that imports `module`'s router on the first request and delegates to it.
+
+    Args:
+        app (FastAPI): The parent app; its dependency_overrides apply to the loaded routes.
+        module (str): Dotted path of the module defining the router (e.g. "routes.google").
+        attribute (str): Name of the APIRouter in that module.
+
+    Notes:
+        - Mount it with app.mount(prefix, LazyRouter(...)). Routes mounted this way are
+          missing from the OpenAPI schema.
+    """
+    def __init__(self, app: FastAPI, module: str, attribute: str = "router"):
+        self.app = app
+        self.module = module
+        self.attribute = attribute
+        self._router: APIRouter | None = None
+
+    def load(self) -> APIRouter:
+        if self._router is None:
+            router = getattr(importlib.import_module(self.module), self.attribute)
+            # Re-including the routes binds them to the parent app's dependency overrides
+            loaded = APIRouter(dependency_overrides_provider=self.app)
+            loaded.include_router(router)
+            self._router = loaded
+        return self._router
+
+    async def __call__(self, scope, receive, send):
+        await self.load()(scope, receive, send)
@@ -8,16 +8,19 @@ authentication, and delegates database and sync logic to `crud/` and `services/`
 """
 from fastapi import APIRouter, Request, Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import RedirectResponse, JSONResponse
 from dependencies import get_db
 from models.strava_user import StravaUser
 from crud.user import create_or_get_strava_user
-from services.user import get_current_user
+from services.user import get_current_user, get_authenticated_user, invalidate_user_cache
 from services.strava import sync_strava_data
 from schemas.strava_user import StravaUserCreate
+from schemas.rate_limit import StravaRateLimitBudget
+from integrations.strava_rate_limit import get_strava_budget
+from integrations.http_client import get_client
 from datetime import datetime
-import httpx
 import os
 
 
@@ -62,27 +65,27 @@ async def use_strava_code(code: str):
     Returns:
         dict: Token response data from Strava, including access and refresh tokens.
     """
-    async with httpx.AsyncClient() as client:
-        res = await client.post("https://www.strava.com/oauth/token", data={
-            "client_id": os.getenv("STRAVA_CLIENT_ID"),
-            "client_secret": os.getenv("STRAVA_CLIENT_SECRET"),
-            "code": code,
-            "grant_type": "authorization_code"
-        })
+    client = get_client("strava")
+    res = await client.post("https://www.strava.com/oauth/token", data={
+        "client_id": os.getenv("STRAVA_CLIENT_ID"),
+        "client_secret": os.getenv("STRAVA_CLIENT_SECRET"),
+        "code": code,
+        "grant_type": "authorization_code"
+    })
     
     return res.json()
 
 @router.get("/callback")
 async def strava_callback(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ): 
     """
     Handle Strava OAuth callback after user login.
 
     Args:
         request (Request): The incoming request containing OAuth parameters.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         RedirectResponse | JSONResponse: Redirects to the frontend or returns error JSON.
@@ -99,7 +102,7 @@ async def strava_callback(
         return JSONResponse(content={"error": "No code provided"}, status_code=400)
     
     try:
-        current_user = get_current_user(db, state_token)
+        current_user = await get_current_user(db, state_token)
         token_data = await use_strava_code(code)
         if not current_user:
             return JSONResponse(content={"error": "User not found"}, status_code=404)
@@ -113,7 +116,8 @@ async def strava_callback(
             expires_at=datetime.fromtimestamp(token_data["expires_at"])
         )
 
-        strava_user = create_or_get_strava_user(db, strava_user, token_data)
+        strava_user = await create_or_get_strava_user(db, strava_user, token_data)
+        invalidate_user_cache(current_user.id)
 
         await sync_strava_data(strava_user, db)
 
@@ -131,40 +135,63 @@ async def strava_callback(
         return RedirectResponse(url=os.getenv("FRONTEND_URL"))
     
 @router.get("/status")
-def strava_status(
+async def strava_status(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Checks if the user is connected to Strava.
 
     Args:
         token (str): The JWT access token for authentication (injected by `oauth2_scheme`).
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         dict: `{"connected": bool}` indicating Strava connection status.
+
+    Notes:
+        - Polled by the dashboard, so it only reads: no token refresh, no upstream calls.
     """
     try:
-        user = get_current_user(db, token)
-        strava_data = db.query(StravaUser).filter_by(user_id=user.id).first()
+        user = await get_authenticated_user(db, token)
+        strava_data = user.strava_data
 
         # Return True only if a Strava record exists AND the user is connected
         return {"connected": bool(strava_data and strava_data.is_connected)}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
+@router.get("/rate-limit", response_model=list[StravaRateLimitBudget])
+async def strava_rate_limit(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Reports the app's remaining Strava API budget (shared by every worker).
+
+    Args:
+        token (str): The JWT access token for authentication (injected by `oauth2_scheme`).
+        db (AsyncSession): The database session.
+
+    Returns:
+        list[StravaRateLimitBudget]: 15-minute and daily usage for the "overall" and "read" limits.
+    """
+    await get_current_user(db, token)
+    return await get_strava_budget()
+
 @router.post("/disconnect")
-def logout_strava(
+async def logout_strava(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Disconnects the user's Strava account by setting is_connected = False.
 
     Args:
         token (str): The JWT access token for authentication (injected by `oauth2_scheme`).
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         dict: A message indicating whether Strava was disconnected or not connected.
@@ -173,12 +200,12 @@ def logout_strava(
         - This also sends a POST request to Strava to revoke the user's access token
     """
 
-    user = get_current_user(db, token)
-    strava_data = db.query(StravaUser).filter_by(user_id=user.id).first()
+    user = await get_current_user(db, token)
+    strava_data = await db.scalar(select(StravaUser).filter_by(user_id=user.id))
     
     if strava_data:
         try:
-            res = httpx.post(
+            res = await get_client("strava").post(
                 "https://www.strava.com/oauth/deauthorize",
                 data={"access_token": strava_data.access_token},
                 headers={"Content-Type": "application/x-www-form-urlencoded"}
@@ -189,8 +216,9 @@ def logout_strava(
 
         strava_data.is_connected = False
 
-        db.commit()
-        db.refresh(strava_data)
+        await db.commit()
+        await db.refresh(strava_data)
+        invalidate_user_cache(user.id)
         return {"message": "Strava disconnected"}
 
     return {"message": "Strava not connected"}
\ No newline at end of file
@@ -4,14 +4,14 @@ routes/strava_webhook.py
 API routes for handling Strava webhook verification and activity events.
 
 Defines HTTP endpoints, parses incoming requests from Strava, 
-and delegates processing to service layers.
+and queues them for the sync workers (services/sync_worker.py).
 """
 from fastapi import APIRouter, Request, Depends, HTTPException
-from sqlalchemy.orm import Session
-from models.strava_user import StravaUser
+from sqlalchemy.ext.asyncio import AsyncSession
 from dependencies import get_db
-from services.user import refresh_strava_token, refresh_google_token
-from services.strava import sync_strava_data, update_strava_activity, delete_strava_activity
+from services.sync_worker import queue_webhook_event, notify_workers
+from utils.metrics import record_webhook_event, record_boot_phase
+from utils.profiling import profiler
 import os
 
 router = APIRouter()
@@ -44,10 +44,16 @@ async def verify_webhook(request: Request):
     # and might have to manually trigger another subscription request 
     return {}
 
-@router.post("/")
-async def recieve_strava_event(payload: dict, db: Session = Depends(get_db)):
+@router.post("/", status_code=202)
+@profiler.profiled("recieve_strava_event")
+async def recieve_strava_event(payload: dict, db: AsyncSession = Depends(get_db)):
+    """
+    Strava webhook event. Only stores the event as a SyncJob and returns 202 right away;
+    token refreshes, Strava fetches and Calendar writes happen in the sync workers.
+    """
     if payload.get("object_type") != "activity":
         # Perminent skip
+        record_webhook_event(payload.get("aspect_type"), "ignored")
         return {"status": "ignored"}
     
     # For development
@@ -59,30 +65,22 @@ async def recieve_strava_event(payload: dict, db: Session = Depends(get_db)):
 
     if not aspect_type or athlete_id is None or activity_id is None:
         # Allows fail and retry
+        record_webhook_event(aspect_type, "invalid")
         raise HTTPException(status_code=400, detail="Missing required Strava webhook fields")
 
-    strava_user = db.query(StravaUser).filter_by(athlete_id=str(athlete_id)).first()
-
-    if not strava_user:
-        return {"status": "no_user"}
-
-    try: 
-        user = strava_user.user
-        if not user or not user.google_data:
-            raise HTTPException(status_code=400, detail="User is not connected to Google Calendar")
-
-        refresh_strava_token(user, db)
-        refresh_google_token(user, db)
-
-        if aspect_type == "create":
-            await sync_strava_data(strava_user, db)
-        elif aspect_type == "update":
-            await update_strava_activity(strava_user, activity_id)
-        elif aspect_type == "delete":
-            await delete_strava_activity(strava_user, activity_id, db)
-        else:
-            return {"status": f"ignored - Unhandled aspect_type: {aspect_type}"}
-        
-        return {"status": "processed"}
+    try:
+        # Bursts for the same activity are merged into one pending job, Strava retries are dropped
+        job, status = await queue_webhook_event(db, payload)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"❌ Failed to process activity {activity_id}: {str(e)}")
\ No newline at end of file
+        # Strava retries events that are not acknowledged
+        record_webhook_event(aspect_type, "failed")
+        raise HTTPException(status_code=500, detail=f"❌ Failed to queue activity {activity_id}: {str(e)}")
+
+    record_webhook_event(aspect_type, status)
+    elapsed = record_boot_phase("first_webhook")
+    if elapsed is not None:
+        print(f"🚀 First webhook queued {elapsed:.2f}s after process start")
+    if job is None:
+        return {"status": status}
+    notify_workers()
+    return {"status": status, "job_id": str(job.id)}
@@ -7,10 +7,29 @@ Defines request/response models and contains no business logic or database code.
 """
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Literal
 
 class CalendarEventCreate(BaseModel):
     summary: str
     description: str
     start_time: datetime
     end_time: datetime
-    time_zone: str = "America/Chicago"
\ No newline at end of file
+    time_zone: str = "America/Chicago"
+
+class CalendarBatchOperation(BaseModel):
+    # "insert" creates an event, "patch" updates event_id, "delete" removes event_id
+    method: Literal["insert", "patch", "delete"]
+    activity_id: int
+    event_id: str | None = None
+    body: dict | None = None
+
+class CalendarBatchResult(BaseModel):
+    activity_id: int
+    method: str
+    status_code: int
+    event: dict | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 300
@@ -0,0 +1,24 @@
+"""
+schemas/profiling.py
+
+Pydantic schemas for the admin profiling settings.
+
+Defines request/response models and contains no business logic or database code.
+"""
+from pydantic import BaseModel, Field
+
+class ProfilingSettingsUpdate(BaseModel):
+    # Share of recieve_strava_event / sync_strava_data runs to profile (0 turns profiling off)
+    sample_rate: float | None = Field(default=None, ge=0, le=1)
+    # Milliseconds between CPU stack samples
+    interval_ms: float | None = Field(default=None, gt=0, le=1000)
+    # Also record tracemalloc allocation snapshots (slows allocations during profiled runs)
+    memory: bool | None = None
+
+class ProfilingStatus(BaseModel):
+    sample_rate: float
+    interval_ms: float
+    memory: bool
+    output_dir: str
+    # Most recent profile files, newest first
+    profiles: list[str]
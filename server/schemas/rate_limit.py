@@ -0,0 +1,22 @@
+"""
+schemas/rate_limit.py
+
+Pydantic schemas for the Strava API rate-limit budget.
+
+Defines request/response models and contains no business logic or database code.
+"""
+from pydantic import BaseModel
+from datetime import datetime
+
+class RateLimitWindow(BaseModel):
+    limit: int
+    usage: int
+    # Calls left before the governor starts holding requests back (below the hard limit)
+    remaining: int
+    resets_at: datetime
+
+class StravaRateLimitBudget(BaseModel):
+    # "overall" (every request) or "read" (GET requests)
+    bucket: str
+    short: RateLimitWindow
+    daily: RateLimitWindow
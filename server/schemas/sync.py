@@ -0,0 +1,33 @@
+"""
+schemas/sync.py
+
+Pydantic schemas for Strava -> Google Calendar sync results.
+
+Defines request/response models and contains no business logic or database code.
+"""
+from pydantic import BaseModel
+from datetime import datetime
+
+class SyncResult(BaseModel):
+    # New sync cursor: latest end time that is safe to resume from (never past a failed activity)
+    latest_end_utc: datetime | None = None
+    # Strava activity ids whose Google Calendar events are up to date (written or unchanged)
+    saved: list[int] = []
+    # Strava activity ids skipped because their rendered event did not change since the last write
+    unchanged: list[int] = []
+    # Strava activity ids skipped because they were deleted on Strava (tombstoned)
+    deleted: list[int] = []
+    # Error message keyed by Strava activity id for activities that could not be written
+    failed: dict[int, str] = {}
+
+class ReconcileResult(BaseModel):
+    # True when the whole calendar was listed (first pass, new calendar, or expired sync token)
+    full_sync: bool = False
+    # Number of changed events Google returned
+    changes: int = 0
+    # Strava activity ids whose events were deleted in Calendar (ledger entries dropped)
+    removed: list[int] = []
+    # Strava activity ids whose events were edited in Calendar after the last sync write
+    edited: list[int] = []
+    # Strava activity ids whose events were found in Calendar but missing from the ledger
+    adopted: list[int] = []
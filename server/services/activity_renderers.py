@@ -0,0 +1,232 @@
+"""
+services/activity_renderers.py
+
+Per-sport renderers that turn Strava activities into Google Calendar events.
+
+Each sport type maps to an ActivityRenderer holding a summary and a description
+template. Templates are parsed once when registered, so rendering an activity only
+computes the fields its templates use and fills them in; no per-activity branching.
+Adding a sport is one register_renderer call.
+"""
+from schemas.calendar import CalendarEventCreate
+import integrations.google_calendar_api as calendar_utils
+from datetime import datetime, timedelta
+from string import Formatter
+from typing import Callable
+import time
+
+METERS_PER_MILE = 1609.34
+FEET_PER_METER = 3.28084
+
+
+def format_activity_time(seconds: int) -> str:
+    """Format seconds as M:SS or H:MM:SS."""
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def format_pace(seconds: int, distance_miles: float) -> str:
+    """Format pace as min/mi, or blank when pace is not meaningful."""
+    if distance_miles <= 0:
+        return ""
+    return format_activity_time(round(seconds / distance_miles))
+
+
+def format_heart_rate(value) -> str:
+    if value is None:
+        return ""
+    return f"{float(value):.0f}"
+
+
+def distance_miles(activity: dict) -> float:
+    return round(activity.get("distance", 0) / METERS_PER_MILE, 2)
+
+
+def format_speed(activity: dict) -> str:
+    """Average moving speed in mph, or blank without moving time."""
+    moving_time = activity.get("moving_time") or 0
+    if moving_time <= 0:
+        return ""
+    return f"{distance_miles(activity) / (moving_time / 3600):.1f}"
+
+
+# Values a template can use, each computed from the raw Strava activity
+FIELDS: dict[str, Callable[[dict], object]] = {
+    "id": lambda activity: activity["id"],
+    "name": lambda activity: activity["name"],
+    "sport_type": lambda activity: activity.get("sport_type", ""),
+    "distance_mi": distance_miles,
+    "time": lambda activity: format_activity_time(activity["elapsed_time"]),
+    "moving_time": lambda activity: format_activity_time(activity.get("moving_time") or 0),
+    "pace": lambda activity: format_pace(activity["elapsed_time"], distance_miles(activity)),
+    "speed_mph": format_speed,
+    "elevation_ft": lambda activity: f"{(activity.get('total_elevation_gain') or 0) * FEET_PER_METER:.0f}",
+    "avg_hr": lambda activity: format_heart_rate(activity.get("average_heartrate")),
+    "max_hr": lambda activity: format_heart_rate(activity.get("max_heartrate")),
+    "strava_url": lambda activity: f"https://www.strava.com/activities/{activity['id']}",
+}
+
+
+class ActivityRenderer:
+    """
+    A summary and description template compiled once.
+
+    Args:
+        summary (str): str.format template for the event title.
+        description (str): str.format template for the event description.
+
+    Notes:
+        - Raises ValueError at registration for fields missing from FIELDS,
+          instead of failing on the first activity that uses the template.
+    """
+    def __init__(self, summary: str, description: str):
+        self.summary = summary
+        self.description = description
+        used = {
+            field for template in (summary, description)
+            for _, field, _, _ in Formatter().parse(template) if field
+        }
+        unknown = used - FIELDS.keys()
+        if unknown:
+            raise ValueError(f"Unknown template fields: {', '.join(sorted(unknown))}")
+        self.fields = tuple((field, FIELDS[field]) for field in sorted(used))
+
+    def render(self, activity: dict) -> tuple[str, str]:
+        """Return (summary, description) for an activity."""
+        values = {field: compute(activity) for field, compute in self.fields}
+        return self.summary.format_map(values), self.description.format_map(values)
+
+
+RUN_DESCRIPTION = (
+    "What I did: \n"
+    "{name}\n"
+    "Time: {time}\n"
+    "Distance (mi): {distance_mi}\n"
+    "Pace (min/mi): {pace}\n"
+    "Avg HR: {avg_hr}\n"
+    "Maximum HR: {max_hr}\n"
+    "Time in HR Zones (min):\n"
+    "    - Zone 1: \n"
+    "    - Zone 2: \n"
+    "    - Zone 3: \n"
+    "    - Zone 4: \n"
+    "    - Zone 5: \n"
+    "Training effect: - Aerobic; - Anaerobic\n\n"
+    "View on Strava: {strava_url}"
+)
+
+RIDE_DESCRIPTION = (
+    "What I did: \n"
+    "{name}\n"
+    "Time: {time}\n"
+    "Distance (mi): {distance_mi}\n"
+    "Avg speed (mph): {speed_mph}\n"
+    "Elevation gain (ft): {elevation_ft}\n"
+    "Avg HR: {avg_hr}\n"
+    "Maximum HR: {max_hr}\n\n"
+    "View on Strava: {strava_url}"
+)
+
+WALK_DESCRIPTION = (
+    "What I did: \n"
+    "{name}\n"
+    "Time: {time}\n"
+    "Distance (mi): {distance_mi}\n"
+    "Pace (min/mi): {pace}\n"
+    "Elevation gain (ft): {elevation_ft}\n\n"
+    "View on Strava: {strava_url}"
+)
+
+DISTANCE_SUMMARY = "({distance_mi} mi) {name}"
+LINK_DESCRIPTION = "View on Strava: {strava_url}"
+
+# Sports without a renderer of their own
+DEFAULT_RENDERER = ActivityRenderer(DISTANCE_SUMMARY, LINK_DESCRIPTION)
+
+_renderers: dict[str, ActivityRenderer] = {}
+
+
+def register_renderer(sport_types: list[str], renderer: ActivityRenderer):
+    """
+    Use a renderer for the given Strava sport types.
+
+    Args:
+        sport_types (list[str]): Strava sport_type values (e.g. ["Run", "TrailRun"]).
+        renderer (ActivityRenderer): The renderer to use.
+
+    Returns:
+        None
+    """
+    for sport_type in sport_types:
+        _renderers[sport_type] = renderer
+
+
+def get_renderer(sport_type: str | None) -> ActivityRenderer:
+    return _renderers.get(sport_type, DEFAULT_RENDERER)
+
+
+register_renderer(["Run", "TrailRun", "VirtualRun"], ActivityRenderer(DISTANCE_SUMMARY, RUN_DESCRIPTION))
+register_renderer(
+    ["Ride", "VirtualRide", "GravelRide", "MountainBikeRide", "EBikeRide"],
+    ActivityRenderer(DISTANCE_SUMMARY, RIDE_DESCRIPTION)
+)
+register_renderer(["Walk", "Hike"], ActivityRenderer(DISTANCE_SUMMARY, WALK_DESCRIPTION))
+# Distance is meaningless for these, the title is just the activity name
+register_renderer(
+    ["WeightTraining", "Workout", "Yoga", "Crossfit", "Pilates", "HighIntensityIntervalTraining"],
+    ActivityRenderer("{name}", LINK_DESCRIPTION)
+)
+
+
+def render_activity_event(activity: dict) -> tuple[CalendarEventCreate, dict]:
+    """
+    Convert a Strava activity into a calendar event and its Google Calendar JSON body.
+
+    Args:
+        activity (dict): Activity data from Strava.
+
+    Returns:
+        tuple[CalendarEventCreate, dict]: The event and its Google Calendar API JSON,
+                                          tagged with the Strava activity id.
+    """
+    summary, description = get_renderer(activity.get("sport_type")).render(activity)
+    # Convert ISO 8601 timestamp into a timezone-aware Python datetime object
+    start_time = datetime.fromisoformat(activity["start_date"].replace("Z", "+00:00"))
+
+    # Fields are built from typed values above, skip pydantic validation in this hot path
+    event = CalendarEventCreate.model_construct(
+        summary=summary,
+        description=description,
+        start_time=start_time,
+        end_time=start_time + timedelta(seconds=activity["elapsed_time"]),
+        time_zone=activity["timezone"]
+    )
+    event_data_json = calendar_utils.build_event_data(event)
+
+    # Tag event data with Strava activity id for updating
+    event_data_json["extendedProperties"] = {"private": {"strava_activity_id": activity["id"]}}
+    return event, event_data_json
+
+
+def render_activity_events(activities: list[dict]) -> dict[int, tuple[CalendarEventCreate, dict]]:
+    """
+    Render many activities in one pass.
+
+    Args:
+        activities (list[dict]): Activity data from Strava.
+
+    Returns:
+        dict[int, tuple[CalendarEventCreate, dict]]: Event and Google Calendar JSON keyed by activity ID.
+
+    Notes:
+        - Logs the render time for large batches (backfills) so it can be tracked.
+    """
+    started = time.perf_counter()
+    rendered = {activity["id"]: render_activity_event(activity) for activity in activities}
+    if len(activities) >= 50:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"🎨 Rendered {len(activities)} activities in {elapsed_ms:.1f}ms")
+    return rendered
@@ -0,0 +1,167 @@
+"""
+services/catchup_scheduler.py
+
+Periodic catch-up sync for every connected Strava user.
+
+Syncs normally run when a webhook arrives, so a webhook lost while the instance
+was asleep would leave a permanent gap. The scheduler runs sync_strava_data for
+every connected athlete once per CATCHUP_INTERVAL_SECONDS:
+
+- Athletes are sharded across processes/nodes by a stable hash of the athlete id,
+  each process handles one shard (--shard i --shards n).
+- Each athlete gets a stable offset inside the interval, so runs are spread
+  evenly instead of all starting at the top of the hour.
+- At most CATCHUP_CONCURRENCY syncs run at a time per shard, and each one is
+  cut off after CATCHUP_USER_TIMEOUT_SECONDS, so a cycle finishes in bounded time.
+
+Run with `python -m services.catchup_scheduler [--shard i --shards n] [--once]`.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import AsyncSessionLocal
+from crud.user import get_connected_athlete_ids, get_strava_user_by_athlete_id
+from crud.sync_job import has_active_sync_job
+from services.user import ensure_strava_token, ensure_google_token
+from services.strava import sync_strava_data
+from collections import Counter
+import argparse
+import asyncio
+import hashlib
+import os
+import time
+
+
+def _stable_fraction(key: str) -> float:
+    """Map a key to [0, 1) the same way in every process (unlike hash(), which is salted)."""
+    digest = hashlib.sha256(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+def shard_of(athlete_id: str, shard_count: int) -> int:
+    """Shard that owns an athlete."""
+    return int(_stable_fraction(f"shard:{athlete_id}") * shard_count)
+
+
+def start_offset(athlete_id: str, interval: float) -> float:
+    """Seconds into each interval at which the athlete's catch-up runs."""
+    return _stable_fraction(f"offset:{athlete_id}") * interval
+
+
+def plan_cycle(athlete_ids: list[str], shard: int, shard_count: int, interval: float) -> list[tuple[float, str]]:
+    """
+    Pick this shard's athletes and order them by start offset.
+
+    Args:
+        athlete_ids (list[str]): Every connected athlete.
+        shard (int): Index of this shard (0-based).
+        shard_count (int): Total number of shards.
+        interval (float): Length of one cycle in seconds.
+
+    Returns:
+        list[tuple[float, str]]: (offset in seconds, athlete id), earliest first.
+    """
+    return sorted(
+        (start_offset(athlete_id, interval), athlete_id)
+        for athlete_id in athlete_ids if shard_of(athlete_id, shard_count) == shard
+    )
+
+
+async def catch_up_athlete(db: AsyncSession, athlete_id: str) -> str:
+    """
+    Sync one athlete's activities since their last sync.
+
+    Args:
+        db (AsyncSession): The database session.
+        athlete_id (str): The Strava athlete ID.
+
+    Returns:
+        str: "synced", "partial", "queued" (a sync job will cover it), "no_user" or "no_google".
+    """
+    # A queued webhook job syncs the athlete anyway, running both could write the same activity twice
+    if await has_active_sync_job(db, athlete_id):
+        return "queued"
+
+    strava_user = await get_strava_user_by_athlete_id(db, athlete_id)
+    if not strava_user or not strava_user.is_connected:
+        return "no_user"
+    user = strava_user.user
+    if not user or not user.google_data:
+        return "no_google"
+
+    await ensure_strava_token(user)
+    await ensure_google_token(user)
+    result = await sync_strava_data(strava_user, db)
+    return "partial" if result.failed else "synced"
+
+
+async def run_cycle(
+    shard: int = 0,
+    shard_count: int = 1,
+    interval: float | None = None,
+    concurrency: int | None = None,
+    session_factory=AsyncSessionLocal
+) -> Counter:
+    """
+    Run one catch-up cycle for this shard, spread over the interval.
+
+    Args:
+        shard (int): Index of this shard (0-based).
+        shard_count (int): Total number of shards.
+        interval (float | None): Cycle length in seconds (defaults to CATCHUP_INTERVAL_SECONDS, 3600).
+        concurrency (int | None): Max syncs in flight (defaults to CATCHUP_CONCURRENCY, 4).
+        session_factory: Creates the AsyncSession for each athlete.
+
+    Returns:
+        Counter: Number of athletes per outcome ("synced", "failed", ...).
+    """
+    interval = float(os.getenv("CATCHUP_INTERVAL_SECONDS", "3600")) if interval is None else interval
+    concurrency = concurrency or int(os.getenv("CATCHUP_CONCURRENCY", "4"))
+    timeout = float(os.getenv("CATCHUP_USER_TIMEOUT_SECONDS", "300"))
+
+    async with session_factory() as db:
+        athlete_ids = await get_connected_athlete_ids(db)
+    plan = plan_cycle(athlete_ids, shard, shard_count, interval)
+    print(f"🗓️ Catch-up shard {shard}/{shard_count}: {len(plan)} of {len(athlete_ids)} athletes over {interval:.0f}s")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    outcomes: Counter = Counter()
+    started = time.monotonic()
+
+    async def run(athlete_id: str):
+        async with semaphore:
+            try:
+                async with session_factory() as db:
+                    outcome = await asyncio.wait_for(catch_up_athlete(db, athlete_id), timeout)
+            except Exception as e:
+                outcome = "failed"
+                print(f"❌ Catch-up for athlete {athlete_id} failed: {getattr(e, 'detail', None) or e!r}")
+            outcomes[outcome] += 1
+
+    tasks = []
+    for offset, athlete_id in plan:
+        delay = started + offset - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(run(athlete_id)))
+    await asyncio.gather(*tasks)
+
+    print(f"🗓️ Catch-up shard {shard}/{shard_count} done in {time.monotonic() - started:.0f}s: {dict(outcomes)}")
+    return outcomes
+
+
+async def run_scheduler(shard: int, shard_count: int, once: bool = False):
+    """Run catch-up cycles back to back (a cycle already spans the whole interval)."""
+    while True:
+        await run_cycle(shard, shard_count)
+        if once:
+            return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Periodic Strava catch-up sync")
+    parser.add_argument("--shard", type=int, default=int(os.getenv("CATCHUP_SHARD", "0")))
+    parser.add_argument("--shards", type=int, default=int(os.getenv("CATCHUP_SHARDS", "1")))
+    parser.add_argument("--once", action="store_true", help="Run a single cycle and exit (e.g. from cron)")
+    args = parser.parse_args()
+    if not 0 <= args.shard < args.shards:
+        parser.error("--shard must be between 0 and --shards - 1")
+    asyncio.run(run_scheduler(args.shard, args.shards, args.once))
@@ -0,0 +1,175 @@
+"""
+services/reconcile.py
+
+Business logic for reconciling the sync ledger with changes made in Google Calendar.
+
+Users can edit or delete synced events by hand. Instead of re-listing the calendar,
+each pass lists only events changed since the previous pass (Google sync tokens),
+so its cost scales with the number of changes. A full listing is only needed on the
+first pass, after the Strava calendar was re-created, or when Google expires the token (410).
+
+Run for every connected user with `python -m services.reconcile`.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.user import User
+from database import AsyncSessionLocal
+import crud.sync_ledger as ledger_crud
+import crud.calendar_sync_state as sync_state_crud
+import crud.user as user_crud
+import integrations.google_calendar_api as calendar_utils
+from services.strava import upstream_status
+from services.user import ensure_google_token
+from schemas.sync import ReconcileResult
+from datetime import datetime, timedelta
+import asyncio
+
+# Google stamps our own writes slightly before the ledger records them;
+# only changes later than this after the last write count as manual edits
+EDIT_GRACE = timedelta(seconds=5)
+
+
+def event_activity_id(event: dict) -> int | None:
+    """Strava activity id tagged on an event by render_activity_event, if any."""
+    value = event.get("extendedProperties", {}).get("private", {}).get("strava_activity_id")
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def parse_event_updated(event: dict) -> datetime | None:
+    value = event.get("updated")
+    return datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+
+
+async def apply_calendar_changes(
+    db: AsyncSession,
+    user: User,
+    events: list[dict],
+    full_sync: bool
+) -> ReconcileResult:
+    """
+    Feed changed Calendar events back into the sync ledger.
+
+    Args:
+        db (AsyncSession): The database session.
+        user (User): The user whose calendar was listed.
+        events (list[dict]): Changed events from list_event_changes.
+        full_sync (bool): Whether events is the whole calendar (entries not seen are stale).
+
+    Returns:
+        ReconcileResult: What changed.
+
+    Notes:
+        - Cancelled events drop their ledger entries, so the next write for the
+          activity looks the event up again instead of patching a deleted one.
+        - Edits made after the last sync write are stored as remote_updated_at and clear
+          the entry's hashes, so the next write for the activity restores the whole event.
+        - Tagged events missing from the ledger are added to it.
+    """
+    result = ReconcileResult(full_sync=full_sync, changes=len(events))
+    live = [event for event in events if event.get("status") != "cancelled"]
+
+    if full_sync:
+        result.removed = await ledger_crud.delete_ledger_entries_except(
+            db, user.id, user.calendar_id, [event["id"] for event in live]
+        )
+    else:
+        # Cancelled events carry only their id, so they are matched through the ledger
+        cancelled = [event["id"] for event in events if event.get("status") == "cancelled"]
+        result.removed = await ledger_crud.delete_ledger_entries_by_event_ids(db, user.id, cancelled)
+
+    entries = await ledger_crud.get_ledger_entries_by_event_ids(db, user.id, [event["id"] for event in live])
+    unknown: dict[int, str] = {}
+    edited: dict[str, datetime] = {}
+    for event in live:
+        activity_id = event_activity_id(event)
+        if activity_id is None:
+            # Not written by the sync
+            continue
+        entry = entries.get(event["id"])
+        if entry is None:
+            unknown[activity_id] = event["id"]
+            continue
+        updated = parse_event_updated(event)
+        if updated and (entry.last_written_at is None or updated > entry.last_written_at + EDIT_GRACE):
+            edited[event["id"]] = updated
+            result.edited.append(activity_id)
+
+    await ledger_crud.record_remote_updates(db, user.id, edited)
+
+    if unknown:
+        # Keep existing entries, a second event for the same activity is a duplicate
+        known = await ledger_crud.get_ledger_entries(db, user.id, list(unknown))
+        adopted = {activity_id: event_id for activity_id, event_id in unknown.items() if activity_id not in known}
+        await ledger_crud.record_ledger_entries(db, user.id, user.calendar_id, adopted)
+        result.adopted = list(adopted)
+
+    return result
+
+
+async def reconcile_calendar(user: User, db: AsyncSession) -> ReconcileResult:
+    """
+    Apply Calendar changes made since the previous pass to the user's sync ledger.
+
+    Args:
+        user (User): The user to reconcile (Google tokens must be valid).
+        db (AsyncSession): The database session.
+
+    Returns:
+        ReconcileResult: What changed.
+    """
+    if not user.calendar_id or not user.google_data:
+        return ReconcileResult()
+
+    access_token = user.google_data.access_token
+    state = await sync_state_crud.get_calendar_sync_state(db, user.id)
+    sync_token = state.sync_token if state and state.calendar_id == user.calendar_id else None
+
+    events, next_token = None, None
+    if sync_token:
+        try:
+            events, next_token = await calendar_utils.list_event_changes(access_token, user.calendar_id, sync_token)
+        except Exception as e:
+            if upstream_status(e) != 410:
+                raise
+            print(f"⚠️ Calendar sync token expired for user {user.id}, doing a full pass")
+
+    full_sync = events is None
+    if full_sync:
+        events, next_token = await calendar_utils.list_event_changes(access_token, user.calendar_id)
+
+    result = await apply_calendar_changes(db, user, events, full_sync)
+    # Saved last: if the pass fails midway, the next one repeats it from the old token
+    await sync_state_crud.save_calendar_sync_state(db, user.id, user.calendar_id, next_token, full_sync)
+    return result
+
+
+async def reconcile_all_users():
+    """
+    Reconcile every connected user that has a Strava calendar, one at a time.
+
+    Returns:
+        None
+    """
+    async with AsyncSessionLocal() as db:
+        for athlete_id in await user_crud.get_connected_athlete_ids(db):
+            strava_user = await user_crud.get_strava_user_by_athlete_id(db, athlete_id)
+            user = strava_user.user if strava_user else None
+            if not user or not user.calendar_id or not user.google_data:
+                continue
+            try:
+                await ensure_google_token(user)
+                result = await reconcile_calendar(user, db)
+                print(
+                    f"🔄 Reconciled user {user.id}: {result.changes} changes, {len(result.removed)} removed, "
+                    f"{len(result.edited)} edited, {len(result.adopted)} adopted"
+                    + (" (full pass)" if result.full_sync else "")
+                )
+            except Exception as e:
+                print(f"❌ Reconciliation failed for user {user.id}: {e}")
+
+
+if __name__ == "__main__":
+    # python -m services.reconcile
+    asyncio.run(reconcile_all_users())
@@ -0,0 +1,51 @@
+"""
+services/rerender.py
+
+Re-render every synced Calendar event from the Strava activity cache.
+
+Run after changing the activity renderers: events are rebuilt from the raw payloads
+stored by syncs and update webhooks, so no Strava API calls (and none of the Strava
+rate-limit budget) are spent. Only events whose rendered body changed are written.
+
+Run with `python -m services.rerender [--athlete ATHLETE_ID]`.
+"""
+from database import AsyncSessionLocal
+import crud.user as user_crud
+from services.strava import rerender_cached_activities
+from services.user import ensure_google_token
+import argparse
+import asyncio
+
+
+async def rerender_all_users(athlete_ids: list[str] | None = None):
+    """
+    Re-render the cached activities of every connected user (or only the given athletes), one at a time.
+
+    Args:
+        athlete_ids (list[str] | None): Athletes to re-render; None means every connected athlete.
+
+    Returns:
+        None
+    """
+    async with AsyncSessionLocal() as db:
+        for athlete_id in athlete_ids or await user_crud.get_connected_athlete_ids(db):
+            strava_user = await user_crud.get_strava_user_by_athlete_id(db, athlete_id)
+            user = strava_user.user if strava_user else None
+            if not user or not user.calendar_id or not user.google_data:
+                continue
+            try:
+                await ensure_google_token(user)
+                result = await rerender_cached_activities(strava_user, db)
+                print(
+                    f"🎨 Re-rendered athlete {athlete_id}: {len(result.saved) - len(result.unchanged)} written, "
+                    f"{len(result.unchanged)} unchanged, {len(result.failed)} failed"
+                )
+            except Exception as e:
+                print(f"❌ Re-render failed for athlete {athlete_id}: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-render Calendar events from cached Strava activities")
+    parser.add_argument("--athlete", action="append", dest="athletes", help="Only this athlete (repeatable)")
+    args = parser.parse_args()
+    asyncio.run(rerender_all_users(args.athletes))
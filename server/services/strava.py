@@ -7,76 +7,180 @@ Coordinates workflows that combine database access,
 Strava API calls, and Google Calendar API calls.
 """
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-from schemas.calendar import CalendarEventCreate
+from sqlalchemy.ext.asyncio import AsyncSession
+from schemas.calendar import CalendarEventCreate, CalendarBatchOperation
 from models.strava_user import StravaUser
+from models.user import User
+import crud.sync_ledger as ledger_crud
+import crud.strava_activity_cache as activity_cache_crud
 import integrations.google_calendar_api as calendar_utils
-from integrations.strava_api import get_strava_activities, get_strava_activity
+from integrations.google_calendar_batch import execute_calendar_batch
+from integrations.strava_api import iter_strava_activities, fetch_strava_activity, MAX_PER_PAGE
+from schemas.sync import SyncResult
+from services.activity_renderers import render_activity_events
+from utils.fingerprint import event_fingerprint, changed_fields
+from utils.metrics import sync_stage, timed_iteration
+from utils.profiling import profiler
 from datetime import datetime, timedelta, timezone
-import httpx
+from typing import Literal
+import asyncio
+import weakref
+import os
 
 
-def format_activity_time(seconds: int) -> str:
-    """Format seconds as M:SS or H:MM:SS."""
-    hours, remainder = divmod(seconds, 3600)
-    minutes, seconds = divmod(remainder, 60)
-    if hours:
-        return f"{hours}:{minutes:02d}:{seconds:02d}"
-    return f"{minutes}:{seconds:02d}"
+def upstream_status(e: Exception) -> int | None:
+    """Return the HTTP status behind an upstream error (httpx or HTTPException), if any."""
+    response = getattr(e, "response", None)
+    if response is not None:
+        return response.status_code
+    return getattr(e, "status_code", None)
 
 
-def format_pace(seconds: int, distance_miles: float) -> str:
-    """Format pace as min/mi, or blank when pace is not meaningful."""
-    if distance_miles <= 0:
-        return ""
-    return format_activity_time(round(seconds / distance_miles))
-
+async def get_current_ledger_entries(db: AsyncSession, user: User, activity_ids: list[int]) -> dict:
+    """
+    Look up already-written Google Calendar events in the local sync ledger.
 
-def format_heart_rate(value) -> str:
-    if value is None:
-        return ""
-    return f"{float(value):.0f}"
+    Args:
+        db (AsyncSession): The database session.
+        user (User): The user who owns the activities.
+        activity_ids (list[int]): Strava activity IDs to look up.
 
+    Returns:
+        dict[int, SyncLedgerEntry]: Entries in the user's current calendar keyed by activity ID.
+    """
+    entries = await ledger_crud.get_ledger_entries(db, user.id, activity_ids)
+    return {
+        activity_id: entry
+        for activity_id, entry in entries.items()
+        # Entries for a previous calendar (e.g. the Strava calendar was re-created) are stale
+        if entry.calendar_id == user.calendar_id
+    }
 
-def is_weight_training(activity: dict) -> bool:
-    return activity.get("sport_type") == "WeightTraining"
 
+async def get_ledger_event_ids(db: AsyncSession, user: User, activity_ids: list[int]) -> dict[int, str]:
+    """
+    Look up already-written Google Calendar event IDs in the local sync ledger.
 
-def is_run(activity: dict) -> bool:
-    return activity.get("sport_type") == "Run"
+    Args:
+        db (AsyncSession): The database session.
+        user (User): The user who owns the activities.
+        activity_ids (list[int]): Strava activity IDs to look up.
 
+    Returns:
+        dict[int, str]: Google event ID keyed by activity ID, only for ledger hits.
+    """
+    entries = await get_current_ledger_entries(db, user, activity_ids)
+    return {activity_id: entry.google_event_id for activity_id, entry in entries.items()}
 
-def build_activity_summary(activity: dict, distance_miles: float) -> str:
-    if is_weight_training(activity):
-        return activity["name"]
-    return f"({distance_miles} mi) {activity['name']}"
 
+async def lookup_event_id(user: User, activity_id: int, ledger_event_id: str | None = None) -> str | None:
+    """
+    Return the Google event ID for an activity, asking Google only when the ledger has no entry.
 
-def build_activity_description(activity: dict, distance_miles: float) -> str:
-    if not is_run(activity):
-        return f"View on Strava: https://www.strava.com/activities/{activity['id']}"
+    Args:
+        user (User): The user who owns the activity.
+        activity_id (int): The Strava activity ID.
+        ledger_event_id (str | None): Event ID already found in the sync ledger, if any.
 
-    elapsed_time = activity["elapsed_time"]
-    return (
-        "What I did: \n"
-        f"{activity['name']}\n"
-        f"Time: {format_activity_time(elapsed_time)}\n"
-        f"Distance (mi): {distance_miles}\n"
-        f"Pace (min/mi): {format_pace(elapsed_time, distance_miles)}\n"
-        f"Avg HR: {format_heart_rate(activity.get('average_heartrate'))}\n"
-        f"Maximum HR: {format_heart_rate(activity.get('max_heartrate'))}\n"
-        "Time in HR Zones (min):\n"
-        "    - Zone 1: \n"
-        "    - Zone 2: \n"
-        "    - Zone 3: \n"
-        "    - Zone 4: \n"
-        "    - Zone 5: \n"
-        "Training effect: - Aerobic; - Anaerobic\n\n"
-        f"View on Strava: https://www.strava.com/activities/{activity['id']}"
+    Returns:
+        str | None: The Google event ID, or None if no event exists.
+    """
+    if ledger_event_id:
+        return ledger_event_id
+    return await calendar_utils.find_event_by_strava_id(
+        user.google_data.access_token, user.calendar_id, activity_id
     )
 
 
-async def save_activities(strava_user: StravaUser, activities: list[dict]):
+# Per-user semaphores so concurrent syncs of the same user share one cap.
+# Weak values let a semaphore go away once no sync of that user is using it.
+_user_limits: "weakref.WeakValueDictionary[str, asyncio.Semaphore]" = weakref.WeakValueDictionary()
+
+def user_concurrency_limit(user_id, limit: int | None = None) -> asyncio.Semaphore:
+    """
+    Return the semaphore capping in-flight Calendar requests for a user.
+
+    Args:
+        user_id: The user's ID.
+        limit (int | None): Cap to use when the semaphore is created (defaults to SYNC_USER_CONCURRENCY, 4).
+
+    Returns:
+        asyncio.Semaphore: The user's shared semaphore.
+    """
+    key = str(user_id)
+    semaphore = _user_limits.get(key)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(limit or int(os.getenv("SYNC_USER_CONCURRENCY", "4")))
+        _user_limits[key] = semaphore
+    return semaphore
+
+
+async def _run_per_activity(user: User, activities: list[dict], func, limit: int | None):
+    """
+    Run func(activity) for every activity, at most `limit` at a time for this user.
+
+    Returns:
+        tuple[dict[int, object], dict[int, Exception]]: Results and errors keyed by activity ID.
+    """
+    semaphore = asyncio.Semaphore(1) if limit == 1 else user_concurrency_limit(user.id, limit)
+
+    async def run(activity: dict):
+        async with semaphore:
+            return await func(activity)
+
+    outcomes = await asyncio.gather(*(run(activity) for activity in activities), return_exceptions=True)
+
+    results, failed = {}, {}
+    for activity, outcome in zip(activities, outcomes):
+        if isinstance(outcome, Exception):
+            failed[activity["id"]] = outcome
+        else:
+            results[activity["id"]] = outcome
+    return results, failed
+
+
+class SyncCursor:
+    """
+    Tracks the new last_synced_at while activities are processed (possibly over several chunks).
+
+    The cursor moves to the latest end time of the saved activities, but never to or past the
+    start of a failed one, so the next sync (`after=cursor`) fetches failed activities again.
+    Only two timestamps are kept, so memory stays flat however many activities are observed.
+    """
+    def __init__(self, previous: datetime | None):
+        self.previous = previous
+        self.latest_end_utc = previous
+        self.earliest_failed_start: datetime | None = None
+
+    def observe(self, activity: dict, failed: bool):
+        start_time = datetime.fromisoformat(activity["start_date"].replace("Z", "+00:00")).astimezone(timezone.utc)
+        if failed:
+            if self.earliest_failed_start is None or start_time < self.earliest_failed_start:
+                self.earliest_failed_start = start_time
+            return
+        end_time = start_time + timedelta(seconds=activity["elapsed_time"])
+        if self.latest_end_utc is None or end_time > self.latest_end_utc:
+            self.latest_end_utc = end_time
+
+    @property
+    def value(self) -> datetime | None:
+        latest_end_utc = self.latest_end_utc
+        if self.earliest_failed_start and latest_end_utc and latest_end_utc >= self.earliest_failed_start:
+            latest_end_utc = self.earliest_failed_start - timedelta(seconds=1)
+            if self.previous and latest_end_utc < self.previous:
+                latest_end_utc = self.previous
+        return latest_end_utc
+
+
+async def save_activities(
+    strava_user: StravaUser,
+    activities: list[dict],
+    db: AsyncSession,
+    mode: Literal["sequential", "concurrent", "batch"] = "sequential",
+    concurrency: int | None = None,
+    cursor: SyncCursor | None = None,
+    skip_unchanged: bool = False
+) -> SyncResult:
     """
     Saves Strava activities to the user's Google Calendar.
 
@@ -87,66 +191,216 @@ async def save_activities(strava_user: StravaUser, activities: list[dict]):
      Args:
         strava_user (StravaUser): The StravaUser object containing OAuth tokens.
         activities (list[dict]): List of activity data from Strava.
+        db (AsyncSession): The database session (used for the sync ledger).
+        mode (str): "sequential" writes one activity at a time, "concurrent" runs lookups and writes
+                    in parallel, "batch" sends the writes through Google's batch endpoint
+                    (up to 50 per HTTP request).
+        concurrency (int | None): Per-user cap on parallel Calendar requests for the "concurrent" and
+                                  "batch" modes (defaults to SYNC_USER_CONCURRENCY).
+        cursor (SyncCursor | None): Cursor shared across calls when one sync saves several chunks.
+        skip_unchanged (bool): Skip activities whose rendered event matches the ledger's content hash.
+                               Full syncs leave this off so they still repair events removed by hand.
 
     Returns:
-        datetime | None: UTC datetime of the latest activity's end time if any activities were processed,
-                         otherwise None.
+        SyncResult: The new sync cursor, plus the saved and failed activity ids.
+                    A failed activity never aborts the others.
     """
-    latest_end_utc: datetime | None = strava_user.last_synced_at
-
+    cursor = cursor or SyncCursor(strava_user.last_synced_at)
     if not activities:
-        return latest_end_utc
-
-    try:
-        user = strava_user.user
-        google_data = user.google_data
+        return SyncResult(latest_end_utc=cursor.value)
 
+    user = strava_user.user
+    google_data = user.google_data
+    limit = 1 if mode == "sequential" else concurrency
+    with sync_stage("lookup"):
+        activity_ids = [activity["id"] for activity in activities]
+        deleted = await ledger_crud.get_tombstoned_activity_ids(db, user.id, activity_ids)
+        ledger_entries = await get_current_ledger_entries(db, user, activity_ids)
+    if deleted:
+        # Deleted on Strava (the list can lag behind the delete webhook): never write these again
         for activity in activities:
-            # Convert meters to miles
-            distance = round(activity["distance"] / 1609.34, 2)
-            # Convert ISO 8601 timestamp into a timezone-aware Python datetime object
-            start_time = datetime.fromisoformat(activity["start_date"].replace("Z", "+00:00"))
-            end_time=start_time + timedelta(seconds=activity["elapsed_time"])
-            if latest_end_utc is None or end_time.astimezone(timezone.utc) > latest_end_utc:
-                latest_end_utc = end_time.astimezone(timezone.utc)
-            
-            event = CalendarEventCreate(
-                summary=build_activity_summary(activity, distance),
-                description=build_activity_description(activity, distance),
-                start_time=start_time,
-                end_time=end_time,
-                time_zone=activity["timezone"]
-            )
-            event_data_json = calendar_utils.build_event_data(event)
-            
-            # Tag event data with Strava activity id for updating
-            event_data_json.setdefault("extendedProperties", {}).setdefault("private", {})[
-                "strava_activity_id"
-            ] = activity["id"]
-
-            existing_event_id = await calendar_utils.find_event_by_strava_id(
-                google_data.access_token, user.calendar_id, activity["id"]
-            )
+            if activity["id"] in deleted:
+                cursor.observe(activity, failed=False)
+        activities = [activity for activity in activities if activity["id"] not in deleted]
+        # A failed Calendar delete leaves the ledger entry next to its tombstone
+        ledger_entries = {
+            activity_id: entry for activity_id, entry in ledger_entries.items() if activity_id not in deleted
+        }
+        print(f"🪦 Skipped {len(deleted)} activities deleted on Strava")
+    ledger_event_ids = {activity_id: entry.google_event_id for activity_id, entry in ledger_entries.items()}
+
+    with sync_stage("render"):
+        rendered = render_activity_events(activities)
+        fingerprints = {activity_id: event_fingerprint(body) for activity_id, (_, body) in rendered.items()}
+    # Activity updates that only touch fields we never render (kudos, gear, privacy...) need no write
+    unchanged = [
+        activity_id for activity_id, entry in ledger_entries.items()
+        if skip_unchanged and entry.content_hash == fingerprints[activity_id][0]
+    ]
+    pending = [activity for activity in activities if activity["id"] not in unchanged]
+    # Events already in the ledger only get the fields that changed since the last write
+    # (an empty PATCH still re-creates an event removed by hand, through the 404 path)
+    patch_bodies = {
+        activity_id: changed_fields(rendered[activity_id][1], entry.field_hashes)
+        for activity_id, entry in ledger_entries.items() if activity_id not in unchanged
+    }
+
+    if mode == "batch":
+        written, failed = await _save_activities_batch(user, pending, rendered, ledger_event_ids, patch_bodies, limit)
+    else:
+        async def upsert(activity: dict) -> str:
+            event, event_data_json = rendered[activity["id"]]
+            ledger_event_id = ledger_event_ids.get(activity["id"])
+            existing_event_id = await lookup_event_id(user, activity["id"], ledger_event_id)
             if existing_event_id:
                 # Update existing event
-                print(f"⚠️⚠️⚠️ {existing_event_id} ⚠️⚠️⚠️")
-                await calendar_utils.update_google_calendar_event(
-                    google_data.access_token, user.calendar_id, existing_event_id, event_data_json
-                )
-                print(f"🔁 Event updated for activity: {event.summary} {event.start_time}")
-            else:
-                # Create new event
-                await calendar_utils.create_google_calendar_event(
-                    google_data.access_token, user.calendar_id, event_data_json
-                )
-                print(f"✅ Event created for activity: {event.summary} {event.start_time}")
-        
-        return latest_end_utc if latest_end_utc else None
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"⚠️ Failed to save activity {activity.get('id')}: {str(e)}")
+                body = patch_bodies[activity["id"]] if ledger_event_id else event_data_json
+                try:
+                    await calendar_utils.update_google_calendar_event(
+                        google_data.access_token, user.calendar_id, existing_event_id, body
+                    )
+                    print(f"🔁 Event updated for activity: {event.summary} {event.start_time}")
+                    return existing_event_id
+                except HTTPException as e:
+                    if e.status_code != 404:
+                        raise
+                    # Event was removed from the calendar since the ledger recorded it, create it again
+
+            # Create new event
+            created = await calendar_utils.create_google_calendar_event(
+                google_data.access_token, user.calendar_id, event_data_json
+            )
+            print(f"✅ Event created for activity: {event.summary} {event.start_time}")
+            return created["id"]
+
+        # Includes the Calendar lookups for activities missing from the ledger, done inside each upsert
+        with sync_stage("write"):
+            written, failed = await _run_per_activity(user, pending, upsert, limit)
+
+    with sync_stage("ledger"):
+        await ledger_crud.record_ledger_entries(
+            db, user.id, user.calendar_id, written,
+            {activity_id: fingerprints[activity_id] for activity_id in written}
+        )
+
+    # Events that vanished were already re-created above, so a remaining 404/410 means
+    # the calendar itself is gone: fail the whole call so the caller can re-resolve it
+    if any(upstream_status(error) in (404, 410) for error in failed.values()):
+        raise HTTPException(status_code=404, detail=f"calendar_not_found: {user.calendar_id}")
 
+    failed = {activity_id: getattr(error, "detail", None) or str(error) for activity_id, error in failed.items()}
+    for activity_id, error in failed.items():
+        print(f"⚠️ Failed to save activity {activity_id}: {error}")
 
-async def sync_strava_data(strava_user: StravaUser, db: Session):
+    for activity in activities:
+        cursor.observe(activity, failed=activity["id"] in failed)
+
+    if unchanged:
+        print(f"⏭️ Skipped {len(unchanged)} activities with no rendered changes")
+    return SyncResult(
+        latest_end_utc=cursor.value, saved=[*written, *unchanged], unchanged=unchanged, deleted=sorted(deleted), failed=failed
+    )
+
+
+async def _save_activities_batch(
+    user: User,
+    activities: list[dict],
+    rendered: dict[int, tuple[CalendarEventCreate, dict]],
+    ledger_event_ids: dict[int, str],
+    patch_bodies: dict[int, dict],
+    limit: int | None
+):
+    """
+    Batch mode of save_activities: looks up events missing from the ledger (in parallel),
+    then sends every create/update through Google's batch endpoint. Failed writes are
+    retried individually by execute_calendar_batch before being reported.
+
+    Returns:
+        tuple[dict[int, str], dict[int, Exception]]: Written event IDs and errors keyed by activity ID.
+    """
+    access_token = user.google_data.access_token
+
+    async def lookup(activity: dict):
+        return await lookup_event_id(user, activity["id"], ledger_event_ids.get(activity["id"]))
+
+    with sync_stage("lookup"):
+        existing_event_ids, failed = await _run_per_activity(user, activities, lookup, limit)
+
+    operations = []
+    for activity in activities:
+        if activity["id"] in failed:
+            continue
+        _, event_data_json = rendered[activity["id"]]
+        existing_event_id = existing_event_ids[activity["id"]]
+        if existing_event_id and activity["id"] in ledger_event_ids:
+            event_data_json = patch_bodies[activity["id"]]
+        operations.append(CalendarBatchOperation(
+            method="patch" if existing_event_id else "insert",
+            activity_id=activity["id"],
+            event_id=existing_event_id,
+            body=event_data_json
+        ))
+
+    with sync_stage("write"):
+        results = await execute_calendar_batch(access_token, user.calendar_id, operations)
+
+        # Events recorded in the ledger but removed from the calendar since then are created again
+        recreate = [
+            # Patches may carry only the changed fields, a re-created event needs the whole body
+            operation.model_copy(update={
+                "method": "insert", "event_id": None, "body": rendered[operation.activity_id][1]
+            })
+            for operation in operations
+            if operation.method == "patch" and results[operation.activity_id].status_code == 404
+        ]
+        if recreate:
+            results.update(await execute_calendar_batch(access_token, user.calendar_id, recreate))
+
+    written = {activity_id: result.event["id"] for activity_id, result in results.items() if result.ok}
+    failed.update({
+        activity_id: HTTPException(status_code=result.status_code, detail=result.error)
+        for activity_id, result in results.items() if not result.ok
+    })
+    print(f"📦 Batch saved {len(written)}/{len(activities)} activities")
+    return written, failed
+
+
+async def recover_strava_calendar(user: User, db: AsyncSession) -> bool:
+    """
+    Re-check the stored Strava calendar after a Calendar call returned 404/410.
+
+    Confirms the stored calendar_id with a cheap single-calendar GET and only
+    when it is really gone looks it up again (or re-creates it) and persists the new id.
+
+    Args:
+        user (User): The user whose calendar should be checked.
+        db (AsyncSession): The database session.
+
+    Returns:
+        bool: True if calendar_id changed (the failed call is worth retrying), False otherwise.
+    """
+    access_token = user.google_data.access_token
+    if user.calendar_id and await calendar_utils.get_calendar(access_token, user.calendar_id):
+        return False
+
+    print(f"📅 Strava calendar {user.calendar_id} is gone, resolving it again")
+    user.calendar_id = await calendar_utils.get_or_create_strava_calendar(access_token)
+    await db.commit()
+    return True
+
+
+async def _with_calendar_recovery(user: User, db: AsyncSession, operation):
+    """Run operation(); if the stored calendar turns out to be gone, resolve it again and retry once."""
+    try:
+        return await operation()
+    except HTTPException as e:
+        if e.status_code != 404 or not await recover_strava_calendar(user, db):
+            raise
+        return await operation()
+
+
+@profiler.profiled("sync_strava_data")
+async def sync_strava_data(strava_user: StravaUser, db: AsyncSession):
     """
     Syncs Strava activities to the user's Google Calendar
 
@@ -155,40 +409,143 @@ async def sync_strava_data(strava_user: StravaUser, db: Session):
 
     Args:
         strava_user (StravaUser): The StravaUser object containing OAuth tokens and last_synced_at timestamp.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
-        None
+        SyncResult: Saved and failed activity ids. Failed activities stay after the
+                    new sync cursor so the next sync retries them.
+
+    Notes:
+        - Uses the stored User.calendar_id directly; the calendar list is only
+          consulted on first sync or when the stored calendar returns 404/410.
     """
     user = strava_user.user
     google_data = user.google_data
 
-    try:
-        # Strava's `after` parameter must be a UNIX timestamp (int), not a datetime.
-        # Avoids timezone/formatting issues and makes filtering faster.
-        after = int(strava_user.last_synced_at.timestamp()) if strava_user.last_synced_at else None
-        activities = await get_strava_activities(strava_user.access_token, after)
-
-        user.calendar_id = await calendar_utils.get_or_create_strava_calendar(google_data.access_token)
+    # Strava's `after` parameter must be a UNIX timestamp (int), not a datetime.
+    # Avoids timezone/formatting issues and makes filtering faster.
+    after = int(strava_user.last_synced_at.timestamp()) if strava_user.last_synced_at else None
+    # Activities are streamed page by page: each page is written while the next one is fetched,
+    # so a long history never has to be held in memory at once.
+    page_size = int(os.getenv("STRAVA_PAGE_SIZE", MAX_PER_PAGE))
+    # Group writes into Google batch requests unless CALENDAR_WRITE_MODE asks
+    # for parallel single-event requests instead
+    mode = os.getenv("CALENDAR_WRITE_MODE", "batch")
+
+    async def stream_and_save() -> SyncResult:
+        cursor = SyncCursor(strava_user.last_synced_at)
+        result = SyncResult(latest_end_utc=cursor.value)
+        chunk: list[dict] = []
+
+        async def save_chunk():
+            # Raw summaries are kept so events can be re-rendered later without Strava calls
+            with sync_stage("cache"):
+                await activity_cache_crud.cache_activities(db, user.id, chunk)
+            chunk_result = await save_activities(
+                strava_user, chunk, db, mode=mode if len(chunk) > 1 else "sequential", cursor=cursor
+            )
+            result.saved.extend(chunk_result.saved)
+            result.unchanged.extend(chunk_result.unchanged)
+            result.failed.update(chunk_result.failed)
+            chunk.clear()
+
+        activities = iter_strava_activities(strava_user.access_token, after=after, per_page=page_size)
+        # Only the time spent waiting on Strava counts as fetch, not the writes done between pages
+        async for activity in timed_iteration(activities, "fetch"):
+            chunk.append(activity)
+            if len(chunk) >= page_size:
+                await save_chunk()
+        if chunk:
+            await save_chunk()
+
+        result.latest_end_utc = cursor.value
+        return result
 
-        latest_time_utc = await save_activities(strava_user, activities)
-        strava_user.last_synced_at = latest_time_utc
-        db.commit()
-        db.refresh(strava_user)
+    try:
+        if not user.calendar_id:
+            user.calendar_id = await calendar_utils.get_or_create_strava_calendar(google_data.access_token)
+
+        result = await _with_calendar_recovery(user, db, stream_and_save)
+        strava_user.last_synced_at = result.latest_end_utc
+        await db.commit()
+        await db.refresh(strava_user)
+        return result
     except Exception as e:
-        db.rollback()
-        if e.response.status_code in (400, 401):
+        await db.rollback()
+        if upstream_status(e) == 429:
+            # Strava budget used up: keep the 429 so the caller backs off instead of failing hard
+            raise
+        if upstream_status(e) in (400, 401):
             raise HTTPException(status_code=401, detail="google_unauthorized: token refresh failed")
         raise HTTPException(status_code=500, detail=f"Failed to sync Strava data: {str(e)}")
 
-async def update_strava_activity(strava_user: StravaUser, activity_id: int):
+async def get_activity_revalidated(strava_user: StravaUser, activity_id: int, db: AsyncSession) -> dict:
+    """
+    Return a detailed Strava activity, revalidating the cached copy instead of downloading it again.
+
+    Args:
+        strava_user (StravaUser): The StravaUser object containing OAuth tokens.
+        activity_id (int): The ID of the activity.
+        db (AsyncSession): The database session (used for the activity cache).
+
+    Returns:
+        dict: The detailed activity JSON.
+
+    Notes:
+        - Sends the cached ETag as If-None-Match; on 304 Not Modified the cached payload is
+          returned. Anything else is stored with its new ETag.
+    """
+    cached = (await activity_cache_crud.get_cached_activities(db, [activity_id])).get(activity_id)
+    # Only detailed fetches store an ETag, so a cached ETag means a detailed payload
+    etag = cached.etag if cached else None
+    activity, etag = await fetch_strava_activity(strava_user.access_token, activity_id, etag)
+    if activity is None:
+        await activity_cache_crud.mark_revalidated(db, activity_id)
+        return cached.payload
+
+    await activity_cache_crud.cache_activities(db, strava_user.user_id, [activity], {activity_id: etag} if etag else None)
+    return activity
+
+async def rerender_cached_activities(strava_user: StravaUser, db: AsyncSession, batch_size: int = MAX_PER_PAGE) -> SyncResult:
+    """
+    Rewrite the Calendar events of every cached activity from the stored payloads, without calling Strava.
+
+    Used after a change to the activity renderers: only events whose rendered body changed are
+    written (and only their changed fields), tombstoned activities are skipped.
+
+    Args:
+        strava_user (StravaUser): The StravaUser object containing OAuth tokens.
+        db (AsyncSession): The database session.
+        batch_size (int): Activities loaded and saved per chunk.
+
+    Returns:
+        SyncResult: Saved, unchanged, deleted and failed activity ids. The sync cursor is not moved.
+    """
+    user = strava_user.user
+    mode = os.getenv("CALENDAR_WRITE_MODE", "batch")
+    result = SyncResult(latest_end_utc=strava_user.last_synced_at)
+    after_id = None
+    while True:
+        activities = await activity_cache_crud.get_cached_activity_page(db, user.id, after_id, batch_size)
+        if not activities:
+            return result
+        after_id = activities[-1]["id"]
+        chunk_result = await _with_calendar_recovery(
+            user, db, lambda: save_activities(strava_user, activities, db, mode=mode, skip_unchanged=True)
+        )
+        result.saved.extend(chunk_result.saved)
+        result.unchanged.extend(chunk_result.unchanged)
+        result.deleted.extend(chunk_result.deleted)
+        result.failed.update(chunk_result.failed)
+
+async def update_strava_activity(strava_user: StravaUser, activity_id: int, db: AsyncSession):
     """
     Fetches a single Strava activity by ID and syncs updated details to user's Google Calendar
     
     Args:
         strava_user (StravaUser): The StravaUser object containing OAuth tokens.
         activity_id (int): The ID of the activity to update.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         None
@@ -197,57 +554,65 @@ async def update_strava_activity(strava_user: StravaUser, activity_id: int):
         Does NOT modify last_synced_at, as updates do not affect the sync window.
     """
     try:
-        activity = await get_strava_activity(strava_user, activity_id)
+        activity = await get_activity_revalidated(strava_user, activity_id, db)
 
-        await save_activities(strava_user, [activity])
+        result = await _with_calendar_recovery(
+            strava_user.user, db, lambda: save_activities(strava_user, [activity], db, skip_unchanged=True)
+        )
+        if result.failed:
+            raise HTTPException(status_code=500, detail=result.failed[activity_id])
     except Exception as e:
-        if e.response.status_code in (400, 401):
+        if upstream_status(e) == 429:
+            raise
+        if upstream_status(e) in (400, 401):
             raise HTTPException(status_code=401, detail="google_unauthorized: token refresh failed")
         raise HTTPException(status_code=500, detail=f"Failed to update Strava activity {activity_id}: {str(e)}")
     
-async def delete_strava_activity(strava_user: StravaUser, activity_id: int, db: Session):
+async def delete_strava_activity(strava_user: StravaUser, activity_id: int, db: AsyncSession):
     """
     Remove the Google Calendar event linked to the given Strava activity.
     
     Args:
         strava_user (StravaUser): The StravaUser object containing OAuth tokens.
         activity_id (int): The ID of the Strava activity to remove.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         dict: Status indicating whether the event was deleted or not found.
 
     Notes:
         Does NOT modify last_synced_at, as deletions do not affect the sync window.
+        The activity is tombstoned, so later syncs and updates skip it instead of re-creating its event.
     """
     user = strava_user.user
     google_data = user.google_data
 
     try:
-        # Reset last synced at to the start of the day
-        strava_user.last_synced_at = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-        db.commit()
-        db.refresh(strava_user)
-        
-        existing_event_id = await calendar_utils.find_event_by_strava_id(
-            google_data.access_token, user.calendar_id, activity_id
-        )
+        ledger_event_id = (await get_ledger_event_ids(db, user, [activity_id])).get(activity_id)
+        existing_event_id = await lookup_event_id(user, activity_id, ledger_event_id)
+        # Recorded before the event is removed, so a sync running meanwhile cannot re-create it
+        await ledger_crud.record_tombstone(db, user.id, activity_id, existing_event_id)
+        await activity_cache_crud.delete_cached_activity(db, activity_id)
 
         if not existing_event_id:
             # Nothing to delete (treated as success)
             return {"status": "no event"}
         
         # Delete the event
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(
-                f"https://www.googleapis.com/calendar/v3/calendars/{user.calendar_id}/events/{existing_event_id}",
-                headers={"Authorization": f"Bearer {google_data.access_token}"}
+        try:
+            await calendar_utils.delete_google_calendar_event(
+                google_data.access_token, user.calendar_id, existing_event_id
             )
-            response.raise_for_status()
+        except Exception as e:
+            # Already removed (e.g. by hand in Calendar)
+            if upstream_status(e) not in (404, 410):
+                raise
+        await ledger_crud.delete_ledger_entry(db, user.id, activity_id)
 
         print(f"‼️ Event deleted: {existing_event_id}, {activity_id}")
+        return {"status": "deleted"}
     except Exception as e:
-        db.rollback()
-        if e.response.status_code in (400, 401):
+        await db.rollback()
+        if upstream_status(e) in (400, 401):
             raise HTTPException(status_code=401, detail="google_unauthorized: token refresh failed")
         raise HTTPException(status_code=500, detail=f"Unexpected error while deleting activity {activity_id}: {str(e)}")
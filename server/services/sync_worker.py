@@ -0,0 +1,290 @@
+"""
+services/sync_worker.py
+
+Background workers that drain the SyncJob queue.
+
+The webhook route only stores Strava events; these workers claim them from
+Postgres, refresh tokens, fetch from Strava and write to Google Calendar.
+Failed jobs are retried with exponential backoff until SYNC_JOB_MAX_ATTEMPTS.
+
+Incoming events are debounced per (owner_id, object_id): a burst of create/update/delete
+events for one activity collapses into a single pending job that runs once the burst
+has been quiet for WEBHOOK_DEBOUNCE_SECONDS. Strava retries of an already queued
+event (same aspect_type and event_time) are dropped.
+
+Workers run inside the API process (started from the FastAPI lifespan, SYNC_WORKERS
+of them) or standalone with `python -m services.sync_worker [count]`.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from models.sync_job import SyncJob
+from database import AsyncSessionLocal
+from crud.sync_job import (
+    claim_sync_job, complete_sync_job, enqueue_sync_job, fail_sync_job, get_pending_sync_job,
+    has_seen_sync_event, merge_sync_job, requeue_stale_jobs, sync_event_key
+)
+from crud.user import get_strava_user_by_athlete_id
+from services.user import ensure_strava_token, ensure_google_token
+from services.strava import sync_strava_data, update_strava_activity, delete_strava_activity
+from integrations.strava_rate_limit import StravaRateLimited
+from datetime import datetime, timedelta, timezone
+import asyncio
+import os
+import sys
+import time
+
+_workers: list[asyncio.Task] = []
+# Set when a job is enqueued in this process so idle workers wake up without waiting for the next poll
+_wakeup = asyncio.Event()
+
+
+def _int_setting(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def retry_delay(attempts: int) -> timedelta | None:
+    """
+    Backoff before the next attempt of a failed job.
+
+    Args:
+        attempts (int): Number of attempts already made.
+
+    Returns:
+        timedelta | None: base * 2^(attempts - 1) capped at SYNC_JOB_MAX_BACKOFF_SECONDS,
+                          or None once SYNC_JOB_MAX_ATTEMPTS is reached.
+    """
+    if attempts >= _int_setting("SYNC_JOB_MAX_ATTEMPTS", 5):
+        return None
+    base = _int_setting("SYNC_JOB_RETRY_BASE_SECONDS", 30)
+    cap = _int_setting("SYNC_JOB_MAX_BACKOFF_SECONDS", 3600)
+    return timedelta(seconds=min(cap, base * 2 ** (attempts - 1)))
+
+
+def coalesce_aspect(pending: str, incoming: str) -> str:
+    """
+    Combine a pending job's action with a newer event for the same activity.
+
+    Args:
+        pending (str): aspect_type of the pending job.
+        incoming (str): aspect_type of the new event.
+
+    Returns:
+        str: The single action that leaves Calendar in the final state.
+
+    Notes:
+        - delete wins over everything (a deleted activity cannot come back).
+        - create wins over update: the create run fetches the latest activity anyway.
+    """
+    if "delete" in (pending, incoming):
+        return "delete"
+    if "create" in (pending, incoming):
+        return "create"
+    return incoming
+
+
+async def queue_webhook_event(db: AsyncSession, payload: dict) -> tuple[SyncJob | None, str]:
+    """
+    Queue a webhook event, coalescing it with a pending job for the same activity.
+
+    Args:
+        db (AsyncSession): The database session.
+        payload (dict): The validated Strava webhook payload.
+
+    Returns:
+        tuple[SyncJob | None, str]: The job that will run the event and "queued", "coalesced"
+                                    or "duplicate" (a retry of an event already queued; job is None).
+    """
+    athlete_id, activity_id = str(payload["owner_id"]), int(payload["object_id"])
+    if await has_seen_sync_event(db, athlete_id, activity_id, sync_event_key(payload)):
+        return None, "duplicate"
+
+    now = datetime.now(timezone.utc)
+    debounce = timedelta(seconds=float(os.getenv("WEBHOOK_DEBOUNCE_SECONDS", "5")))
+    max_wait = timedelta(seconds=float(os.getenv("WEBHOOK_DEBOUNCE_MAX_SECONDS", "60")))
+
+    # A concurrent request may insert the pending job between our lookup and insert, so retry once
+    for _ in range(2):
+        pending = await get_pending_sync_job(db, athlete_id, activity_id)
+        if pending:
+            # Trailing-edge debounce, capped so a steady stream of edits cannot starve the job
+            run_after = min(now + debounce, max(pending.created_at + max_wait, pending.run_after))
+            aspect_type = coalesce_aspect(pending.aspect_type, payload["aspect_type"])
+            return await merge_sync_job(db, pending, aspect_type, payload, run_after), "coalesced"
+
+        job = await enqueue_sync_job(db, payload, run_after=now + debounce)
+        if job:
+            return job, "queued"
+    raise Exception(f"Could not queue event for activity {activity_id}")
+
+
+async def _record_failure(db: AsyncSession, job: SyncJob, error: str, retry_in: timedelta | None):
+    """Schedule a retry, or hand the job's action to a newer pending job for the same activity."""
+    pending = await get_pending_sync_job(db, job.athlete_id, job.activity_id)
+    if pending:
+        await merge_sync_job(
+            db, pending, coalesce_aspect(job.aspect_type, pending.aspect_type), pending.payload, pending.run_after
+        )
+    await fail_sync_job(db, job, error, retry_in, superseded=pending is not None)
+
+
+async def process_sync_job(job: SyncJob, db: AsyncSession) -> str:
+    """
+    Run one webhook event: refresh tokens, then create/update/delete the Calendar event(s).
+
+    Args:
+        job (SyncJob): The claimed job.
+        db (AsyncSession): The database session.
+
+    Returns:
+        str: Outcome stored on the job ("processed", "partial", "no_user", ...).
+
+    Notes:
+        - Raises on retryable failures; the caller records them and schedules a retry.
+    """
+    strava_user = await get_strava_user_by_athlete_id(db, job.athlete_id)
+    if not strava_user:
+        return "no_user"
+
+    user = strava_user.user
+    if not user or not user.google_data:
+        return "no_google"
+
+    await ensure_strava_token(user)
+    await ensure_google_token(user)
+
+    if job.aspect_type == "create":
+        result = await sync_strava_data(strava_user, db)
+        if result.failed:
+            # Failed activities stay after the sync cursor and are picked up by the next sync
+            print(f"⚠️ Sync for athlete {job.athlete_id} left {len(result.failed)} activities for the next sync")
+            return "partial"
+    elif job.aspect_type == "update":
+        await update_strava_activity(strava_user, job.activity_id, db)
+    elif job.aspect_type == "delete":
+        await delete_strava_activity(strava_user, job.activity_id, db)
+    else:
+        return f"ignored - Unhandled aspect_type: {job.aspect_type}"
+    return "processed"
+
+
+async def run_next_job(db: AsyncSession) -> bool:
+    """
+    Claim and run the next due job.
+
+    Args:
+        db (AsyncSession): The database session.
+
+    Returns:
+        bool: True if a job was run, False if the queue had nothing due.
+    """
+    job = await claim_sync_job(db)
+    if job is None:
+        return False
+
+    try:
+        result = await process_sync_job(job, db)
+    except asyncio.CancelledError:
+        # Worker shutdown: hand the job straight back to the queue
+        await db.rollback()
+        await db.refresh(job)
+        await _record_failure(db, job, "interrupted by worker shutdown", timedelta(0))
+        raise
+    except Exception as e:
+        # Rolling back expires the job, reload it before recording the failure
+        await db.rollback()
+        await db.refresh(job)
+        error = e.detail if isinstance(e, HTTPException) else str(e)
+        retry_in = retry_delay(job.attempts)
+        if retry_in is not None and isinstance(e, StravaRateLimited):
+            # No point retrying before the Strava budget frees up
+            retry_in = max(retry_in, timedelta(seconds=e.retry_after))
+        print(f"❌ Sync job {job.id} ({job.aspect_type} {job.activity_id}) failed: {error}")
+        await _record_failure(db, job, error, retry_in)
+        return True
+
+    await complete_sync_job(db, job, result)
+    return True
+
+
+async def worker_loop(worker_id: int, poll_interval: float, lock_timeout: int):
+    """
+    Drain due jobs, then sleep until woken by an enqueue or until the next poll.
+
+    On start and then every lock_timeout seconds the worker also requeues jobs left running,
+    e.g. by a crashed process or a worker whose complete/fail update was lost, so their
+    athlete is not blocked.
+    """
+    next_requeue = time.monotonic()
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                if time.monotonic() >= next_requeue:
+                    next_requeue = time.monotonic() + lock_timeout
+                    await requeue_stale_jobs(db, datetime.now(timezone.utc) - timedelta(seconds=lock_timeout))
+                while await run_next_job(db):
+                    pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Keep the worker alive through transient DB errors
+            print(f"❌ Sync worker {worker_id} error: {e}")
+
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+def notify_workers():
+    """Wake idle in-process workers after a job was enqueued."""
+    _wakeup.set()
+
+
+async def start_sync_workers(count: int | None = None):
+    """
+    Start the in-process worker pool. Called once from the FastAPI lifespan.
+
+    Args:
+        count (int | None): Number of workers (defaults to SYNC_WORKERS, 2). 0 disables them,
+                            e.g. when workers run as a separate process.
+
+    Returns:
+        None
+    """
+    count = _int_setting("SYNC_WORKERS", 2) if count is None else count
+    if count <= 0 or _workers:
+        return
+
+    # Running jobs claimed longer ago than this are treated as abandoned
+    lock_timeout = _int_setting("SYNC_JOB_LOCK_TIMEOUT_SECONDS", 600)
+    poll_interval = float(os.getenv("SYNC_WORKER_POLL_SECONDS", "5"))
+    for worker_id in range(count):
+        _workers.append(asyncio.create_task(worker_loop(worker_id, poll_interval, lock_timeout)))
+
+
+async def stop_sync_workers():
+    """
+    Cancel the in-process workers. A job interrupted mid-run goes back to the queue.
+
+    Returns:
+        None
+    """
+    while _workers:
+        task = _workers.pop()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+async def _main(count: int | None):
+    await start_sync_workers(count)
+    await asyncio.gather(*_workers)
+
+
+if __name__ == "__main__":
+    # python -m services.sync_worker [count]
+    asyncio.run(_main(int(sys.argv[1]) if len(sys.argv) > 1 else None))
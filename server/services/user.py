@@ -11,122 +11,308 @@ Created to prevent circular import when it came with google and jwt integration
 """
 from fastapi import HTTPException
 from models.user import User
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from database import AsyncSessionLocal
+from models.google_user import GoogleUser
+from models.strava_user import StravaUser
+from integrations.http_client import get_client
+from utils.single_flight import SingleFlight
+from utils.ttl_cache import TTLCache
+from utils.metrics import record_token_refresh
 import utils.jwt as jwt_utils, crud.user as user_crud
 from datetime import datetime, timezone, timedelta
 import os
+import time
 import httpx
 
-def get_current_user(db: Session, token: str):
+_AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "1024"))
+
+# Access token -> user id, kept until the token expires
+_verified_tokens = TTLCache(_AUTH_CACHE_SIZE)
+# User id -> column values of the User, GoogleUser and StravaUser rows (never live ORM objects)
+_cached_users = TTLCache(_AUTH_CACHE_SIZE)
+# Bumped on every invalidation, so a load that raced with one is not cached
+_user_cache_generation = 0
+
+async def get_current_user(db: AsyncSession, token: str):
     """
     Retrieve the currently authenticated user and refresh their OAuth tokens.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         token (str): The JWT access token for authentication.
 
     Returns:
         User: The authenticated user object.
+
+    Notes:
+        - Verified tokens are cached until they expire, and users for up to
+          AUTH_USER_CACHE_TTL_SECONDS (never past their first OAuth token expiry),
+          so polled endpoints usually run no JWT decode, query or refresh check.
+        - A cached user is attached to `db` without a query, changes to it are
+          written by that session as usual.
     """
     try:
-        user_id = jwt_utils.verify_jwt(token, "access")
-        user = user_crud.get_user_by_id(db, user_id)
-        
-        refresh_google_token(user, db)
+        return await _load_user(db, _verify_access_token(token), refresh_tokens=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch user: {str(e)}")
 
-        strava_data = user.strava_data
-        if strava_data and strava_data.is_connected:
-            refresh_strava_token(user, db)
 
-        return user
+async def get_authenticated_user(db: AsyncSession, token: str):
+    """
+    Retrieve the currently authenticated user without touching their OAuth tokens.
+
+    Args:
+        db (AsyncSession): The database session.
+        token (str): The JWT access token for authentication.
+
+    Returns:
+        User: The authenticated user object.
+
+    Notes:
+        - For read-only endpoints (status, profile): verifies the JWT and reads the
+          user, with no calls to Google or Strava and no writes.
+        - The stored OAuth tokens may be expired; use get_current_user before
+          calling upstream APIs.
+    """
+    try:
+        return await _load_user(db, _verify_access_token(token), refresh_tokens=False)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch user: {str(e)}")
-    
 
-def refresh_google_token(user: User, db: Session):
+
+async def _load_user(db: AsyncSession, user_id: str, refresh_tokens: bool) -> User:
+    cached = _cached_users.get(user_id)
+    if cached is not None:
+        return await db.merge(_restore_user(cached), load=False)
+
+    generation = _user_cache_generation
+    user = await user_crud.get_user_by_id(db, user_id)
+
+    if refresh_tokens:
+        await ensure_google_token(user)
+
+        strava_data = user.strava_data
+        if strava_data and strava_data.is_connected:
+            await ensure_strava_token(user)
+
+    # Only users whose tokens are still valid are cached, whichever path loaded them
+    if generation == _user_cache_generation:
+        _cached_users.set(user_id, _snapshot_user(user), _user_cache_ttl(user))
+    return user
+
+
+def invalidate_user_cache(user_id):
+    """
+    Drop a user from the auth cache after their tokens or accounts change.
+
+    Args:
+        user_id (UUID | str): The user's ID.
+
+    Returns:
+        None
+
+    Notes:
+        - Only clears this process; other workers pick up the change once
+          their entry expires (AUTH_USER_CACHE_TTL_SECONDS).
     """
-    Refresh the Google OAuth access token.
+    global _user_cache_generation
+    _user_cache_generation += 1
+    _cached_users.pop(str(user_id))
+
+
+def _verify_access_token(token: str) -> str:
+    user_id = _verified_tokens.get(token)
+    if user_id is None:
+        payload = jwt_utils.decode_jwt(token, "access")
+        user_id = str(payload["sub"])
+        _verified_tokens.set(token, user_id, payload["exp"] - time.time())
+    return user_id
+
+
+def _user_cache_ttl(user: User) -> float:
+    """Seconds a loaded user may be served from the cache (0 = don't cache)."""
+    ttl = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "30"))
+    expiries = [user.google_data.access_token_expiry if user.google_data else None]
+    if user.strava_data and user.strava_data.is_connected:
+        expiries.append(user.strava_data.expires_at)
+    if None in expiries:
+        return 0
+    # A cached user never carries an expired token, so hits never need a refresh
+    now = datetime.now(timezone.utc)
+    return min([ttl] + [(expiry - now).total_seconds() for expiry in expiries])
+
+
+def _columns(record) -> dict:
+    return {attr.key: getattr(record, attr.key) for attr in inspect(record).mapper.column_attrs}
+
+
+def _snapshot_user(user: User) -> tuple:
+    return (
+        _columns(user),
+        _columns(user.google_data),
+        _columns(user.strava_data) if user.strava_data else None,
+    )
+
+
+def _restore_user(snapshot: tuple) -> User:
+    """Rebuild a detached, unmodified User graph that merge(load=False) can attach without a query."""
+    user_values, google_values, strava_values = snapshot
+    user = User(**user_values)
+    make_transient_to_detached(user)
+    for key, model, values in (("google_data", GoogleUser, google_values), ("strava_data", StravaUser, strava_values)):
+        record = None
+        if values is not None:
+            record = model(**values)
+            make_transient_to_detached(record)
+            set_committed_value(record, "user", user)
+        set_committed_value(user, key, record)
+    return user
     
+
+GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
+STRAVA_TOKEN_URL = "https://www.strava.com/oauth/token"
+
+# Concurrent refreshes for the same account share one in-flight token request
+_token_refreshes = SingleFlight()
+
+
+def _refresh_request(provider: str, refresh_token: str) -> dict:
+    """Form data for an OAuth refresh_token grant."""
+    return {
+        "client_id": os.getenv(f"{provider}_CLIENT_ID"),
+        "client_secret": os.getenv(f"{provider}_CLIENT_SECRET"),
+        "refresh_token": refresh_token,
+        "grant_type": "refresh_token"
+    }
+
+
+def _parse_google_token(token: dict) -> dict:
+    return {
+        "access_token": token["access_token"],
+        "access_token_expiry": datetime.now(timezone.utc) + timedelta(seconds=token["expires_in"]),
+    }
+
+
+def _parse_strava_token(token: dict) -> dict:
+    return {
+        "access_token": token["access_token"],
+        "refresh_token": token["refresh_token"],
+        "expires_at": datetime.fromtimestamp(token["expires_at"], tz=timezone.utc),
+    }
+
+
+def _apply_tokens(record, tokens: dict):
+    """Update an already-loaded GoogleUser/StravaUser in memory without marking it dirty (the DB is already written)."""
+    for key, value in tokens.items():
+        set_committed_value(record, key, value)
+
+
+async def _persist_tokens(save, record_id, tokens: dict):
+    """Write refreshed tokens with a short-lived session of its own, independent of the caller's session."""
+    async with AsyncSessionLocal() as db:
+        await save(db, record_id, **tokens)
+
+
+async def _request_refresh(provider: str, url: str, refresh_token: str) -> dict:
+    """POST a refresh_token grant and count its outcome."""
+    try:
+        response = await get_client(provider.lower()).post(url, data=_refresh_request(provider, refresh_token))
+    except httpx.HTTPError:
+        record_token_refresh(provider.lower(), "error")
+        raise
+    record_token_refresh(provider.lower(), "ok" if response.status_code == 200 else str(response.status_code))
+    if response.status_code != 200:
+        raise HTTPException(status_code=response.status_code, detail=f"Failed to refresh {provider.title()} token")
+    return response.json()
+
+
+async def _refresh_google_tokens(google_user_id, refresh_token: str) -> dict:
+    tokens = _parse_google_token(await _request_refresh("GOOGLE", GOOGLE_TOKEN_URL, refresh_token))
+    await _persist_tokens(user_crud.save_google_tokens, google_user_id, tokens)
+    return tokens
+
+
+async def _refresh_strava_tokens(strava_user_id, refresh_token: str) -> dict:
+    tokens = _parse_strava_token(await _request_refresh("STRAVA", STRAVA_TOKEN_URL, refresh_token))
+    await _persist_tokens(user_crud.save_strava_tokens, strava_user_id, tokens)
+    return tokens
+
+
+async def ensure_google_token(user: User):
+    """
+    Return a valid Google access token, refreshing it without blocking the event loop.
+
     Args:
-        user (User): The user whose Google token should be refreshed.
-        db (Session): The database session.
+        user (User): The user whose Google token should be valid.
 
     Returns:
         str: The valid Google access token.
+
+    Notes:
+        - Concurrent calls for the same account share a single refresh request.
+        - The refreshed token is written to the DB once by the in-flight refresh,
+          then applied to this request's already-loaded GoogleUser.
     """
     google_data = user.google_data
 
     if not google_data:
         raise ValueError("User does not have Google OAuth data")
-    
-    now = datetime.now(timezone.utc)
+
     # Token still valid
-    if google_data.access_token_expiry and google_data.access_token_expiry > now:
+    if google_data.access_token_expiry and google_data.access_token_expiry > datetime.now(timezone.utc):
         return google_data.access_token
-    
-    data = {
-        "client_id": os.getenv("GOOGLE_CLIENT_ID"),
-        "client_secret": os.getenv("GOOGLE_CLIENT_SECRET"),
-        "refresh_token": google_data.refresh_token,
-        "grant_type": "refresh_token"
-    }
 
+    google_user_id, refresh_token = google_data.id, google_data.refresh_token
     try:
-        response = httpx.post("https://oauth2.googleapis.com/token", data=data)
-        if response.status_code != 200:
-            raise HTTPException(status_code=response.status_code, detail="Failed to refresh Google token")
-        token = response.json()
-
-        google_data.access_token = token["access_token"]
-        google_data.access_token_expiry = now + timedelta(seconds=token["expires_in"])
-
-        db.commit()
-        db.refresh(google_data)
+        tokens = await _token_refreshes.do(
+            ("google", google_user_id), lambda: _refresh_google_tokens(google_user_id, refresh_token)
+        )
     except httpx.HTTPError as e:
-        db.rollback()
         raise HTTPException(status_code=400, detail=f"HTTP error while refreshing google token: {str(e)}")
-    
-def refresh_strava_token(user: User, db: Session):
+
+    _apply_tokens(google_data, tokens)
+    invalidate_user_cache(user.id)
+    return google_data.access_token
+
+
+async def ensure_strava_token(user: User):
     """
-    Refresh the Strava OAuth access token
+    Return a valid Strava access token, refreshing it without blocking the event loop.
 
     Args:
-        user (User): The user whose Strava token should be refreshed.
-        db (Session): The database session.
+        user (User): The user whose Strava token should be valid.
 
     Returns:
         str | None: The valid Strava access token, or None if the user has no Strava data.
+
+    Notes:
+        - Concurrent calls for the same account share a single refresh request,
+          which matters for Strava because refreshing rotates the refresh token.
     """
     strava_data = user.strava_data
 
     if not strava_data:
         # User does not have Strava OAuth data
         return
-    
-    now = datetime.now(timezone.utc)
+
     # Token still valid
-    if strava_data.expires_at and strava_data.expires_at > now:
-        return
-    
-    data = {
-        "client_id": os.getenv("STRAVA_CLIENT_ID"),
-        "client_secret": os.getenv("STRAVA_CLIENT_SECRET"),
-        "refresh_token": strava_data.refresh_token,
-        "grant_type": "refresh_token"
-    }
+    if strava_data.expires_at and strava_data.expires_at > datetime.now(timezone.utc):
+        return strava_data.access_token
 
+    strava_user_id, refresh_token = strava_data.id, strava_data.refresh_token
     try:
-        response = httpx.post("https://www.strava.com/oauth/token", data=data)
-        if response.status_code != 200:
-            raise HTTPException(status_code=response.status_code, detail="Failed to refresh Strava token")
-        token = response.json()
-
-        strava_data.access_token = token["access_token"]
-        strava_data.refresh_token = token["refresh_token"]
-        strava_data.expires_at = datetime.fromtimestamp(token["expires_at"], tz=timezone.utc)
-
-        db.commit()
-        db.refresh(strava_data)
+        tokens = await _token_refreshes.do(
+            ("strava", strava_user_id), lambda: _refresh_strava_tokens(strava_user_id, refresh_token)
+        )
     except httpx.HTTPError as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"HTTP error while refreshing Strava token: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"HTTP error while refreshing Strava token: {str(e)}")
+
+    _apply_tokens(strava_data, tokens)
+    invalidate_user_cache(user.id)
+    return strava_data.access_token
@@ -1,9 +1,14 @@
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from fastapi.testclient import TestClient
+import pytest_asyncio
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from main import app # Import your FastAPI app
+from database import async_database_url
 from dependencies import get_db
+from integrations import http_client
+import services.user as user_service
+from tests.fakes.google_calendar import FakeGoogleCalendar
+from tests.fakes.strava import FakeStrava
 from dotenv import load_dotenv
 import os
 
@@ -14,32 +19,57 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL not set in .env file")
 
-engine = create_engine(DATABASE_URL)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = create_async_engine(async_database_url(DATABASE_URL))
+TestingSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
 
-@pytest.fixture(scope="function")
-def db_session():
+@pytest_asyncio.fixture(scope="function")
+async def db_session():
     """Create a new database session for each test."""
-    connection = engine.connect()  # Open a raw DB connection
-    # Begin a transaction (isolates all DB changes until committed or rolled back)
-    transaction = connection.begin()
-
-    db = TestingSessionLocal(bind=connection)
-    try:
-        yield db
-    finally:
-        db.close() # Close the session
-        transaction.rollback()  # Undo any DB changes made during the test
-        connection.close() # Close the raw connection
-
-@pytest.fixture(scope="function")
-def client(db_session):
+    async with engine.connect() as connection:  # Open a raw DB connection
+        # Begin a transaction (isolates all DB changes until committed or rolled back)
+        transaction = await connection.begin()
+
+        # Session commits/rollbacks only release savepoints, the outer transaction is always rolled back
+        db = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+        try:
+            yield db
+        finally:
+            await db.close() # Close the session
+            await transaction.rollback()  # Undo any DB changes made during the test
+
+@pytest.fixture(autouse=True)
+def clear_auth_cache():
+    """Cached users outlive the rolled-back rows of the test that loaded them"""
+    yield
+    user_service._verified_tokens.clear()
+    user_service._cached_users.clear()
+
+@pytest_asyncio.fixture(scope="function")
+async def client(db_session):
     """Inject the rollback-safe DB session into FastAPI"""
 
     # Override the get_db function to use our test session
-    def override_get_db():
+    async def override_get_db():
         yield db_session
     app.dependency_overrides[get_db] = override_get_db
 
-    # Creates a test client to simulate real HTTP requests without starting a server
-    return TestClient(app)
\ No newline at end of file
+    # Calls the app in-process (same event loop as the test session) without starting a server
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as test_client:
+        yield test_client
+    app.dependency_overrides.pop(get_db, None)
+
+@pytest_asyncio.fixture(scope="function")
+async def fake_google():
+    """Route the shared Google HTTP client to an in-process fake Calendar API"""
+    fake = FakeGoogleCalendar()
+    await http_client.start_clients({"google": fake.transport})
+    yield fake
+    await http_client.close_clients()
+
+@pytest_asyncio.fixture(scope="function")
+async def fake_strava():
+    """Route the shared Strava HTTP client to an in-process fake Strava API"""
+    fake = FakeStrava()
+    await http_client.start_clients({"strava": fake.transport})
+    yield fake
+    await http_client.close_clients()
@@ -0,0 +1,220 @@
+"""
+tests/fakes/google_calendar.py
+
+In-process fake of the Google Calendar API for tests.
+
+Serves calendar list/create, event list/insert/patch/delete, the multipart
+batch endpoint and the OAuth token endpoint through an httpx.MockTransport,
+so integration code runs unchanged against it. Failures can be injected per
+event operation. Event listing supports pageToken and syncToken (incremental
+sync, including cancelled events and 410 Gone for expired tokens).
+"""
+from collections import Counter
+from datetime import datetime, timezone
+from urllib.parse import unquote, urlparse, parse_qs
+import httpx
+import json
+import uuid
+
+API_PREFIX = "/calendar/v3"
+
+
+class FakeGoogleCalendar:
+    def __init__(self):
+        # calendar_id -> {event_id: event}
+        self.calendars: dict[str, dict[str, dict]] = {}
+        self.calendar_summaries: dict[str, str] = {}
+        # Count of handled requests keyed by "METHOD kind" (e.g. "POST insert", "POST batch")
+        self.calls: Counter = Counter()
+        # (status code, error reason) to return for the next N single operations, keyed by method ("insert", "patch", "delete")
+        self.failures: dict[str, list[tuple[int, str | None]]] = {}
+        # Bodies of single-event PATCH requests, in order
+        self.patches: list[dict] = []
+        # Change counter backing sync tokens: every write stamps the event (or its deletion) with a version
+        self.version = 0
+        self.versions: dict[str, dict[str, int]] = {}
+        self.deleted: dict[str, dict[str, int]] = {}
+        # Sync tokens older than this version answer 410 Gone
+        self.min_sync_version = 0
+        # calendar_id -> {"key=value": {event_id: None}} for privateExtendedProperty lookups,
+        # so large calendars (benchmarks) are not scanned per lookup. May keep removed ids, results are re-checked
+        self.private_index: dict[str, dict[str, dict[str, None]]] = {}
+
+    @property
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def add_calendar(self, summary: str = "Strava", calendar_id: str | None = None) -> str:
+        calendar_id = calendar_id or f"{uuid.uuid4().hex}@group.calendar.google.com"
+        self.calendars[calendar_id] = {}
+        self.calendar_summaries[calendar_id] = summary
+        return calendar_id
+
+    def fail_next(self, method: str, status_code: int, times: int = 1, reason: str | None = None):
+        self.failures.setdefault(method, []).extend([(status_code, reason)] * times)
+
+    def edit_event(self, calendar_id: str, event_id: str, **changes):
+        """Change an event as the user would in the Calendar UI."""
+        self.calendars[calendar_id][event_id].update(changes)
+        self._touch(calendar_id, event_id)
+
+    def remove_event(self, calendar_id: str, event_id: str):
+        """Delete an event as the user would in the Calendar UI."""
+        del self.calendars[calendar_id][event_id]
+        self._touch(calendar_id, event_id, deleted=True)
+
+    def expire_sync_tokens(self):
+        self.min_sync_version = self.version + 1
+
+    def _touch(self, calendar_id: str, event_id: str, deleted: bool = False):
+        self.version += 1
+        if deleted:
+            self.versions.get(calendar_id, {}).pop(event_id, None)
+            self.deleted.setdefault(calendar_id, {})[event_id] = self.version
+        else:
+            self.versions.setdefault(calendar_id, {})[event_id] = self.version
+            event = self.calendars[calendar_id][event_id]
+            event["updated"] = datetime.now(timezone.utc).isoformat()
+            index = self.private_index.setdefault(calendar_id, {})
+            for key, value in event.get("extendedProperties", {}).get("private", {}).items():
+                index.setdefault(f"{key}={value}", {})[event_id] = None
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.host == "oauth2.googleapis.com":
+            self.calls["POST token"] += 1
+            return httpx.Response(200, json={"access_token": f"google-access-{uuid.uuid4().hex}", "expires_in": 3599})
+        if request.url.path.startswith("/batch/"):
+            self.calls["POST batch"] += 1
+            return self._handle_batch(request)
+        status_code, body = self._dispatch(request.method, request.url.raw_path.decode(), request.content)
+        return httpx.Response(status_code, json=body) if body is not None else httpx.Response(status_code)
+
+    def _dispatch(self, method: str, raw_path: str, content: bytes) -> tuple[int, dict | None]:
+        parsed = urlparse(raw_path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        segments = [unquote(segment) for segment in parsed.path[len(API_PREFIX):].strip("/").split("/")]
+        body = json.loads(content) if content else None
+
+        if segments[:3] == ["users", "me", "calendarList"]:
+            self.calls[f"{method} calendarList"] += 1
+            if method == "GET":
+                items = [{"id": cid, "summary": summary} for cid, summary in self.calendar_summaries.items()]
+                return 200, {"items": items}
+            return 200, {"id": segments[3], **(body or {})}
+
+        if segments[0] != "calendars":
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+
+        if len(segments) == 1:
+            self.calls["POST calendar"] += 1
+            calendar_id = self.add_calendar(body.get("summary", ""))
+            return 200, {"id": calendar_id, "summary": body.get("summary")}
+
+        calendar_id = segments[1]
+        events = self.calendars.get(calendar_id)
+        if events is None:
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+
+        if len(segments) == 2:
+            self.calls["GET calendar"] += 1
+            return 200, {"id": calendar_id, "summary": self.calendar_summaries[calendar_id]}
+
+        if len(segments) == 3 and method == "GET":
+            self.calls["GET list"] += 1
+            return self._list_events(calendar_id, events, query)
+
+        kind = {"POST": "insert", "PATCH": "patch", "DELETE": "delete", "GET": "get"}[method]
+        self.calls[f"{method} {kind}"] += 1
+        queued = self.failures.get(kind)
+        if queued:
+            status_code, reason = queued.pop(0)
+            error = {"code": status_code, "message": "Injected failure"}
+            if reason:
+                error["errors"] = [{"domain": "usageLimits", "reason": reason, "message": "Injected failure"}]
+            return status_code, {"error": error}
+
+        if method == "POST":
+            event = {**body, "id": body.get("id") or uuid.uuid4().hex, "status": "confirmed"}
+            events[event["id"]] = event
+            self._touch(calendar_id, event["id"])
+            return 200, event
+
+        event_id = segments[3]
+        if event_id not in events:
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+        if method == "PATCH":
+            self.patches.append(body)
+            events[event_id].update(body)
+            self._touch(calendar_id, event_id)
+            return 200, events[event_id]
+        if method == "DELETE":
+            del events[event_id]
+            self._touch(calendar_id, event_id, deleted=True)
+            return 204, None
+        return 200, events[event_id]
+
+    def _list_events(self, calendar_id: str, events: dict[str, dict], query: dict) -> tuple[int, dict]:
+        sync_token = query.get("syncToken")
+        private_filter = query.get("privateExtendedProperty")
+        if private_filter and not sync_token:
+            candidates = self.private_index.get(calendar_id, {}).get(private_filter, {})
+            items = [events[event_id] for event_id in candidates if event_id in events]
+        else:
+            items = list(events.values())
+        if sync_token:
+            since = int(sync_token.removeprefix("v"))
+            if since < self.min_sync_version:
+                return 410, {"error": {"code": 410, "message": "Sync token is no longer valid, a full sync is required."}}
+            versions = self.versions.get(calendar_id, {})
+            items = [event for event in items if versions.get(event["id"], 0) > since]
+            items += [
+                {"id": event_id, "status": "cancelled"}
+                for event_id, version in self.deleted.get(calendar_id, {}).items() if version > since
+            ]
+        if private_filter:
+            key, _, value = private_filter.partition("=")
+            items = [
+                event for event in items
+                if str(event.get("extendedProperties", {}).get("private", {}).get(key)) == value
+            ]
+        max_results = int(query.get("maxResults", 250))
+        offset = int(query.get("pageToken", 0))
+        body = {"items": items[offset:offset + max_results]}
+        if offset + max_results < len(items):
+            body["nextPageToken"] = str(offset + max_results)
+        else:
+            body["nextSyncToken"] = f"v{self.version}"
+        return 200, body
+
+    def _handle_batch(self, request: httpx.Request) -> httpx.Response:
+        request_boundary = request.headers["Content-Type"].split("boundary=", 1)[1]
+        text = request.content.decode().replace("\r\n", "\n")
+        response_boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+        for part in text.split(f"--{request_boundary}"):
+            part = part.strip("\n")
+            if not part or part == "--":
+                continue
+            part_head, _, http_message = part.partition("\n\n")
+            content_id = next(
+                line.split(":", 1)[1].strip().strip("<>")
+                for line in part_head.split("\n") if line.lower().startswith("content-id")
+            )
+            http_head, _, body = http_message.partition("\n\n")
+            method, path, _ = http_head.split("\n", 1)[0].split(" ")
+            status_code, response_body = self._dispatch(method, path, body.strip().encode())
+            payload = json.dumps(response_body) if response_body is not None else ""
+            parts.append(
+                f"--{response_boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status_code} {'OK' if status_code < 300 else 'Error'}\r\n"
+                "Content-Type: application/json; charset=UTF-8\r\n\r\n"
+                f"{payload}\r\n"
+            )
+        parts.append(f"--{response_boundary}--\r\n")
+        return httpx.Response(
+            200,
+            headers={"Content-Type": f"multipart/mixed; boundary={response_boundary}"},
+            content="".join(parts).encode()
+        )
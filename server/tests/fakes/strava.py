@@ -0,0 +1,136 @@
+"""
+tests/fakes/strava.py
+
+In-process fake of the Strava API for tests.
+
+Serves /athlete/activities (with per_page/page/after/before), /activities/{id}
+(with ETag / If-None-Match) and the OAuth token endpoint through an httpx.MockTransport, so integration
+code runs unchanged against it.
+"""
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+import hashlib
+import httpx
+import json
+import re
+
+API_PREFIX = "/api/v3"
+
+
+def make_activity(activity_id: int, start: datetime, sport_type: str = "Run", **overrides) -> dict:
+    """Build a Strava activity summary with the fields the sync uses."""
+    activity = {
+        "id": activity_id,
+        "name": f"{sport_type} {activity_id}",
+        "sport_type": sport_type,
+        "type": sport_type,
+        "distance": 5964.4,
+        "moving_time": 2427,
+        "elapsed_time": 2436,
+        "start_date": start.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "timezone": "(GMT-06:00) America/Chicago",
+        "average_heartrate": 150.2,
+        "max_heartrate": 171.0,
+    }
+    activity.update(overrides)
+    return activity
+
+
+class FakeStrava:
+    def __init__(self):
+        self.activities: dict[int, dict] = {}
+        # Count of handled requests keyed by endpoint ("list", "detail", "token"),
+        # plus "not_modified" for detail requests answered 304
+        self.calls: Counter = Counter()
+        # Status codes to return for the next N requests, keyed by endpoint
+        self.failures: dict[str, list[int]] = {}
+        # Application limits reported in the X-RateLimit-* headers: (15-minute, daily)
+        self.rate_limit = (200, 2000)
+        self.read_rate_limit = (100, 1000)
+        # Access token -> athlete id; requests with a known token only list that athlete's
+        # activities (matched on activity["athlete"]["id"]). Unknown tokens list everything
+        self.athletes: dict[str, str] = {}
+        # start_date string -> UNIX timestamp, so paging through large histories (benchmarks) stays cheap
+        self._timestamps: dict[str, float] = {}
+
+    @property
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def add_activities(self, count: int, start: datetime | None = None, spacing: timedelta = timedelta(hours=6)) -> list[dict]:
+        start = start or datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+        first_id = max(self.activities, default=1000) + 1
+        added = [make_activity(first_id + i, start + spacing * i) for i in range(count)]
+        self.activities.update({activity["id"]: activity for activity in added})
+        return added
+
+    def fail_next(self, endpoint: str, status_code: int, times: int = 1):
+        self.failures.setdefault(endpoint, []).extend([status_code] * times)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path == "/oauth/token":
+            return self._respond("token", lambda: {
+                "access_token": "strava-access",
+                "refresh_token": "strava-refresh",
+                "expires_at": int((datetime.now(timezone.utc) + timedelta(hours=6)).timestamp()),
+            })
+        if path == f"{API_PREFIX}/athlete/activities":
+            return self._respond("list", lambda: self._list(request.url.params, self._athlete(request)))
+        match = re.fullmatch(rf"{API_PREFIX}/activities/(\d+)", path)
+        if match:
+            activity = self.activities.get(int(match.group(1)))
+            if activity is None:
+                return httpx.Response(404, json={"message": "Record Not Found"})
+            return self._respond("detail", lambda: activity, request.headers.get("If-None-Match"))
+        return httpx.Response(404, json={"message": "Not Found"})
+
+    def rate_limit_headers(self) -> dict[str, str]:
+        """Strava-style limit/usage headers; usage counts the API calls made so far."""
+        usage = self.calls["list"] + self.calls["detail"]
+        return {
+            "X-RateLimit-Limit": "{},{}".format(*self.rate_limit),
+            "X-RateLimit-Usage": f"{usage},{usage}",
+            "X-ReadRateLimit-Limit": "{},{}".format(*self.read_rate_limit),
+            "X-ReadRateLimit-Usage": f"{usage},{usage}",
+        }
+
+    def _respond(self, endpoint: str, build, if_none_match: str | None = None) -> httpx.Response:
+        self.calls[endpoint] += 1
+        headers = self.rate_limit_headers() if endpoint != "token" else {}
+        queued = self.failures.get(endpoint)
+        if queued:
+            status_code = queued.pop(0)
+            return httpx.Response(status_code, json={"message": "Injected failure"}, headers=headers)
+        body = build()
+        if endpoint == "detail":
+            headers["ETag"] = '"{}"'.format(hashlib.md5(json.dumps(body, sort_keys=True).encode()).hexdigest())
+            if if_none_match == headers["ETag"]:
+                self.calls["not_modified"] += 1
+                return httpx.Response(304, headers=headers)
+        return httpx.Response(200, json=body, headers=headers)
+
+    def _athlete(self, request: httpx.Request) -> str | None:
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        return self.athletes.get(token)
+
+    def _list(self, params, athlete_id: str | None = None) -> list[dict]:
+        per_page = int(params.get("per_page", 30))
+        page = int(params.get("page", 1))
+        after = int(params["after"]) if "after" in params else None
+        before = int(params["before"]) if "before" in params else None
+
+        def start_ts(activity):
+            start_date = activity["start_date"]
+            if start_date not in self._timestamps:
+                self._timestamps[start_date] = datetime.fromisoformat(start_date.replace("Z", "+00:00")).timestamp()
+            return self._timestamps[start_date]
+
+        items = [
+            activity for activity in self.activities.values()
+            if (after is None or start_ts(activity) > after) and (before is None or start_ts(activity) < before)
+            and (athlete_id is None or str(activity.get("athlete", {}).get("id")) == athlete_id)
+        ]
+        # Like Strava: oldest first when paging forward from `after`, newest first otherwise
+        items.sort(key=start_ts, reverse=after is None)
+        return items[(page - 1) * per_page:page * per_page]
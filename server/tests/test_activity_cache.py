@@ -0,0 +1,80 @@
+import pytest
+from datetime import datetime, timezone
+from models.user import User
+from models.google_user import GoogleUser
+from models.strava_user import StravaUser
+import crud.strava_activity_cache as activity_cache_crud
+from services.strava import (
+    sync_strava_data, update_strava_activity, delete_strava_activity, rerender_cached_activities
+)
+
+
+async def make_strava_user(db, calendar_id: str) -> StravaUser:
+    user = User(name="Test", calendar_id=calendar_id, google_data=GoogleUser(access_token="google-token"))
+    strava_user = StravaUser(user=user, athlete_id="1", access_token="strava-token", last_synced_at=None)
+    db.add(strava_user)
+    await db.flush()
+    return strava_user
+
+
+@pytest.mark.asyncio
+async def test_update_revalidates_cached_activity_with_etag(fake_google, fake_strava, db_session):
+    strava_user = await make_strava_user(db_session, fake_google.add_calendar())
+    [activity] = fake_strava.add_activities(1)
+
+    await update_strava_activity(strava_user, activity["id"], db_session)
+    cached = (await activity_cache_crud.get_cached_activities(db_session, [activity["id"]]))[activity["id"]]
+    assert cached.etag and cached.payload == activity
+    writes = sum(fake_google.calls.values())
+
+    # Strava retries the same update: answered 304, nothing downloaded or written
+    await update_strava_activity(strava_user, activity["id"], db_session)
+    assert fake_strava.calls["not_modified"] == 1
+    assert sum(fake_google.calls.values()) == writes
+
+    activity["name"] = "Renamed Run"
+    await update_strava_activity(strava_user, activity["id"], db_session)
+    assert fake_strava.calls["not_modified"] == 1
+    [event] = fake_google.calendars[strava_user.user.calendar_id].values()
+    assert "Renamed Run" in event["summary"]
+
+
+@pytest.mark.asyncio
+async def test_summaries_merge_into_detailed_payloads(db_session):
+    strava_user = await make_strava_user(db_session, "calendar")
+    user_id = strava_user.user_id
+    detailed = {"id": 1, "name": "Run", "description": "Legs", "resource_state": 3}
+    await activity_cache_crud.cache_activities(db_session, user_id, [detailed], {1: '"v1"'})
+
+    await activity_cache_crud.cache_activities(db_session, user_id, [{"id": 1, "name": "Tempo", "resource_state": 2}])
+
+    db_session.expire_all()
+    cached = (await activity_cache_crud.get_cached_activities(db_session, [1]))[1]
+    assert (cached.payload["name"], cached.payload["description"]) == ("Tempo", "Legs")
+    # The column keeps the most detailed state stored, and the ETag of the detailed fetch
+    assert (cached.resource_state, cached.etag) == (3, '"v1"')
+
+
+@pytest.mark.asyncio
+async def test_rerender_runs_from_the_cache_without_strava_calls(fake_google, fake_strava, db_session):
+    strava_user = await make_strava_user(db_session, fake_google.add_calendar())
+    activities = fake_strava.add_activities(3)
+    await sync_strava_data(strava_user, db_session)
+    synced_at = strava_user.last_synced_at
+    fake_strava.calls.clear()
+    fake_google.calls.clear()
+
+    # Stands in for a renderer change: one cached payload now renders differently
+    await activity_cache_crud.cache_activities(db_session, strava_user.user_id, [{**activities[0], "name": "Long Run"}])
+    result = await rerender_cached_activities(strava_user, db_session, batch_size=2)
+
+    assert sum(fake_strava.calls.values()) == 0
+    assert sorted(result.saved) == [activity["id"] for activity in activities]
+    assert len(result.unchanged) == 2 and not result.failed
+    assert (fake_google.calls["POST batch"], fake_google.calls["PATCH patch"]) == (1, 1)
+    assert strava_user.last_synced_at == synced_at
+
+    await delete_strava_activity(strava_user, activities[0]["id"], db_session)
+    assert await activity_cache_crud.get_cached_activities(db_session, [activities[0]["id"]]) == {}
+    result = await rerender_cached_activities(strava_user, db_session)
+    assert sorted(result.unchanged) == [activity["id"] for activity in activities[1:]]
@@ -0,0 +1,43 @@
+import pytest
+from services.activity_renderers import ActivityRenderer, render_activity_event, render_activity_events
+from tests.fakes.strava import make_activity
+from datetime import datetime, timezone
+
+START = datetime(2026, 4, 14, 20, 5, 6, tzinfo=timezone.utc)
+
+
+def test_run_renders_full_description():
+    event, body = render_activity_event(make_activity(1, START, name="Afternoon Run"))
+
+    assert event.summary == "(3.71 mi) Afternoon Run"
+    assert event.description.startswith("What I did: \nAfternoon Run\nTime: 40:36\nDistance (mi): 3.71\n")
+    assert "Pace (min/mi): 10:57\nAvg HR: 150\nMaximum HR: 171\n" in event.description
+    assert event.description.endswith("View on Strava: https://www.strava.com/activities/1")
+    assert body["extendedProperties"] == {"private": {"strava_activity_id": 1}}
+    assert body["end"]["dateTime"] == "2026-04-14T20:45:42+00:00"
+
+
+@pytest.mark.parametrize("sport_type, summary, description_start", [
+    ("WeightTraining", "Lift", "View on Strava: "),
+    ("Ride", "(3.71 mi) Lift", "What I did: \nLift\nTime: 40:36\nDistance (mi): 3.71\nAvg speed (mph): 5.5\n"),
+    ("Kayaking", "(3.71 mi) Lift", "View on Strava: "),
+])
+def test_each_sport_uses_its_renderer(sport_type, summary, description_start):
+    event, _ = render_activity_event(make_activity(1, START, sport_type=sport_type, name="Lift"))
+
+    assert event.summary == summary
+    assert event.description.startswith(description_start)
+
+
+def test_templates_are_checked_when_compiled():
+    with pytest.raises(ValueError, match="kudos"):
+        ActivityRenderer("{name} ({kudos})", "")
+
+
+def test_bulk_render_is_keyed_by_activity():
+    activities = [make_activity(i, START) for i in range(1, 4)]
+
+    rendered = render_activity_events(activities)
+
+    assert list(rendered) == [1, 2, 3]
+    assert rendered[2][1]["extendedProperties"]["private"]["strava_activity_id"] == 2
@@ -0,0 +1,104 @@
+import pytest
+from sqlalchemy import event
+from datetime import datetime, timedelta, timezone
+from models.user import User
+from models.google_user import GoogleUser
+from models.strava_user import StravaUser
+import services.user as user_service
+import utils.jwt as jwt_utils
+
+
+async def make_user(db_session, expires_in: timedelta = timedelta(hours=1)) -> User:
+    expiry = datetime.now(timezone.utc) + expires_in
+    user = User(
+        name="Cached",
+        google_data=GoogleUser(
+            email="cached@example.com", sub="cached-sub", access_token="google-token",
+            refresh_token="refresh", access_token_expiry=expiry
+        ),
+        strava_data=StravaUser(
+            athlete_id="42", athlete_name="Cached Athlete", access_token="strava-token",
+            refresh_token="refresh", expires_at=expiry
+        ),
+    )
+    db_session.add(user)
+    await db_session.commit()
+    return user
+
+
+def count_queries(db_session) -> list:
+    queries = []
+    event.listen(db_session.bind.sync_engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+    return queries
+
+
+@pytest.mark.asyncio
+async def test_repeated_requests_skip_decode_and_query(db_session, monkeypatch):
+    user = await make_user(db_session)
+    token = jwt_utils.create_access_token(user.id)
+    decodes = []
+    decode = jwt_utils.decode_jwt
+    monkeypatch.setattr(jwt_utils, "decode_jwt", lambda *args: decodes.append(args) or decode(*args))
+
+    await user_service.get_current_user(db_session, token)
+    queries = count_queries(db_session)
+    cached = await user_service.get_current_user(db_session, token)
+
+    assert len(decodes) == 1 and queries == []
+    assert cached.id == user.id and cached.strava_data.access_token == "strava-token"
+
+
+@pytest.mark.asyncio
+async def test_invalidation_reloads_the_user(db_session):
+    user = await make_user(db_session)
+    token = jwt_utils.create_access_token(user.id)
+    await user_service.get_current_user(db_session, token)
+
+    user.strava_data.is_connected = False
+    await db_session.commit()
+    user_service.invalidate_user_cache(user.id)
+    db_session.expunge_all()
+
+    reloaded = await user_service.get_current_user(db_session, token)
+    assert reloaded.strava_data.is_connected is False
+
+
+@pytest.mark.asyncio
+async def test_users_are_not_cached_past_their_token_expiry(db_session):
+    user = await make_user(db_session, expires_in=timedelta(seconds=10))
+
+    assert 0 < user_service._user_cache_ttl(user) <= 10
+    user.google_data.access_token_expiry = None
+    assert user_service._user_cache_ttl(user) == 0
+
+
+@pytest.mark.asyncio
+async def test_cached_user_is_served_by_users_me(client, db_session):
+    user = await make_user(db_session)
+    token = jwt_utils.create_access_token(user.id)
+
+    first = await client.get("/users/me", headers={"token": token})
+    second = await client.get("/users/me", headers={"token": token})
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+
+
+@pytest.mark.asyncio
+async def test_status_endpoints_never_refresh_tokens(client, db_session, fake_google, fake_strava):
+    user = await make_user(db_session, expires_in=timedelta(minutes=-5))
+    token = jwt_utils.create_access_token(user.id)
+
+    status = await client.get("/strava/status", headers={"Authorization": f"Bearer {token}"})
+    me = await client.get("/users/me", headers={"token": token})
+
+    assert status.json() == {"connected": True}
+    assert me.json()["google_data"]["access_token"] == "google-token"
+    assert fake_google.calls["POST token"] == 0 and fake_strava.calls["token"] == 0
+
+
+@pytest.mark.asyncio
+async def test_read_only_auth_rejects_bad_tokens(client):
+    response = await client.get("/strava/status", headers={"Authorization": "Bearer not-a-jwt"})
+
+    assert response.status_code == 401
@@ -0,0 +1,22 @@
+import pytest
+from benchmarks.bench_sync import bench_size, load_example_activity, parse_args
+
+
+def test_example_activity_with_trailing_commas_is_parsed(tmp_path):
+    path = tmp_path / "activity.txt"
+    path.write_text('[\n  {"id": 1, "name": "Run", "map": {"id": "a1",},},\n]')
+
+    assert load_example_activity(path) == {"id": 1, "name": "Run", "map": {"id": "a1"}}
+    assert load_example_activity()["sport_type"] == "Run"
+
+
+@pytest.mark.asyncio
+async def test_benchmark_runs_every_scenario():
+    results = await bench_size(parse_args(["--sizes", "3", "--no-memory"]), 3)
+
+    assert [result["scenario"] for result in results] == [
+        "sync_strava_data", "save_activities", "update_strava_activity", "delete_strava_activity"
+    ]
+    assert not any(result["error"] for result in results)
+    assert results[0]["google_calls"]["POST insert"] == 3
+    assert results[3]["google_calls"]["DELETE delete"] == 3
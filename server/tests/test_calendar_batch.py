@@ -0,0 +1,106 @@
+import pytest
+import httpx
+from schemas.calendar import CalendarBatchOperation
+from integrations import http_client
+from integrations.google_calendar_batch import execute_calendar_batch, MAX_BATCH_SIZE
+
+
+@pytest.mark.asyncio
+async def test_batch_splits_into_chunks_and_maps_results(fake_google):
+    calendar_id = fake_google.add_calendar()
+    operations = [
+        CalendarBatchOperation(method="insert", activity_id=i, body={"summary": f"Run {i}"})
+        for i in range(MAX_BATCH_SIZE * 2 + 5)
+    ]
+
+    results = await execute_calendar_batch("token", calendar_id, operations)
+
+    assert fake_google.calls["POST batch"] == 3
+    assert len(fake_google.calendars[calendar_id]) == len(operations)
+    assert all(result.ok for result in results.values())
+    assert results[7].event["summary"] == "Run 7"
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_part_is_retried_individually(fake_google):
+    calendar_id = fake_google.add_calendar()
+    created = await execute_calendar_batch("token", calendar_id, [
+        CalendarBatchOperation(method="insert", activity_id=1, body={"summary": "Old"}),
+        CalendarBatchOperation(method="insert", activity_id=2, body={"summary": "Old"}),
+    ])
+    fake_google.fail_next("patch", 503)
+
+    results = await execute_calendar_batch("token", calendar_id, [
+        CalendarBatchOperation(method="patch", activity_id=1, event_id=created[1].event["id"], body={"summary": "New"}),
+        CalendarBatchOperation(method="delete", activity_id=2, event_id=created[2].event["id"]),
+    ])
+
+    assert results[1].ok and results[2].ok
+    assert fake_google.calls["PATCH patch"] == 2
+    assert [event["summary"] for event in fake_google.calendars[calendar_id].values()] == ["New"]
+
+
+@pytest.mark.asyncio
+async def test_persistent_failure_is_reported_per_activity(fake_google):
+    calendar_id = fake_google.add_calendar()
+    fake_google.fail_next("insert", 400, times=2)
+
+    results = await execute_calendar_batch("token", calendar_id, [
+        CalendarBatchOperation(method="insert", activity_id=1, body={"summary": "Bad"}),
+    ])
+
+    assert not results[1].ok and results[1].error
+    assert fake_google.calls["POST insert"] == 2
+    assert fake_google.calendars[calendar_id] == {}
+
+
+def strava_event(activity_id: int, summary: str) -> dict:
+    return {"summary": summary, "extendedProperties": {"private": {"strava_activity_id": str(activity_id)}}}
+
+
+@pytest.mark.asyncio
+async def test_batch_timing_out_after_it_was_applied_does_not_duplicate_inserts(fake_google):
+    calendar_id = fake_google.add_calendar()
+    created = await execute_calendar_batch("token", calendar_id, [
+        CalendarBatchOperation(method="insert", activity_id=1, body=strava_event(1, "Old")),
+    ])
+
+    def apply_then_time_out(request: httpx.Request) -> httpx.Response:
+        response = fake_google.handle(request)
+        if request.url.path.startswith("/batch/"):
+            raise httpx.ReadTimeout("Timed out after Google applied the batch", request=request)
+        return response
+    await http_client.start_clients({"google": httpx.MockTransport(apply_then_time_out)})
+
+    results = await execute_calendar_batch("token", calendar_id, [
+        CalendarBatchOperation(method="insert", activity_id=2, body=strava_event(2, "New")),
+        CalendarBatchOperation(method="insert", activity_id=3, body=strava_event(3, "New")),
+        CalendarBatchOperation(method="patch", activity_id=1, event_id=created[1].event["id"], body={"summary": "Edited"}),
+    ])
+
+    assert all(result.ok for result in results.values())
+    # Both inserts were applied by the timed-out batch and found again, not inserted twice
+    assert fake_google.calls["POST insert"] == 3
+    assert len(fake_google.calendars[calendar_id]) == 3
+    assert results[2].event["id"] in fake_google.calendars[calendar_id]
+    # The patch is idempotent and simply sent again
+    assert fake_google.calendars[calendar_id][created[1].event["id"]]["summary"] == "Edited"
+
+
+@pytest.mark.asyncio
+async def test_insert_of_failed_batch_is_sent_again_when_it_was_not_applied(fake_google):
+    calendar_id = fake_google.add_calendar()
+
+    def fail_batches(request: httpx.Request) -> httpx.Response:
+        if request.url.path.startswith("/batch/"):
+            return httpx.Response(500, json={"error": {"code": 500, "message": "Backend Error"}})
+        return fake_google.handle(request)
+    await http_client.start_clients({"google": httpx.MockTransport(fail_batches)})
+
+    results = await execute_calendar_batch("token", calendar_id, [
+        CalendarBatchOperation(method="insert", activity_id=1, body=strava_event(1, "Run")),
+    ])
+
+    assert results[1].ok
+    assert fake_google.calls["GET list"] == 1 and fake_google.calls["POST insert"] == 1
+    assert len(fake_google.calendars[calendar_id]) == 1
@@ -0,0 +1,38 @@
+import pytest
+from contextlib import asynccontextmanager
+from services.catchup_scheduler import plan_cycle, run_cycle, shard_of
+from tests.test_sync_jobs import make_connected_user
+
+
+def test_shards_split_athletes_evenly_and_stably():
+    athlete_ids = [str(i) for i in range(4000)]
+    counts = [sum(shard_of(athlete_id, 4) == shard for athlete_id in athlete_ids) for shard in range(4)]
+
+    assert sum(counts) == 4000 and min(counts) > 900
+    assert [shard_of("42", 4) for _ in range(3)] == [shard_of("42", 4)] * 3
+
+
+def test_runs_are_spread_over_the_interval():
+    athlete_ids = [str(i) for i in range(1000)]
+    plan = plan_cycle(athlete_ids, 0, 1, 3600)
+
+    offsets = [offset for offset, _ in plan]
+    assert offsets == sorted(offsets) and len(plan) == 1000
+    # Roughly a quarter of the athletes in each quarter of the hour
+    assert 200 < sum(offset < 900 for offset in offsets) < 300
+
+
+@pytest.mark.asyncio
+async def test_cycle_syncs_connected_athletes(fake_google, fake_strava, db_session):
+    calendar_id = fake_google.add_calendar()
+    await make_connected_user(db_session, calendar_id)
+    fake_strava.add_activities(2)
+
+    @asynccontextmanager
+    async def session():
+        yield db_session
+
+    outcomes = await run_cycle(shard=0, shard_count=1, interval=0, concurrency=1, session_factory=session)
+
+    assert outcomes == {"synced": 1}
+    assert len(fake_google.calendars[calendar_id]) == 2
@@ -0,0 +1,68 @@
+import pytest
+import httpx
+from fastapi import HTTPException
+from integrations.google_calendar_api import create_google_calendar_event, update_google_calendar_event
+from integrations.google_calendar_retry import backoff_delay, is_rate_limited, parse_retry_after
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setenv("GOOGLE_CALENDAR_RETRY_BASE_SECONDS", "0")
+
+
+def test_backoff_uses_full_jitter_and_honours_retry_after(monkeypatch):
+    monkeypatch.setenv("GOOGLE_CALENDAR_RETRY_BASE_SECONDS", "1")
+    monkeypatch.setenv("GOOGLE_CALENDAR_RETRY_MAX_BACKOFF_SECONDS", "4")
+
+    assert all(0 <= backoff_delay(10) <= 4 for _ in range(50))
+    assert backoff_delay(1, retry_after=7) == 7
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
+
+
+def test_only_quota_403s_are_rate_limits():
+    quota = {"error": {"code": 403, "errors": [{"reason": "userRateLimitExceeded"}]}}
+    forbidden = {"error": {"code": 403, "errors": [{"reason": "forbidden"}]}}
+
+    assert is_rate_limited(httpx.Response(429))
+    assert is_rate_limited(httpx.Response(403, json=quota))
+    assert not is_rate_limited(httpx.Response(403, json=forbidden))
+
+
+@pytest.mark.asyncio
+async def test_throttled_insert_is_retried(fake_google):
+    calendar_id = fake_google.add_calendar()
+    fake_google.fail_next("insert", 429)
+    fake_google.fail_next("insert", 403, reason="rateLimitExceeded")
+
+    event = await create_google_calendar_event("token", calendar_id, {"summary": "Run"})
+
+    assert fake_google.calls["POST insert"] == 3
+    assert list(fake_google.calendars[calendar_id]) == [event["id"]]
+
+
+@pytest.mark.asyncio
+async def test_insert_is_not_repeated_after_server_error(fake_google):
+    calendar_id = fake_google.add_calendar()
+    fake_google.fail_next("insert", 503)
+
+    with pytest.raises(HTTPException):
+        await create_google_calendar_event("token", calendar_id, {"summary": "Run"})
+    assert fake_google.calls["POST insert"] == 1
+
+
+@pytest.mark.asyncio
+async def test_patch_is_retried_after_server_error_until_attempts_run_out(fake_google, monkeypatch):
+    monkeypatch.setenv("GOOGLE_CALENDAR_RETRY_MAX_ATTEMPTS", "3")
+    calendar_id = fake_google.add_calendar()
+    event = await create_google_calendar_event("token", calendar_id, {"summary": "Old"})
+
+    fake_google.fail_next("patch", 503, times=2)
+    updated = await update_google_calendar_event("token", calendar_id, event["id"], {"summary": "New"})
+    assert updated["summary"] == "New"
+
+    fake_google.fail_next("patch", 500, times=3)
+    with pytest.raises(HTTPException):
+        await update_google_calendar_event("token", calendar_id, event["id"], {"summary": "Newer"})
+    assert fake_google.calls["PATCH patch"] == 6
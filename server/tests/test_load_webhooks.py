@@ -0,0 +1,53 @@
+import pytest
+from benchmarks.load_webhooks import LoadRun, parse_args, percentile, run_level
+from main import app
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) is None
+
+
+def test_webhook_events_follow_the_mix():
+    run = LoadRun(parse_args(["webhooks", "--mix", "create=1"]))
+    run.athlete_ids = ["a", "b"]
+
+    events = run.webhook_events(10, {"create": 0.5, "update": 0.4, "delete": 0.1}, burst=3)
+
+    assert len(events) == 10
+    # Every update or delete targets an activity created earlier by the same athlete
+    created = set()
+    for event in events:
+        if event["aspect_type"] == "create":
+            created.add((event["owner_id"], event["object_id"]))
+        else:
+            assert (event["owner_id"], event["object_id"]) in created
+    assert len({event["event_time"] for event in events}) == 10
+
+
+@pytest.mark.asyncio
+async def test_webhook_load_is_drained_by_workers(monkeypatch):
+    monkeypatch.setenv("WEBHOOK_DEBOUNCE_SECONDS", "0")
+    args = parse_args(["webhooks", "--athletes", "2", "--events", "12", "--drain-timeout", "30"])
+
+    result = await run_level(app, args, workers=1, concurrency=4)
+
+    assert result["requests"] == 12
+    assert result["error_rate"] == 0
+    assert sum(result["outcomes"].values()) == 12
+    assert result["drain_s"] is not None
+    assert not result["jobs"].get("failed")
+
+
+@pytest.mark.asyncio
+async def test_auth_load_reports_latencies():
+    args = parse_args(["auth", "--users", "2", "--requests", "9"])
+
+    result = await run_level(app, args, workers=0, concurrency=3)
+
+    assert result["requests"] == 9
+    assert result["statuses"] == {"200": 9}
+    assert result["p50_ms"] <= result["p99_ms"] <= result["max_ms"]
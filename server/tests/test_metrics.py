@@ -0,0 +1,49 @@
+import pytest
+from prometheus_client import REGISTRY
+from services.strava import sync_strava_data
+from services.user import ensure_strava_token
+from tests.test_save_activities import make_strava_user
+from tests.test_sync_jobs import make_event
+from tests.test_token_refresh import make_user
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.asyncio
+async def test_sync_records_upstream_calls_and_stages(fake_google, fake_strava, db_session):
+    calendar_id = fake_google.add_calendar()
+    strava_user = await make_strava_user(db_session, calendar_id)
+    fake_strava.add_activities(3)
+    pages = sample("upstream_requests_total", integration="strava", function="_get_activities_page", status="ok")
+    stages = {stage: sample("sync_stage_seconds_count", stage=stage) for stage in ("fetch", "lookup", "render", "write")}
+
+    await sync_strava_data(strava_user, db_session)
+
+    assert sample("upstream_requests_total", integration="strava", function="_get_activities_page", status="ok") == pages + 1
+    assert sample("upstream_request_seconds_count", integration="google", function="_send_batch") > 0
+    for stage, count in stages.items():
+        assert sample("sync_stage_seconds_count", stage=stage) > count, stage
+
+
+@pytest.mark.asyncio
+async def test_webhooks_and_token_refreshes_are_counted(client, fake_strava):
+    queued = sample("strava_webhook_events_total", aspect_type="create", status="queued")
+    refreshed = sample("oauth_token_refreshes_total", provider="strava", status="ok")
+
+    await client.post("/strava/webhook/", json=make_event(2001))
+    await ensure_strava_token(make_user(expired=True))
+
+    assert sample("strava_webhook_events_total", aspect_type="create", status="queued") == queued + 1
+    assert sample("oauth_token_refreshes_total", provider="strava", status="ok") == refreshed + 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_serves_prometheus_text(client):
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE upstream_request_seconds histogram" in response.text
+    assert "db_pool_checked_out_connections" in response.text
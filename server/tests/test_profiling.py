@@ -0,0 +1,69 @@
+import pytest
+import asyncio
+from utils.profiling import Profiler, profiler
+
+
+def busy(ms: float):
+    deadline = asyncio.get_running_loop().time() + ms / 1000
+    while asyncio.get_running_loop().time() < deadline:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_sampled_runs_write_folded_cpu_and_memory_profiles(tmp_path):
+    local = Profiler()
+    local.output_dir = tmp_path
+    local.configure(sample_rate=1, interval_ms=1, memory=True)
+
+    @local.profiled("work")
+    async def work():
+        data = [bytearray(1024) for _ in range(100)]
+        busy(30)
+        return len(data)
+
+    assert await work() == 100
+
+    cpu = next(tmp_path.glob("work-*.cpu.folded")).read_text().splitlines()
+    mem = next(tmp_path.glob("work-*.mem.folded")).read_text().splitlines()
+    assert any("busy (test_profiling.py" in line for line in cpu)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in cpu + mem)
+    assert any("test_profiling.py" in line for line in mem)
+
+
+@pytest.mark.asyncio
+async def test_profiling_is_off_by_default(tmp_path):
+    local = Profiler()
+    local.output_dir = tmp_path
+
+    @local.profiled("work")
+    async def work():
+        return "done"
+
+    assert local.sample_rate == 0
+    assert await work() == "done"
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_admin_profiling_requires_token_and_switches_at_runtime(client, monkeypatch, tmp_path):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(profiler, "output_dir", tmp_path)
+    monkeypatch.setattr(profiler, "sample_rate", 0)
+
+    assert (await client.put("/admin/profiling", json={"sample_rate": 0.5})).status_code == 403
+    response = await client.put(
+        "/admin/profiling", json={"sample_rate": 0.5}, headers={"X-Admin-Token": "secret"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["sample_rate"] == profiler.sample_rate == 0.5
+    assert (await client.put(
+        "/admin/profiling", json={"sample_rate": 2}, headers={"X-Admin-Token": "secret"}
+    )).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_admin_routes_are_hidden_without_admin_token(client, monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+
+    assert (await client.get("/admin/profiling", headers={"X-Admin-Token": ""})).status_code == 404
@@ -0,0 +1,106 @@
+import pytest
+from sqlalchemy import update
+from datetime import datetime, timedelta, timezone
+from models.user import User
+from models.google_user import GoogleUser
+from models.sync_ledger import SyncLedgerEntry
+from crud.sync_ledger import get_ledger_entries
+from services.strava import save_activities
+from services.reconcile import reconcile_calendar
+from tests.test_save_activities import make_activity, make_strava_user
+
+
+async def synced_user(fake_google, db_session, count: int):
+    calendar_id = fake_google.add_calendar()
+    strava_user = await make_strava_user(db_session, calendar_id)
+    await save_activities(strava_user, [make_activity(i) for i in range(1, count + 1)], db_session, mode="batch")
+    entries = await get_ledger_entries(db_session, strava_user.user.id, list(range(1, count + 1)))
+    return strava_user.user, {activity_id: entry.google_event_id for activity_id, entry in entries.items()}
+
+
+@pytest.mark.asyncio
+async def test_first_pass_lists_calendar_then_only_changes(fake_google, db_session):
+    user, event_ids = await synced_user(fake_google, db_session, 3)
+
+    first = await reconcile_calendar(user, db_session)
+    assert (first.full_sync, first.changes) == (True, 3)
+    assert not (first.removed or first.edited or first.adopted)
+
+    fake_google.remove_event(user.calendar_id, event_ids[2])
+    second = await reconcile_calendar(user, db_session)
+
+    assert (second.full_sync, second.changes, second.removed) == (False, 1, [2])
+    assert set(await get_ledger_entries(db_session, user.id, [1, 2, 3])) == {1, 3}
+
+
+@pytest.mark.asyncio
+async def test_manual_edits_are_recorded(fake_google, db_session):
+    user, event_ids = await synced_user(fake_google, db_session, 2)
+    await reconcile_calendar(user, db_session)
+    # The sync last wrote the events an hour ago
+    await db_session.execute(
+        update(SyncLedgerEntry)
+        .where(SyncLedgerEntry.user_id == user.id)
+        .values(last_written_at=datetime.now(timezone.utc) - timedelta(hours=1))
+    )
+    await db_session.commit()
+
+    fake_google.edit_event(user.calendar_id, event_ids[1], summary="Renamed by hand")
+    result = await reconcile_calendar(user, db_session)
+
+    assert (result.changes, result.edited) == (1, [1])
+    entries = await get_ledger_entries(db_session, user.id, [1, 2])
+    await db_session.refresh(entries[1])
+    assert entries[1].remote_updated_at is not None and entries[2].remote_updated_at is None
+    assert (entries[1].content_hash, entries[1].field_hashes) == (None, None)
+    assert entries[2].content_hash is not None
+
+
+@pytest.mark.asyncio
+async def test_next_write_restores_manually_edited_event(fake_google, db_session):
+    user, event_ids = await synced_user(fake_google, db_session, 1)
+    await reconcile_calendar(user, db_session)
+    await db_session.execute(
+        update(SyncLedgerEntry)
+        .where(SyncLedgerEntry.user_id == user.id)
+        .values(last_written_at=datetime.now(timezone.utc) - timedelta(hours=1))
+    )
+    await db_session.commit()
+    original = dict(fake_google.calendars[user.calendar_id][event_ids[1]])
+    fake_google.edit_event(user.calendar_id, event_ids[1], summary="Renamed by hand")
+    await reconcile_calendar(user, db_session)
+
+    # The activity itself did not change, the write still overwrites the edit
+    await save_activities(user.strava_data, [make_activity(1)], db_session, mode="batch")
+
+    assert fake_google.calendars[user.calendar_id][event_ids[1]]["summary"] == original["summary"]
+    entries = await get_ledger_entries(db_session, user.id, [1])
+    await db_session.refresh(entries[1])
+    assert entries[1].remote_updated_at is None and entries[1].content_hash is not None
+
+
+@pytest.mark.asyncio
+async def test_expired_sync_token_falls_back_to_full_pass(fake_google, db_session):
+    user, event_ids = await synced_user(fake_google, db_session, 2)
+    await reconcile_calendar(user, db_session)
+
+    fake_google.expire_sync_tokens()
+    # Deleted while the token was unusable: only a full pass can notice
+    del fake_google.calendars[user.calendar_id][event_ids[1]]
+    result = await reconcile_calendar(user, db_session)
+
+    assert (result.full_sync, result.removed) == (True, [1])
+    assert set(await get_ledger_entries(db_session, user.id, [1, 2])) == {2}
+
+
+@pytest.mark.asyncio
+async def test_tagged_events_missing_from_ledger_are_adopted(fake_google, db_session):
+    user, event_ids = await synced_user(fake_google, db_session, 1)
+    other = User(name="Other", calendar_id=user.calendar_id, google_data=GoogleUser(access_token="google-token"))
+    db_session.add(other)
+    await db_session.flush()
+
+    result = await reconcile_calendar(other, db_session)
+
+    assert result.adopted == [1]
+    assert (await get_ledger_entries(db_session, other.id, [1]))[1].google_event_id == event_ids[1]
@@ -0,0 +1,212 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from models.user import User
+from models.google_user import GoogleUser
+from models.strava_user import StravaUser
+from crud.sync_ledger import get_ledger_entries, get_tombstoned_activity_ids, record_tombstone
+from services.strava import save_activities, sync_strava_data, delete_strava_activity
+
+
+def make_activity(activity_id: int, start_date: str = "2026-04-14T20:05:06Z") -> dict:
+    return {
+        "id": activity_id,
+        "name": "Afternoon Run",
+        "sport_type": "Run",
+        "distance": 5964.4,
+        "elapsed_time": 2436,
+        "start_date": start_date,
+        "timezone": "America/Chicago",
+    }
+
+
+async def make_strava_user(db, calendar_id: str) -> StravaUser:
+    user = User(name="Test", calendar_id=calendar_id, google_data=GoogleUser(access_token="google-token"))
+    strava_user = StravaUser(user=user, athlete_id="1", access_token="strava-token", last_synced_at=None)
+    db.add(strava_user)
+    await db.flush()
+    return strava_user
+
+
+@pytest.mark.asyncio
+async def test_batch_mode_creates_then_updates_through_ledger(fake_google, db_session):
+    calendar_id = fake_google.add_calendar()
+    strava_user = await make_strava_user(db_session, calendar_id)
+    activities = [make_activity(i) for i in range(1, 4)]
+
+    await save_activities(strava_user, activities, db_session, mode="batch")
+    for activity in activities:
+        activity["name"] = "Evening Run"
+    result = await save_activities(strava_user, activities, db_session, mode="batch")
+
+    assert sorted(result.saved) == [1, 2, 3] and not result.failed
+    assert len(fake_google.calendars[calendar_id]) == 3
+    assert fake_google.calls["POST batch"] == 2
+    assert fake_google.calls["POST insert"] == 3
+    assert fake_google.calls["PATCH patch"] == 3
+    # The second pass finds the events through the sync ledger, not the Calendar API
+    assert fake_google.calls["GET list"] == 3
+    entries = await get_ledger_entries(db_session, strava_user.user.id, [1, 2, 3])
+    assert {entry.google_event_id for entry in entries.values()} == set(fake_google.calendars[calendar_id])
+
+
+@pytest.mark.asyncio
+async def test_event_removed_from_calendar_is_recreated(fake_google, db_session):
+    calendar_id = fake_google.add_calendar()
+    strava_user = await make_strava_user(db_session, calendar_id)
+    await save_activities(strava_user, [make_activity(1)], db_session)
+    fake_google.calendars[calendar_id].clear()
+
+    await save_activities(strava_user, [make_activity(1)], db_session)
+
+    [event_id] = fake_google.calendars[calendar_id]
+    assert (await get_ledger_entries(db_session, strava_user.user.id, [1]))[1].google_event_id == event_id
+
+
+@pytest.mark.asyncio
+async def test_concurrent_mode_reports_failures_and_holds_cursor(fake_google, db_session):
+    calendar_id = fake_google.add_calendar()
+    strava_user = await make_strava_user(db_session, calendar_id)
+    activities = [
+        make_activity(1, "2026-04-14T08:00:00Z"),
+        make_activity(2, "2026-04-14T12:00:00Z"),
+        make_activity(3, "2026-04-14T18:00:00Z"),
+    ]
+    # One of the three creates fails, the others must still be written
+    fake_google.fail_next("insert", 400)
+
+    result = await save_activities(strava_user, activities, db_session, mode="concurrent", concurrency=2)
+
+    assert len(result.failed) == 1 and len(result.saved) == 2
+    assert len(fake_google.calendars[calendar_id]) == 2
+    [failed_id] = result.failed
+    failed_start = datetime.fromisoformat(activities[failed_id - 1]["start_date"].replace("Z", "+00:00"))
+    # The cursor never passes the failed activity, so the next sync fetches it again
+    assert result.latest_end_utc < failed_start
+    assert result.latest_end_utc.tzinfo == timezone.utc
+
+
+@pytest.mark.asyncio
+async def test_sync_pages_through_every_new_activity(fake_google, fake_strava, db_session, monkeypatch):
+    monkeypatch.setenv("STRAVA_PAGE_SIZE", "20")
+    calendar_id = fake_google.add_calendar()
+    strava_user = await make_strava_user(db_session, calendar_id)
+    activities = fake_strava.add_activities(45)
+
+    result = await sync_strava_data(strava_user, db_session)
+
+    assert len(result.saved) == 45 and not result.failed
+    assert fake_strava.calls["list"] == 3
+    assert len(fake_google.calendars[calendar_id]) == 45
+    last = activities[-1]
+    last_start = datetime.fromisoformat(last["start_date"].replace("Z", "+00:00"))
+    assert strava_user.last_synced_at == last_start + timedelta(seconds=last["elapsed_time"])
+
+
+@pytest.mark.asyncio
+async def test_sync_uses_stored_calendar_and_recovers_when_it_is_gone(fake_google, fake_strava, db_session):
+    calendar_id = fake_google.add_calendar()
+    strava_user = await make_strava_user(db_session, calendar_id)
+    fake_strava.add_activities(2)
+
+    await sync_strava_data(strava_user, db_session)
+    assert fake_google.calls["GET calendarList"] == 0
+
+    # The user deleted the Strava calendar: the sync resolves a new one once and writes into it
+    del fake_google.calendars[calendar_id], fake_google.calendar_summaries[calendar_id]
+    strava_user.last_synced_at = None
+    result = await sync_strava_data(strava_user, db_session)
+
+    new_calendar_id = strava_user.user.calendar_id
+    assert new_calendar_id != calendar_id
+    assert sorted(result.saved) == sorted(fake_strava.activities)
+    assert len(fake_google.calendars[new_calendar_id]) == 2
+    assert fake_google.calls["GET calendarList"] == 1
+    assert fake_google.calls["POST calendar"] == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["sequential", "batch"])
+async def test_unrendered_changes_skip_the_write_and_rendered_ones_patch_only_what_changed(fake_google, db_session, mode):
+    calendar_id = fake_google.add_calendar()
+    strava_user = await make_strava_user(db_session, calendar_id)
+    activity = make_activity(1)
+    await save_activities(strava_user, [activity], db_session, mode=mode)
+    writes = sum(fake_google.calls.values())
+
+    # Kudos and gear are not part of the event
+    result = await save_activities(
+        strava_user, [{**activity, "kudos_count": 3, "gear_id": "g1"}], db_session, mode=mode, skip_unchanged=True
+    )
+    assert (result.saved, result.unchanged) == ([1], [1])
+    assert sum(fake_google.calls.values()) == writes
+
+    result = await save_activities(
+        strava_user, [{**activity, "elapsed_time": 3000}], db_session, mode=mode, skip_unchanged=True
+    )
+
+    assert (result.saved, result.unchanged) == ([1], [])
+    # Only the fields that render elapsed_time were sent
+    [patch] = fake_google.patches
+    assert set(patch) == {"description", "end"}
+    [event] = fake_google.calendars[calendar_id].values()
+    assert event["end"]["dateTime"] == "2026-04-14T20:55:06+00:00"
+
+
+@pytest.mark.asyncio
+async def test_delete_removes_only_its_event_and_keeps_the_sync_cursor(fake_google, db_session):
+    calendar_id = fake_google.add_calendar()
+    strava_user = await make_strava_user(db_session, calendar_id)
+    activities = [make_activity(1), make_activity(2, "2026-04-14T22:00:00Z")]
+    result = await save_activities(strava_user, activities, db_session)
+    strava_user.last_synced_at = result.latest_end_utc
+    await db_session.commit()
+    fake_google.calls.clear()
+
+    assert await delete_strava_activity(strava_user, 1, db_session) == {"status": "deleted"}
+
+    assert strava_user.last_synced_at == result.latest_end_utc
+    # One ledger hit, one DELETE: no Calendar search and nothing else rewritten
+    assert dict(fake_google.calls) == {"DELETE delete": 1}
+    assert len(fake_google.calendars[calendar_id]) == 1
+    assert await get_ledger_entries(db_session, strava_user.user.id, [1]) == {}
+    assert await get_tombstoned_activity_ids(db_session, strava_user.user.id, [1, 2]) == {1}
+
+
+@pytest.mark.asyncio
+async def test_tombstoned_activity_is_never_recreated(fake_google, db_session):
+    calendar_id = fake_google.add_calendar()
+    strava_user = await make_strava_user(db_session, calendar_id)
+    await save_activities(strava_user, [make_activity(1)], db_session)
+    # Removed by hand first: the delete still succeeds
+    fake_google.calendars[calendar_id].clear()
+    await delete_strava_activity(strava_user, 1, db_session)
+
+    # A delete for an activity that never reached the calendar still blocks it
+    assert await delete_strava_activity(strava_user, 2, db_session) == {"status": "no event"}
+    # e.g. the Strava list still returning them after the delete webhook
+    result = await save_activities(
+        strava_user, [make_activity(1), make_activity(2), make_activity(3, "2026-04-15T08:00:00Z")], db_session
+    )
+
+    assert result.deleted == [1, 2] and result.saved == [3]
+    assert len(fake_google.calendars[calendar_id]) == 1
+    assert result.latest_end_utc == datetime(2026, 4, 15, 8, 40, 36, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["sequential", "concurrent", "batch"])
+async def test_tombstone_next_to_its_ledger_entry_is_skipped(fake_google, db_session, mode):
+    calendar_id = fake_google.add_calendar()
+    strava_user = await make_strava_user(db_session, calendar_id)
+    await save_activities(strava_user, [make_activity(1), make_activity(2)], db_session)
+    # A delete whose Calendar call failed: tombstone recorded, ledger entry and event still there
+    await record_tombstone(db_session, strava_user.user.id, 1)
+    fake_google.calls.clear()
+
+    result = await save_activities(
+        strava_user, [make_activity(1), make_activity(2)], db_session, mode=mode, skip_unchanged=True
+    )
+
+    assert result.deleted == [1] and result.saved == [2] and result.unchanged == [2]
+    assert not result.failed
+    assert sum(fake_google.calls.values()) == 0
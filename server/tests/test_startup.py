@@ -0,0 +1,56 @@
+import pytest
+import httpx
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+from database import create_tables
+from dependencies import require_admin
+from integrations import http_client
+from main import include_routers
+from routes.lazy import LazyRouter
+from utils.metrics import record_boot_phase
+
+
+@pytest.mark.asyncio
+async def test_ready_pings_database_and_warms_upstreams(client, fake_google, fake_strava):
+    response = await client.get("/ready")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["database_ms"] >= 0
+    assert http_client._warmed == {"google", "strava"}
+
+
+@pytest.mark.asyncio
+async def test_lazy_routers_are_imported_on_first_request():
+    app = FastAPI()
+    include_routers(app, lazy=True)
+    app.dependency_overrides[require_admin] = lambda: None
+    admin = next(route.app for route in app.routes if getattr(route, "path", None) == "/admin")
+    assert isinstance(admin, LazyRouter) and admin._router is None
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as test_client:
+        response = await test_client.get("/admin/profiling")
+        missing = await test_client.get("/admin/nope")
+
+    # The parent app's dependency overrides reach the lazily loaded routes
+    assert response.status_code == 200
+    assert "sample_rate" in response.json()
+    assert admin._router is not None
+    assert missing.status_code == 404
+    assert missing.json() == {"detail": "Not Found"}
+
+
+def test_boot_phase_is_recorded_once():
+    elapsed = record_boot_phase("test_phase")
+
+    assert elapsed > 0
+    assert record_boot_phase("test_phase") is None
+    assert REGISTRY.get_sample_value("app_boot_seconds", {"phase": "test_phase"}) == elapsed
+    # main.py was imported by the tests
+    assert REGISTRY.get_sample_value("app_boot_seconds", {"phase": "imported"}) > 0
+
+
+def test_create_tables_is_idempotent():
+    create_tables()
+    create_tables()
@@ -0,0 +1,97 @@
+import pytest
+import pytest_asyncio
+import httpx
+from contextlib import asynccontextmanager
+from sqlalchemy import delete
+from models.strava_rate_limit import StravaRateLimit
+from crud.strava_rate_limit import get_rate_limits, record_rate_limit_usage
+from integrations.strava_rate_limit import (
+    StravaRateLimitGovernor, StravaRateLimited, parse_rate_limit_headers
+)
+
+
+@pytest_asyncio.fixture
+async def governor(db_session):
+    """Governor whose shared store is the test transaction, starting from empty buckets."""
+    # Other tests reach Strava through the global governor, which commits its usage
+    await db_session.execute(delete(StravaRateLimit))
+    await db_session.commit()
+
+    @asynccontextmanager
+    async def session():
+        yield db_session
+    return StravaRateLimitGovernor(session_factory=session)
+
+
+def rate_limit_response(status_code: int = 200, usage: str = "10,50", read_usage: str = "5,20") -> httpx.Response:
+    return httpx.Response(status_code, headers={
+        "X-RateLimit-Limit": "200,2000",
+        "X-RateLimit-Usage": usage,
+        "X-ReadRateLimit-Limit": "100,1000",
+        "X-ReadRateLimit-Usage": read_usage,
+    })
+
+
+def test_parse_rate_limit_headers():
+    assert parse_rate_limit_headers(rate_limit_response().headers) == {
+        "overall": ((200, 2000), (10, 50)),
+        "read": ((100, 1000), (5, 20)),
+    }
+    assert parse_rate_limit_headers(httpx.Headers({"X-RateLimit-Limit": "oops"})) == {}
+
+
+@pytest.mark.asyncio
+async def test_headers_update_the_shared_budget(governor):
+    await governor.record(rate_limit_response())
+
+    budget = {entry.bucket: entry for entry in await governor.budget()}
+    assert (budget["overall"].short.usage, budget["overall"].daily.usage) == (10, 50)
+    assert (budget["read"].short.usage, budget["read"].short.remaining) == (5, 85)
+
+    await governor.acquire()
+    budget = {entry.bucket: entry for entry in await governor.budget()}
+    assert (budget["overall"].short.usage, budget["read"].short.usage) == (11, 6)
+
+
+@pytest.mark.asyncio
+async def test_calls_are_held_back_before_the_limit(governor, monkeypatch):
+    monkeypatch.setenv("STRAVA_RATE_LIMIT_MAX_WAIT_SECONDS", "0")
+    # 90 of 100 reads used: at the default 0.9 threshold, reads must wait for the next window
+    await governor.record(rate_limit_response(usage="90,90", read_usage="90,90"))
+
+    with pytest.raises(StravaRateLimited) as excinfo:
+        await governor.acquire()
+    assert excinfo.value.status_code == 429
+    assert 0 < excinfo.value.retry_after <= 15 * 60
+
+    # Writes only count against the overall limit, which still has room
+    await governor.acquire(read=False)
+
+
+@pytest.mark.asyncio
+async def test_429_marks_the_window_spent(governor, monkeypatch):
+    monkeypatch.setenv("STRAVA_RATE_LIMIT_MAX_WAIT_SECONDS", "0")
+    await governor.record(rate_limit_response(429, usage="20,100"))
+
+    with pytest.raises(StravaRateLimited):
+        await governor.acquire(read=False)
+
+
+@pytest.mark.asyncio
+async def test_older_response_does_not_lower_usage(governor):
+    await governor.record(rate_limit_response(usage="30,300"))
+    # A request sent earlier finishes last with the counters from before
+    await governor.record(rate_limit_response(usage="25,290"))
+
+    budget = {entry.bucket: entry for entry in await governor.budget()}
+    assert (budget["overall"].short.usage, budget["overall"].daily.usage) == (30, 300)
+
+
+@pytest.mark.asyncio
+async def test_new_window_resets_usage(governor, db_session):
+    await record_rate_limit_usage(db_session, "overall", (200, 2000), (30, 300), short_window=900, daily_window=0)
+    await record_rate_limit_usage(db_session, "overall", (200, 2000), (2, 302), short_window=1800, daily_window=0)
+
+    row = (await get_rate_limits(db_session))["overall"]
+    await db_session.refresh(row)
+    assert (row.short_usage, row.daily_usage, row.short_window) == (2, 302, 1800)
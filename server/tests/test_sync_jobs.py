@@ -0,0 +1,171 @@
+import asyncio
+import contextlib
+import pytest
+from sqlalchemy import func, select
+from datetime import datetime, timedelta, timezone
+from models.user import User
+from models.google_user import GoogleUser
+from models.strava_user import StravaUser
+from models.sync_job import SyncJob
+from crud.sync_job import claim_sync_job, enqueue_sync_job, fail_sync_job
+from services.sync_worker import run_next_job, queue_webhook_event, coalesce_aspect
+import services.sync_worker as sync_worker
+
+
+def make_event(activity_id: int, aspect_type: str = "create", owner_id: int = 1, event_time: int = 1776197106) -> dict:
+    return {
+        "object_type": "activity",
+        "object_id": activity_id,
+        "aspect_type": aspect_type,
+        "owner_id": owner_id,
+        "event_time": event_time,
+        "updates": {},
+    }
+
+
+async def make_connected_user(db, calendar_id: str) -> StravaUser:
+    expiry = datetime.now(timezone.utc) + timedelta(hours=1)
+    user = User(
+        name="Test",
+        calendar_id=calendar_id,
+        google_data=GoogleUser(access_token="google-token", refresh_token="refresh", access_token_expiry=expiry),
+    )
+    strava_user = StravaUser(
+        user=user, athlete_id="1", access_token="strava-token", refresh_token="refresh", expires_at=expiry
+    )
+    db.add(strava_user)
+    await db.flush()
+    return strava_user
+
+
+@pytest.mark.asyncio
+async def test_webhook_only_queues_the_event(client, db_session):
+    response = await client.post("/strava/webhook/", json=make_event(1001))
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+    job = (await db_session.scalars(select(SyncJob))).one()
+    assert (job.athlete_id, job.activity_id, job.aspect_type, job.status) == ("1", 1001, "create", "pending")
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_queued_create(fake_google, fake_strava, db_session):
+    calendar_id = fake_google.add_calendar()
+    await make_connected_user(db_session, calendar_id)
+    fake_strava.add_activities(3)
+    job = await enqueue_sync_job(db_session, make_event(1003))
+
+    assert await run_next_job(db_session) is True
+    assert await run_next_job(db_session) is False
+
+    assert (job.status, job.result, job.attempts) == ("done", "processed", 1)
+    assert len(fake_google.calendars[calendar_id]) == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_with_backoff_then_given_up(fake_google, fake_strava, db_session, monkeypatch):
+    monkeypatch.setenv("SYNC_JOB_MAX_ATTEMPTS", "2")
+    await make_connected_user(db_session, fake_google.add_calendar())
+    fake_strava.fail_next("list", 500, times=2)
+    job = await enqueue_sync_job(db_session, make_event(1001))
+
+    await run_next_job(db_session)
+    assert (job.status, job.attempts) == ("pending", 1)
+    assert job.run_after > datetime.now(timezone.utc) + timedelta(seconds=20)
+    # Not due yet
+    assert await run_next_job(db_session) is False
+
+    job.run_after = datetime.now(timezone.utc)
+    await db_session.commit()
+    await run_next_job(db_session)
+    assert (job.status, job.attempts) == ("failed", 2)
+    assert job.last_error
+
+
+def test_coalesce_aspect():
+    assert coalesce_aspect("create", "update") == "create"
+    assert coalesce_aspect("update", "update") == "update"
+    assert coalesce_aspect("create", "delete") == "delete"
+    assert coalesce_aspect("delete", "update") == "delete"
+
+
+@pytest.mark.asyncio
+async def test_burst_for_one_activity_collapses_into_one_job(db_session, monkeypatch):
+    monkeypatch.setenv("WEBHOOK_DEBOUNCE_SECONDS", "5")
+    job, status = await queue_webhook_event(db_session, make_event(1001, "create", event_time=100))
+    first_run_after = job.run_after
+
+    for event_time in (101, 102):
+        _, status = await queue_webhook_event(db_session, make_event(1001, "update", event_time=event_time))
+        assert status == "coalesced"
+
+    [job] = (await db_session.scalars(select(SyncJob))).all()
+    assert job.aspect_type == "create" and job.event_time == 102
+    assert job.events == ["create:100", "update:101", "update:102"]
+    # The debounce window restarts with every event
+    assert job.run_after >= first_run_after
+
+
+@pytest.mark.asyncio
+async def test_delete_cancels_pending_update(db_session):
+    await queue_webhook_event(db_session, make_event(1001, "update", event_time=100))
+    await queue_webhook_event(db_session, make_event(1001, "delete", event_time=101))
+
+    [job] = (await db_session.scalars(select(SyncJob))).all()
+    assert job.aspect_type == "delete"
+
+
+@pytest.mark.asyncio
+async def test_retry_of_processed_event_is_dropped(fake_google, fake_strava, db_session, monkeypatch):
+    monkeypatch.setenv("WEBHOOK_DEBOUNCE_SECONDS", "0")
+    await make_connected_user(db_session, fake_google.add_calendar())
+    fake_strava.add_activities(1)
+    await queue_webhook_event(db_session, make_event(1001))
+    await run_next_job(db_session)
+
+    job, status = await queue_webhook_event(db_session, make_event(1001))
+
+    assert (job, status) == (None, "duplicate")
+    assert await db_session.scalar(select(func.count()).select_from(SyncJob)) == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_conflicting_with_a_new_pending_job_is_superseded(db_session):
+    await enqueue_sync_job(db_session, make_event(1001, "update", event_time=100))
+    job = await claim_sync_job(db_session)
+    # A webhook for the same activity arrives while the job runs
+    newer = await enqueue_sync_job(db_session, make_event(1001, "update", event_time=101))
+
+    await fail_sync_job(db_session, job, "boom", timedelta(seconds=30))
+
+    assert (job.status, job.locked_at, job.last_error) == ("superseded", None, "boom")
+    await db_session.refresh(newer)
+    assert newer.status == "pending"
+
+
+@pytest.mark.asyncio
+async def test_worker_loop_requeues_jobs_left_running(db_session, monkeypatch):
+    job = await enqueue_sync_job(db_session, make_event(1001))
+    await claim_sync_job(db_session)
+    # The worker that claimed it never recorded the outcome
+    job.locked_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+    await db_session.commit()
+
+    @contextlib.asynccontextmanager
+    async def test_session():
+        yield db_session
+    monkeypatch.setattr(sync_worker, "AsyncSessionLocal", test_session)
+
+    worker = asyncio.create_task(sync_worker.worker_loop(0, poll_interval=0.01, lock_timeout=60))
+    try:
+        for _ in range(500):
+            await asyncio.sleep(0.01)
+            if job.status == "done":
+                break
+    finally:
+        worker.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await worker
+
+    # The athlete has no Strava connection in this test, so the requeued job ends as no_user
+    assert (job.status, job.result, job.attempts) == ("done", "no_user", 2)
@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from models.user import User
+from models.google_user import GoogleUser
+from models.strava_user import StravaUser
+from services.user import ensure_google_token, ensure_strava_token
+
+
+def make_user(expired: bool) -> User:
+    expiry = datetime.now(timezone.utc) + (timedelta(minutes=-5) if expired else timedelta(hours=1))
+    return User(
+        name="Test",
+        google_data=GoogleUser(access_token="old-google", refresh_token="refresh", access_token_expiry=expiry),
+        strava_data=StravaUser(access_token="old-strava", refresh_token="refresh", expires_at=expiry),
+    )
+
+
+@pytest.mark.asyncio
+async def test_valid_tokens_are_not_refreshed(fake_google, fake_strava):
+    user = make_user(expired=False)
+
+    assert await ensure_google_token(user) == "old-google"
+    assert await ensure_strava_token(user) == "old-strava"
+    assert fake_google.calls["POST token"] == 0 and fake_strava.calls["token"] == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refreshes_share_one_request(fake_google, fake_strava):
+    # Same account loaded by several concurrent requests
+    users = [make_user(expired=True) for _ in range(5)]
+    for user in users[1:]:
+        user.google_data.id = users[0].google_data.id
+        user.strava_data.id = users[0].strava_data.id
+
+    google_tokens = await asyncio.gather(*(ensure_google_token(user) for user in users))
+    strava_tokens = await asyncio.gather(*(ensure_strava_token(user) for user in users))
+
+    assert fake_google.calls["POST token"] == 1 and fake_strava.calls["token"] == 1
+    assert len(set(google_tokens)) == 1 and google_tokens[0] != "old-google"
+    assert set(strava_tokens) == {"strava-access"}
+    assert users[0].strava_data.refresh_token == "strava-refresh"
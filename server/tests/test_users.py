@@ -1,8 +1,9 @@
 import pytest
 
 @pytest.mark.skip(reason="Temporarily skipping while integrating Strava and Google Calendar")
-def test_create_user(client):
-    response = client.post("/users/", json={
+@pytest.mark.asyncio
+async def test_create_user(client):
+    response = await client.post("/users/", json={
         "strava_id": "12345",
         "google_email": "testuser@example.com",
         "strava_access_token": "access_token_abc",
@@ -15,9 +16,10 @@ def test_create_user(client):
     assert "id" in data
 
 @pytest.mark.skip(reason="Temporarily skipping while integrating Strava and Google Calendar")
-def test_get_user_by_strava_id(client):
+@pytest.mark.asyncio
+async def test_get_user_by_strava_id(client):
     # First, create a user
-    create_resp = client.post("/users/", json={
+    create_resp = await client.post("/users/", json={
         "strava_id": "getuser123",
         "google_email": "fetch@example.com",
         "strava_access_token": "token_123",
@@ -27,7 +29,7 @@ def test_get_user_by_strava_id(client):
     user_id = create_resp.json()["id"]
 
     # Now, fetch the same user by Strava ID
-    fetch_resp = client.get(f"/users/strava/getuser123")
+    fetch_resp = await client.get(f"/users/strava/getuser123")
     assert fetch_resp.status_code == 200
     data = fetch_resp.json()
     assert data["id"] == user_id
@@ -0,0 +1,45 @@
+"""
+utils/fingerprint.py
+
+Helpers for fingerprinting rendered Calendar event payloads.
+
+Contains small, reusable, stateless functions with no business logic or database access.
+"""
+import hashlib
+import json
+
+
+def _digest(value) -> str:
+    # Canonical JSON (sorted keys, no whitespace) so equal payloads always hash the same
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def event_fingerprint(event_json: dict) -> tuple[str, dict[str, str]]:
+    """
+    Hash an event payload as a whole and per top-level field.
+
+    Args:
+        event_json (dict): The Google Calendar event body (including extendedProperties).
+
+    Returns:
+        tuple[str, dict[str, str]]: The content hash and a hash for each top-level field.
+    """
+    return _digest(event_json), {field: _digest(value)[:16] for field, value in event_json.items()}
+
+
+def changed_fields(event_json: dict, field_hashes: dict[str, str] | None) -> dict:
+    """
+    Keep only the top-level fields whose hash differs from the stored one.
+
+    Args:
+        event_json (dict): The newly rendered event body.
+        field_hashes (dict[str, str] | None): Field hashes stored when the event was last written.
+
+    Returns:
+        dict: A PATCH body with the changed fields (the whole body when nothing was stored).
+    """
+    if not field_hashes:
+        return event_json
+    _, new_hashes = event_fingerprint(event_json)
+    return {field: value for field, value in event_json.items() if field_hashes.get(field) != new_hashes[field]}
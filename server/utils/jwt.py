@@ -53,30 +53,43 @@ def create_refresh_token(user_id: str):
     }
     return jwt.encode(payload, os.getenv("JWT_SECRET"), algorithm=JWT_ALGORITHM)
 
-# Decode a JWT token to get the user ID and verify type
-def verify_jwt(token: str, expected_type: str):
+# Decode a JWT token and verify its type
+def decode_jwt(token: str, expected_type: str):
     """
-    Decode a JWT token and return the user ID and verify type.
-    
+    Decode a JWT token and verify its signature, expiry and type.
+
     Args:
         token (str): The JWT token to verify.
         expected_type (str): The expected token type ("access" or "refresh").
 
     Returns:
-        str: The user ID (`sub`) embedded in the token.
+        dict: The token payload, with the user ID in `sub` and the expiry (epoch seconds) in `exp`.
     """
     try:
         payload = jwt.decode(token, os.getenv("JWT_SECRET"), algorithms=[JWT_ALGORITHM])
         if payload.get("type") != expected_type:
             raise HTTPException(status_code=401, detail=f"Expected {expected_type} token")
-        user_id = payload.get("sub")
-        if not user_id:
+        if not payload.get("sub"):
             raise HTTPException(status_code=401, detail="Invalid token")
-        return user_id
+        return payload
     except ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
+
+# Decode a JWT token to get the user ID and verify type
+def verify_jwt(token: str, expected_type: str):
+    """
+    Decode a JWT token and return the user ID and verify type.
+    
+    Args:
+        token (str): The JWT token to verify.
+        expected_type (str): The expected token type ("access" or "refresh").
+
+    Returns:
+        str: The user ID (`sub`) embedded in the token.
+    """
+    return decode_jwt(token, expected_type)["sub"]
     
 # Refresh a JWT access token if it has expired
 def refresh_jwt_token(token: str):
@@ -0,0 +1,171 @@
+"""
+utils/metrics.py
+
+Prometheus metrics for upstream calls, sync stages, webhooks, the DB pool, token refreshes and boot time.
+
+Metrics live in the default prometheus_client registry and are served as text by `/metrics`.
+Recording one is a lock-protected increment, cheap enough to leave on in production.
+"""
+from prometheus_client import Counter, Histogram, Gauge
+from typing import AsyncIterable, AsyncIterator, TypeVar
+import functools
+import os
+import time
+
+T = TypeVar("T")
+
+# Upstream calls take tens of ms to several seconds (Google retries included)
+UPSTREAM_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    "upstream_request_seconds",
+    "Latency of integration functions that call Google or Strava",
+    ["integration", "function"],
+    buckets=UPSTREAM_BUCKETS
+)
+UPSTREAM_REQUESTS = Counter(
+    "upstream_requests",
+    "Integration function calls by outcome (ok, an HTTP status code, or error)",
+    ["integration", "function", "status"]
+)
+SYNC_STAGE_SECONDS = Histogram(
+    "sync_stage_seconds",
+    "Time per sync stage: fetch (waiting on Strava pages, once per sync), cache (storing raw activities), "
+    "lookup (ledger reads and Calendar event lookups), render, write (Calendar writes) and ledger "
+    "(recording written events)",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+WEBHOOK_EVENTS = Counter(
+    "strava_webhook_events",
+    "Strava webhook events received, by aspect_type and how they were handled",
+    ["aspect_type", "status"]
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a connection from the async DB pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 5, 30)
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the async DB pool"
+)
+TOKEN_REFRESHES = Counter(
+    "oauth_token_refreshes",
+    "OAuth access token refresh requests, by provider and outcome",
+    ["provider", "status"]
+)
+BOOT_SECONDS = Gauge(
+    "app_boot_seconds",
+    "Seconds from process start to each boot milestone: imported (app module loaded), "
+    "ready (startup finished, serving requests) and first_webhook (first Strava webhook queued)",
+    ["phase"]
+)
+
+
+def _seconds_since_process_start() -> float | None:
+    """Age of this process from /proc (Linux), so boot time includes the interpreter and imports before this module."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Split after the command name, which may contain spaces; starttime is the 22nd field
+            start_ticks = int(f.read().rpartition(")")[2].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+
+
+# Elsewhere boot time is counted from the first import of this module
+_process_started = time.monotonic() - (_seconds_since_process_start() or 0.0)
+_boot_phases: set[str] = set()
+
+
+def _status(error: Exception) -> str:
+    """Label for a failed call: the upstream HTTP status if there is one."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return str(status) if status is not None else "error"
+
+
+def observe_upstream(integration: str):
+    """
+    Decorate an async integration function to record its latency and outcome.
+
+    Args:
+        integration (str): "google" or "strava".
+
+    Returns:
+        Callable: The decorator.
+    """
+    def decorator(func):
+        latency = UPSTREAM_REQUEST_SECONDS.labels(integration, func.__name__)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            status = "ok"
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                status = _status(e)
+                raise
+            finally:
+                latency.observe(time.perf_counter() - started)
+                UPSTREAM_REQUESTS.labels(integration, func.__name__, status).inc()
+        return wrapper
+    return decorator
+
+
+def sync_stage(stage: str):
+    """Context manager timing one sync stage (`with sync_stage("render"): ...`)."""
+    return SYNC_STAGE_SECONDS.labels(stage).time()
+
+
+async def timed_iteration(iterable: AsyncIterable[T], stage: str) -> AsyncIterator[T]:
+    """
+    Yield from an async iterable, recording the total time spent waiting on it as one stage.
+
+    Only the time awaiting the next item counts, not the time the consumer spends on each item.
+    """
+    iterator = aiter(iterable)
+    waited = 0.0
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = await anext(iterator)
+            except StopAsyncIteration:
+                return
+            finally:
+                waited += time.perf_counter() - started
+            yield item
+    finally:
+        SYNC_STAGE_SECONDS.labels(stage).observe(waited)
+
+
+def record_token_refresh(provider: str, status: str):
+    TOKEN_REFRESHES.labels(provider, status).inc()
+
+
+def record_webhook_event(aspect_type: str | None, status: str):
+    WEBHOOK_EVENTS.labels(aspect_type or "missing", status).inc()
+
+
+def record_boot_phase(phase: str) -> float | None:
+    """
+    Record the seconds from process start to a boot milestone, once per process.
+
+    Args:
+        phase (str): "imported", "ready" or "first_webhook".
+
+    Returns:
+        float | None: The seconds recorded, or None if the phase was already recorded.
+    """
+    if phase in _boot_phases:
+        return None
+    _boot_phases.add(phase)
+    elapsed = time.monotonic() - _process_started
+    BOOT_SECONDS.labels(phase).set(elapsed)
+    return elapsed
@@ -0,0 +1,178 @@
+"""
+utils/profiling.py
+
+On-demand CPU and memory profiling for a sampled share of webhook and sync runs.
+
+A profiled run gets:
+- <name>-<time>-<pid>.cpu.folded: stacks of the event loop thread sampled every
+  interval_ms. Time spent waiting on I/O (DB, HTTP) shows up under the event loop's select.
+- <name>-<time>-<pid>.mem.folded: live allocations made during the run (tracemalloc),
+  weighted by bytes. Only written when memory profiling is on.
+
+Both are in the collapsed-stack format read by flamegraph.pl, speedscope and inferno.
+Settings change at runtime through /admin/profiling; with sample_rate 0 (the default)
+a wrapped call costs one comparison.
+"""
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+import asyncio
+import functools
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def fold_stack(frame) -> str:
+    """Collapse a frame and its callers into `outer;...;inner`."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler(threading.Thread):
+    """
+    Sample one thread's stack at a fixed interval until stopped.
+
+    Args:
+        thread_id (int): The thread to sample (threading.get_ident() of the event loop).
+        interval (float): Seconds between samples.
+    """
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[fold_stack(frame)] += 1
+
+    def stop(self) -> Counter:
+        self._stop_event.set()
+        self.join()
+        return self.stacks
+
+
+def fold_snapshot(snapshot: tracemalloc.Snapshot) -> Counter:
+    """Collapse a tracemalloc snapshot into stacks weighted by allocated bytes."""
+    stacks: Counter = Counter()
+    for stat in snapshot.statistics("traceback"):
+        # tracemalloc lists the most recent frame first
+        stack = ";".join(f"{os.path.basename(frame.filename)}:{frame.lineno}" for frame in reversed(stat.traceback))
+        stacks[stack] += stat.size
+    return stacks
+
+
+def write_folded(path: Path, stacks: Counter):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("".join(f"{stack} {count}\n" for stack, count in stacks.most_common()))
+
+
+class Profiler:
+    """
+    Process-wide profiling settings and the single in-flight profile.
+
+    Notes:
+        - At most one run is profiled at a time: the sampler and tracemalloc see the
+          whole process, so overlapping profiles would count each other's work.
+        - Settings are per process; each worker is switched through its own admin endpoint
+          or starts from the PROFILE_* environment variables.
+    """
+    def __init__(self):
+        self.sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+        self.interval_ms = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+        self.memory = os.getenv("PROFILE_MEMORY", "false").lower() == "true"
+        self.output_dir = Path(os.getenv("PROFILE_OUTPUT_DIR", "profiles"))
+        self._active = False
+
+    def configure(self, sample_rate: float | None = None, interval_ms: float | None = None, memory: bool | None = None):
+        """Change settings at runtime; None leaves a setting unchanged."""
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if interval_ms is not None:
+            self.interval_ms = interval_ms
+        if memory is not None:
+            self.memory = memory
+
+    def settings(self) -> dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "interval_ms": self.interval_ms,
+            "memory": self.memory,
+            "output_dir": str(self.output_dir),
+        }
+
+    def profiles(self, limit: int = 50) -> list[str]:
+        """Most recent profile files, newest first."""
+        if not self.output_dir.is_dir():
+            return []
+        files = sorted(self.output_dir.glob("*.folded"), key=lambda path: path.stat().st_mtime, reverse=True)
+        return [path.name for path in files[:limit]]
+
+    def _should_profile(self) -> bool:
+        return self.sample_rate > 0 and not self._active and random.random() < self.sample_rate
+
+    def profiled(self, name: str):
+        """
+        Decorate an async function so a sample_rate share of its runs is profiled.
+
+        Args:
+            name (str): Prefix of the profile files.
+
+        Returns:
+            Callable: The decorator.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if not self._should_profile():
+                    return await func(*args, **kwargs)
+                return await self._run(name, func, args, kwargs)
+            return wrapper
+        return decorator
+
+    async def _run(self, name: str, func, args, kwargs):
+        self._active = True
+        memory = self.memory
+        started_tracing = memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(25)
+        sampler = StackSampler(threading.get_ident(), self.interval_ms / 1000)
+        sampler.start()
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            cpu_stacks = sampler.stop()
+            snapshot = tracemalloc.take_snapshot() if memory and tracemalloc.is_tracing() else None
+            if started_tracing:
+                tracemalloc.stop()
+            self._active = False
+            stem = f"{name}-{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{os.getpid()}"
+            try:
+                await asyncio.to_thread(self._write, stem, cpu_stacks, snapshot)
+                print(f"🔬 Profiled {name} ({elapsed * 1000:.0f}ms): {self.output_dir / stem}.*.folded")
+            except OSError as e:
+                print(f"⚠️ Failed to write profile {stem}: {e}")
+
+    def _write(self, stem: str, cpu_stacks: Counter, snapshot: tracemalloc.Snapshot | None):
+        write_folded(self.output_dir / f"{stem}.cpu.folded", cpu_stacks)
+        if snapshot is not None:
+            write_folded(self.output_dir / f"{stem}.mem.folded", fold_snapshot(snapshot))
+
+
+profiler = Profiler()
@@ -0,0 +1,39 @@
+"""
+utils/single_flight.py
+
+Helper for de-duplicating concurrent async calls.
+
+Contains small, reusable, stateless functions with no business logic or database access.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time; concurrent callers with the same key
+    await the in-flight call and share its result (or exception).
+    """
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]):
+        """
+        Run func() unless a call with the same key is already in flight.
+
+        Args:
+            key (Hashable): Identifies calls that may share one result.
+            func (Callable): Zero-argument coroutine function to run.
+
+        Returns:
+            Any: The result of the (shared) call.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        # Shield so one caller being cancelled doesn't cancel the call for everyone else
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
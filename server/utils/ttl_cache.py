@@ -0,0 +1,66 @@
+"""
+utils/ttl_cache.py
+
+Bounded in-process cache whose entries expire.
+
+Contains small, reusable, stateless functions with no business logic or database access.
+"""
+from collections import OrderedDict
+from typing import Any, Hashable
+import time
+
+
+class TTLCache:
+    """
+    Least-recently-used cache where every entry also has its own expiry time.
+
+    Args:
+        maxsize (int): Entries kept before the least recently used one is evicted.
+
+    Notes:
+        - Not shared between processes; each worker keeps its own copy.
+    """
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default=None):
+        """Return the cached value, or default if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires, value = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        """
+        Cache a value for ttl seconds (values with ttl <= 0 are not cached).
+
+        Args:
+            key (Hashable): Cache key.
+            value (Any): Value to cache.
+            ttl (float): Seconds until the entry expires.
+
+        Returns:
+            None
+        """
+        if ttl <= 0 or self.maxsize <= 0:
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)